@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+import time
+from latency_trace import percentile
+from bot_logging import get_logger
+
+logger = get_logger("armed")
+
+# Is the staged modal still usable: amount entered and "Buy N mins for $X" enabled
+ARMED_CHECK_SCRIPT = """
+var amount = arguments[0];
+var button = Array.prototype.find.call(document.querySelectorAll('button'), function(el) {
+    var text = el.innerText || el.textContent || '';
+    return text.indexOf('Buy') !== -1 && text.indexOf('mins for $') !== -1;
+});
+var input = document.querySelector("input[type='number']");
+return !!(button && !button.disabled && (button.offsetWidth || button.offsetHeight) &&
+          input && parseFloat(input.value) === amount);
+"""
+
+class ArmedTab:
+    """A tab holding a pre-staged buy modal for one handle"""
+    
+    def __init__(self, handle, window, staging_ms):
+        self.handle = handle
+        self.window = window
+        self.armed_at = time.monotonic()
+        self.staging_ms = staging_ms
+
+class ArmedModal:
+    """Pre-staged buy modals for handles expected to be promoted soon
+    
+    Each watched handle gets its own tab in the buyer's Chrome with the
+    market page open, the buy modal up, USD selected and the amount entered.
+    maintain() re-stages tabs that went stale or invalid, so when a
+    promotion is detected fire() only has to click "Buy ... mins for $" and
+    "Confirm & Buy". Staging runs on the monitor's thread, so a pass stages
+    at most stage_per_pass handles and leaves the rest to the next calls.
+    Staging time and trigger-to-confirm time are measured separately.
+    """
+    
+    def __init__(self, buyer, handles, refresh_interval=300, max_armed=5, check_interval=15, stage_per_pass=1):
+        """
+        Args:
+            buyer: TimeFunBuyer whose driver hosts the armed tabs (used from one thread only)
+            handles: time.fun handles to keep armed
+            refresh_interval: Re-stage a tab after this many seconds (default: 300)
+            max_armed: Maximum number of armed tabs (default: 5)
+            check_interval: Minimum seconds between maintenance passes (default: 15)
+            stage_per_pass: Handles (re-)staged per maintenance pass (default: 1)
+        """
+        self.buyer = buyer
+        self.handles = [handle.strip().lstrip("@") for handle in handles if handle.strip()][:max_armed]
+        if len(handles) > max_armed:
+            logger.warning("Arming only the first %d handles: %s", max_armed, ", ".join(self.handles))
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        self.stage_per_pass = stage_per_pass
+        self.last_maintained = None
+        self.tabs = {}
+        self.staging_ms = []
+        self.trigger_ms = []
+        self.fired = 0
+        self.failed = 0
+    
+    def is_armed(self, handle):
+        return handle.lower() in self.tabs
+    
+    def close_window(self, window, home):
+        driver = self.buyer.driver
+        try:
+            driver.switch_to.window(window)
+            driver.close()
+        except Exception as e:
+            logger.warning("Error closing armed tab: %s", e)
+        finally:
+            driver.switch_to.window(home)
+    
+    def arm(self, handle):
+        """Stage the buy modal for a handle in a new tab
+        
+        Returns:
+            bool: True if the modal is staged
+        """
+        driver = self.buyer.driver
+        home = driver.current_window_handle
+        started = time.monotonic()
+        driver.switch_to.new_window("tab")
+        window = driver.current_window_handle
+        try:
+            staged = self.buyer.stage_purchase(handle, use_tab_pool=False)
+            staged = staged and self.is_valid(window, switch=False)
+        except Exception as e:
+            logger.error("Error staging buy modal for %s: %s", handle, e)
+            staged = False
+        finally:
+            driver.switch_to.window(home)
+        
+        staging_ms = (time.monotonic() - started) * 1000
+        if not staged:
+            logger.warning("Could not arm %s, will retry at the next maintenance pass", handle, extra={"username": handle})
+            self.close_window(window, home)
+            return False
+        self.tabs[handle.lower()] = ArmedTab(handle, window, staging_ms)
+        self.staging_ms.append(staging_ms)
+        logger.info("Armed %s", handle, extra={"username": handle, "stage": "staging", "elapsed_ms": staging_ms})
+        return True
+    
+    def is_valid(self, window, switch=True):
+        """Check that a staged modal still has the amount entered and the Buy button enabled"""
+        driver = self.buyer.driver
+        home = driver.current_window_handle
+        try:
+            if switch:
+                driver.switch_to.window(window)
+            return bool(driver.execute_script(ARMED_CHECK_SCRIPT, self.buyer.buy_amount))
+        except Exception:
+            return False
+        finally:
+            if switch:
+                driver.switch_to.window(home)
+    
+    def maintain(self, force=False, stage_all=False):
+        """Arm missing handles and re-stage tabs that are stale or no longer valid
+        
+        Cheap to call from a monitor loop: passes closer together than
+        check_interval are skipped unless forced, and a pass stages at most
+        stage_per_pass handles (all of them with stage_all, e.g. at startup).
+        When handles are left over, the next call runs a pass right away.
+        """
+        now = time.monotonic()
+        if not force and self.last_maintained is not None and now - self.last_maintained < self.check_interval:
+            return
+        home = self.buyer.driver.current_window_handle
+        budget = len(self.handles) if stage_all else self.stage_per_pass
+        backlog = False
+        failed = []
+        for handle in self.handles:
+            tab = self.tabs.get(handle.lower())
+            if tab is not None:
+                stale = time.monotonic() - tab.armed_at > self.refresh_interval
+                if not stale and self.is_valid(tab.window):
+                    continue
+            if budget <= 0:
+                # A stale tab stays in place until its turn; it may well still work
+                backlog = True
+                continue
+            budget -= 1
+            if tab is not None:
+                logger.info("Re-arming %s (%s)", handle, "stale" if stale else "modal no longer valid")
+                del self.tabs[handle.lower()]
+                self.close_window(tab.window, home)
+            if not self.arm(handle):
+                failed.append(handle)
+        
+        # Handles that failed to arm go to the back so they can't starve the others
+        self.handles = [h for h in self.handles if h not in failed] + failed
+        self.last_maintained = None if backlog else now
+    
+    def fire(self, handle):
+        """Complete the purchase in an armed tab: only the two final clicks remain
+        
+        The tab is used up either way, and a handle that was bought is no
+        longer kept armed.
+        
+        Returns:
+            bool: True if the purchase was confirmed
+        """
+        tab = self.tabs.pop(handle.lower(), None)
+        if tab is None:
+            return False
+        driver = self.buyer.driver
+        home = driver.current_window_handle
+        trace = self.buyer.tracer.current()
+        if trace is not None:
+            trace.attrs["armed"] = True
+            trace.mark("existence_checked")  # verified while staging
+        
+        started = time.monotonic()
+        try:
+            driver.switch_to.window(tab.window)
+            success = self.buyer.complete_purchase(handle)
+        except Exception as e:
+            logger.error("Error firing armed purchase for %s: %s", handle, e)
+            success = False
+        trigger_ms = (time.monotonic() - started) * 1000
+        self.close_window(tab.window, home)
+        
+        if success:
+            self.fired += 1
+            self.trigger_ms.append(trigger_ms)
+            self.handles = [h for h in self.handles if h.lower() != handle.lower()]
+            logger.info("Armed purchase for %s confirmed (staged in %.0f ms, %.0fs earlier)", handle, tab.staging_ms,
+                        time.monotonic() - tab.armed_at, extra={"stage": "trigger_to_confirm", "elapsed_ms": trigger_ms})
+        else:
+            self.failed += 1
+            logger.warning("Armed purchase for %s failed", handle, extra={"stage": "trigger_to_confirm", "elapsed_ms": trigger_ms})
+        return success
+    
+    def report(self):
+        staging = sorted(self.staging_ms)
+        trigger = sorted(self.trigger_ms)
+        print(f"Armed: {len(self.tabs)} tabs ready, {self.fired} fired, {self.failed} failed")
+        if staging:
+            print(f"Staging: n={len(staging)}, p50 {percentile(staging, 50):.0f} ms, p95 {percentile(staging, 95):.0f} ms")
+        if trigger:
+            print(f"Trigger to confirm: n={len(trigger)}, p50 {percentile(trigger, 50):.0f} ms, p95 {percentile(trigger, 95):.0f} ms")
+    
+    def close(self):
+        """Close every armed tab"""
+        driver = self.buyer.driver
+        try:
+            home = driver.current_window_handle
+        except Exception:
+            return
+        for tab in list(self.tabs.values()):
+            self.close_window(tab.window, home)
+        self.tabs = {}
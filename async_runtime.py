@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+import time
+import signal
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from purchase_pipeline import PurchaseEvent
+from bot_logging import get_logger
+
+logger = get_logger("async")
+
+class AsyncRuntime:
+    """asyncio task runner that offloads blocking Selenium/tweepy calls
+    
+    Thread-safe blocking work (HTTP checks, API polls) runs on a shared,
+    sized pool. A WebDriver session must only ever be used by one thread at
+    a time, so each session gets its own single-thread lane executor. Tasks
+    are cancelled and cleanups run on SIGINT/SIGTERM or when any task
+    crashes.
+    """
+    
+    def __init__(self, workers=8, call_timeout=60):
+        """
+        Args:
+            workers: Size of the shared blocking-call pool
+            call_timeout: Default timeout in seconds for a blocking call
+        """
+        self.workers = workers
+        self.call_timeout = call_timeout
+        self.pool = None
+        self.executors = []
+        self.cleanups = []
+        self.tasks = set()
+        self.stopping = None
+    
+    def lane_executor(self, name):
+        """Single-thread executor for a resource that isn't thread-safe (e.g. a WebDriver)"""
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.executors.append(executor)
+        return executor
+    
+    async def call(self, func, *args, timeout=None, executor=None, on_finish=None):
+        """Run a blocking call off the event loop
+        
+        On timeout the awaiting task gives up, but the call itself keeps
+        running in its thread until it returns (threads can't be killed).
+        on_finish, if given, is scheduled on the loop once the call has
+        really returned, timeout or not.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args)
+        if on_finish is not None:
+            call = functools.partial(self.run_then, loop, call, on_finish)
+        future = loop.run_in_executor(executor or self.pool, call)
+        return await asyncio.wait_for(future, timeout or self.call_timeout)
+    
+    @staticmethod
+    def run_then(loop, call, on_finish):
+        """Run call in the current thread, then hand on_finish to the loop"""
+        try:
+            return call()
+        finally:
+            try:
+                loop.call_soon_threadsafe(on_finish)
+            except RuntimeError:
+                # The loop already closed during shutdown
+                pass
+    
+    def spawn(self, coro, name):
+        """Start a supervised task; a crash stops the whole runtime"""
+        task = asyncio.create_task(self.supervise(coro, name), name=name)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+    
+    async def supervise(self, coro, name):
+        try:
+            await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Task %s crashed, shutting down: %s", name, e)
+            self.stop()
+    
+    def add_cleanup(self, func, executor=None):
+        """Register a blocking cleanup (e.g. buyer.close) to run at shutdown, newest first"""
+        self.cleanups.append((func, executor))
+    
+    def stop(self):
+        """Request a structured shutdown"""
+        if self.stopping and not self.stopping.is_set():
+            logger.info("Stopping...")
+            self.stopping.set()
+    
+    async def run(self, main):
+        """Run main(runtime), which spawns tasks, then wait until stopped
+        
+        Args:
+            main: Async callable taking this runtime
+        """
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="blocking")
+        self.executors.append(self.pool)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows: Ctrl+C cancels the main task instead, cleanup still runs below
+                pass
+        
+        try:
+            await main(self)
+            await self.stopping.wait()
+        finally:
+            await self.shutdown()
+    
+    async def shutdown(self, grace=15):
+        """Cancel all tasks, run cleanups, then release the executors"""
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for func, executor in reversed(self.cleanups):
+            try:
+                await self.call(func, timeout=grace, executor=executor)
+            except Exception as e:
+                logger.warning("Error during cleanup: %s", e)
+        self.cleanups = []
+        
+        for executor in self.executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors = []
+
+class AsyncSniper:
+    """Detection, existence checks and purchases as concurrent asyncio tasks
+    
+    Poll lanes from a MultiAccountMonitor feed an existence-check stage,
+    which batches whatever is queued into one concurrent HTTP round, and
+    confirmed usernames go to purchase workers that each drive their own
+    buyer in a lane executor. A username stays pending, so repeat
+    detections coalesce, until its buy has actually returned.
+    """
+    
+    def __init__(self, runtime, monitor, checker, buyer_factory, browser_executor=None,
+                 purchase_workers=1, max_queue=20, poll_timeout=120, check_timeout=30, purchase_timeout=300,
+                 report_interval=60, check_mode="http"):
+        """
+        Args:
+            runtime: AsyncRuntime to run on
+            monitor: MultiAccountMonitor whose targets and sources are polled
+            checker: UserExistenceChecker used for the batched existence checks
+            buyer_factory: Callable returning a buyer with buy_with_retry() and close()
+            browser_executor: Lane executor that owns the monitoring WebDriver
+            purchase_workers: Number of concurrent purchase workers
+            max_queue: Maximum pending events per stage; the oldest is dropped when full
+            poll_timeout / check_timeout / purchase_timeout: Per-call timeouts in seconds
+            report_interval: Seconds between stats reports
+            check_mode: USER_CHECK_MODE; "browser" skips the HTTP batch and leaves
+                every check to the purchase worker's buyer
+        """
+        self.runtime = runtime
+        self.monitor = monitor
+        self.checker = checker
+        self.buyer_factory = buyer_factory
+        self.browser_executor = browser_executor
+        self.purchase_workers = purchase_workers
+        self.max_queue = max_queue
+        self.poll_timeout = poll_timeout
+        self.check_timeout = check_timeout
+        self.purchase_timeout = purchase_timeout
+        self.report_interval = report_interval
+        self.check_mode = check_mode
+        self.loop = None
+        self.check_queue = None
+        self.purchase_queue = None
+        self.pending = set()  # usernames queued, being checked or being bought
+        self.metrics = {"detected": 0, "coalesced": 0, "dropped": 0, "rejected": 0,
+                        "succeeded": 0, "failed": 0, "timed_out": 0}
+        
+        # Detections arrive on executor threads; hop back onto the loop
+        self.monitor.on_detection = self.detected
+    
+    async def start(self, runtime):
+        """Spawn the poll lanes, the check stage and the purchase workers"""
+        self.loop = asyncio.get_running_loop()
+        self.check_queue = asyncio.Queue(maxsize=self.max_queue)
+        self.purchase_queue = asyncio.Queue(maxsize=self.max_queue)
+        
+        lanes = 0
+        for source in {t.source for t in self.monitor.targets}:
+            executor = self.browser_executor if source == "browser" else None
+            for i in range(self.monitor.lane_workers.get(source, 1)):
+                runtime.spawn(self.poll_lane(source, executor), f"{source}-lane-{i + 1}")
+                lanes += 1
+        runtime.spawn(self.check_stage(), "existence-check")
+        runtime.spawn(self.report_loop(), "reporter")
+        for i in range(self.purchase_workers):
+            runtime.spawn(self.purchase_worker(i + 1), f"purchase-worker-{i + 1}")
+        logger.info("Async runtime: %d poll lanes, %d purchase workers", lanes, self.purchase_workers)
+    
+    def detected(self, target, tweet_id, usernames):
+        """Called from a poll thread for each tweet with usernames"""
+        detected_at = time.time()
+        for username in usernames:
+            self.loop.call_soon_threadsafe(self.enqueue, self.check_queue, PurchaseEvent(tweet_id, username, detected_at))
+    
+    def enqueue(self, stage, event):
+        """Queue an event without blocking, coalescing duplicates and dropping the oldest when full"""
+        key = event.username.lower()
+        if stage is self.check_queue:
+            if key in self.pending:
+                self.metrics["coalesced"] += 1
+                logger.info("Purchase for %s already pending, skipping duplicate", event.username, extra={"tweet_id": event.tweet_id})
+                return
+            self.pending.add(key)
+            self.metrics["detected"] += 1
+        
+        if stage.full():
+            dropped = stage.get_nowait()
+            stage.task_done()
+            self.pending.discard(dropped.username.lower())
+            self.metrics["dropped"] += 1
+            logger.warning("Queue full, dropped pending purchase for %s", dropped.username, extra={"tweet_id": dropped.tweet_id})
+        stage.put_nowait(event)
+    
+    async def poll_lane(self, source, executor):
+        """Poll due targets of one source until cancelled"""
+        while True:
+            target, wait = self.monitor.next_target(source)
+            if target is None:
+                await asyncio.sleep(wait)
+                continue
+            try:
+                await self.runtime.call(self.monitor.poll_target, target,
+                                        timeout=self.poll_timeout, executor=executor)
+            except asyncio.TimeoutError:
+                # The poll is still running in its thread and will reschedule the target itself
+                logger.warning("Poll of @%s exceeded %ss", target.account, self.poll_timeout)
+    
+    async def check_stage(self):
+        """Check existence for everything queued in one concurrent batch"""
+        while True:
+            events = [await self.check_queue.get()]
+            while not self.check_queue.empty():
+                events.append(self.check_queue.get_nowait())
+            
+            usernames = [event.username for event in events]
+            results = {}
+            if self.check_mode != "browser":
+                try:
+                    results = await self.runtime.call(self.checker.check_many, usernames, timeout=self.check_timeout)
+                except Exception as e:
+                    logger.warning("Existence check failed, leaving it to the purchase worker: %s", e)
+            
+            for event in events:
+                self.check_queue.task_done()
+                # None (inconclusive) is re-checked by the worker's buyer with its browser fallback
+                if results.get(event.username) is False:
+                    self.pending.discard(event.username.lower())
+                    self.metrics["rejected"] += 1
+                    logger.info("Cannot buy %s as they don't exist on time.fun", event.username, extra={"tweet_id": event.tweet_id})
+                else:
+                    self.enqueue(self.purchase_queue, event)
+    
+    async def purchase_worker(self, number):
+        """Buy queued usernames with a dedicated buyer"""
+        executor = self.runtime.lane_executor(f"purchase-{number}")
+        buyer = await self.runtime.call(self.buyer_factory, timeout=120, executor=executor)
+        self.runtime.add_cleanup(buyer.close, executor)
+        # Share the cache so the buyer's own existence check is a hit
+        buyer.user_checker.cache = self.checker.cache
+        
+        while True:
+            event = await self.purchase_queue.get()
+            wait_time = time.time() - event.detected_at
+            logger.info("Buying %s (queued %.1fs)", event.username, wait_time, extra={"tweet_id": event.tweet_id, "stage": "queued", "elapsed_ms": wait_time * 1000})
+            # Released when the buy returns, not when we stop waiting for it
+            release = functools.partial(self.pending.discard, event.username.lower())
+            try:
+                success = await self.runtime.call(buyer.buy_with_retry, event.username, timeout=self.purchase_timeout,
+                                                  executor=executor, on_finish=release)
+            except asyncio.TimeoutError:
+                logger.warning("Purchase for %s exceeded %ss, still finishing in the background", event.username, self.purchase_timeout)
+                self.metrics["timed_out"] += 1
+                success = False
+            except Exception as e:
+                logger.error("Error buying for user %s: %s", event.username, e)
+                success = False
+            finally:
+                self.purchase_queue.task_done()
+            
+            self.metrics["succeeded" if success else "failed"] += 1
+            logger.info("%s for user: %s", "Successfully bought" if success else "Failed to buy", event.username, extra={"tweet_id": event.tweet_id})
+    
+    async def report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.monitor.report()
+            self.report()
+    
+    def report(self):
+        """Print stage depths and purchase metrics"""
+        m = self.metrics
+        print(f"Async pipeline: checking {self.check_queue.qsize()}, buying {self.purchase_queue.qsize()}, "
+              f"detected {m['detected']}, coalesced {m['coalesced']}, dropped {m['dropped']}, rejected {m['rejected']}, "
+              f"succeeded {m['succeeded']}, failed {m['failed']}, timed out {m['timed_out']}")
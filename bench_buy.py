@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from mock_timefun import MockTimeFun, DEFAULT_DELAYS, BUY_BUTTONS
+from delay_profiles import PROFILES
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(summary, baseline, tolerance=0.2, slack_ms=5):
+    """Stages whose p50 regressed beyond tolerance (plus a small absolute slack)
+    
+    Returns:
+        list: (stage, baseline_p50, current_p50)
+    """
+    regressions = []
+    for stage, base in baseline.items():
+        current = summary.get(stage)
+        if current and current["p50"] > base["p50"] * (1 + tolerance) + slack_ms:
+            regressions.append((stage, base["p50"], current["p50"]))
+    return regressions
+
+def run_benchmark(runs=10, variant="default", delays=None, fast_path=True, username="benchcreator", profile=None):
+    """Drive TimeFunBuyer.buy_user against the local stand-in under headless Chrome
+    
+    Returns:
+        tuple: (LatencyTracer summary, number of successful runs)
+    """
+    mock = MockTimeFun(variant=variant, delays=delays).start()
+    
+    # Point the buyer at the stand-in; explicit env wins over .env.utf8
+    os.environ["TIMEFUN_BASE_URL"] = mock.url
+    os.environ["HEADLESS"] = "True"
+    os.environ["TAB_POOL_SIZE"] = "0"
+    os.environ["LATENCY_TRACE_FILE"] = ""
+    os.environ["SELECTOR_STATS_FILE"] = "bench_selector_stats.json"
+    if profile:
+        os.environ["BUY_PROFILE"] = profile
+    from timefun_buyer_en import TimeFunBuyer
+    
+    buyer = TimeFunBuyer(use_existing_session=False, fast_path=fast_path)
+    buyer.is_logged_in = True
+    successes = 0
+    try:
+        for run in range(1, runs + 1):
+            trace = buyer.tracer.start(f"bench-{run}", variant=variant)
+            trace.mark("buy_started")
+            started = time.perf_counter()
+            with buyer.tracer.activate(trace):
+                success = buyer.buy_user(username)
+            trace.finish("bought" if success else "failed")
+            successes += success
+            print(f"Run {run}/{runs}: {'ok' if success else 'FAILED'} in {time.perf_counter() - started:.3f}s")
+        return buyer.tracer.summary(), successes
+    finally:
+        buyer.owns_tracer = False  # the summary is printed below
+        buyer.close()
+        try:
+            buyer.driver.quit()  # this Chrome was started for the benchmark
+        except Exception:
+            pass
+        mock.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Buy latency benchmark against a local time.fun stand-in")
+    parser.add_argument("--runs", "-n", type=int, default=10, help="Number of buys (default: 10)")
+    parser.add_argument("--variant", choices=sorted(BUY_BUTTONS), default="default", help="Buy button DOM variant (default: default)")
+    parser.add_argument("--slow", action="store_true", help="Use the fixed-sleep path instead of the fast path")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="Delay profile for the buys (default: BUY_PROFILE env)")
+    parser.add_argument("--delay", action="append", default=[], metavar="NAME=MS",
+                        help=f"Override a render delay, e.g. settle_delay=2000 ({', '.join(DEFAULT_DELAYS)})")
+    parser.add_argument("--baseline", default="bench_baseline.json", help="Baseline file (default: bench_baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 regression per stage (default: 0.2)")
+    args = parser.parse_args()
+    
+    delays = {}
+    for override in args.delay:
+        name, _, value = override.partition("=")
+        if name not in DEFAULT_DELAYS:
+            parser.error(f"Unknown delay: {name}")
+        delays[name] = int(value)
+    
+    summary, successes = run_benchmark(args.runs, args.variant, delays, fast_path=not args.slow, profile=args.profile)
+    key = f"{args.variant}-{'slow' if args.slow else 'fast'}" + (f"-{args.profile}" if args.profile else "")
+    
+    print(f"=== Buy latency: {key}, {successes}/{args.runs} succeeded (ms) ===")
+    for stage, s in summary.items():
+        print(f"{stage}: n={s['count']}, p50 {s['p50']:.1f}, p95 {s['p95']:.1f}, p99 {s['p99']:.1f}")
+    
+    with open("bench_output.txt", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"at": datetime.now().isoformat(timespec="seconds"), "key": key, "runs": args.runs,
+                            "succeeded": successes, "delays": {**DEFAULT_DELAYS, **delays}, "summary": summary}) + "\n")
+    
+    baseline = load_baseline(args.baseline)
+    if args.save_baseline:
+        baseline[key] = summary
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline for {key} saved to {args.baseline}")
+        sys.exit(0)
+    
+    if key not in baseline:
+        print(f"No baseline for {key} in {args.baseline}, run with --save-baseline to create one")
+        sys.exit(0 if successes == args.runs else 1)
+    
+    regressions = compare(summary, baseline[key], args.tolerance)
+    for stage, base, current in regressions:
+        print(f"REGRESSION {stage}: p50 {base:.1f}ms -> {current:.1f}ms")
+    if not regressions:
+        print(f"No stage regressed more than {args.tolerance:.0%} against the baseline")
+    sys.exit(1 if regressions or successes < args.runs else 0)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+# Structured fields attached to records (from extra= or the thread's log context)
+FIELDS = ("username", "tweet_id", "stage", "elapsed_ms")
+
+ROOT_LOGGER = "timefun"
+
+local = threading.local()
+listener = None
+setup_lock = threading.Lock()
+
+def get_logger(name):
+    """Logger under the bot's root logger, e.g. get_logger("buyer")"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields (e.g. username, tweet_id) to every record logged on this thread in the block"""
+    previous = getattr(local, "fields", {})
+    local.fields = {**previous, **{key: value for key, value in fields.items() if value is not None}}
+    try:
+        yield
+    finally:
+        local.fields = previous
+
+class ContextFilter(logging.Filter):
+    """Copies the calling thread's log context onto records (runs before the record is queued)"""
+    
+    def filter(self, record):
+        for key, value in getattr(local, "fields", {}).items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+class StructuredFormatter(logging.Formatter):
+    """Text lines with trailing key=value fields, or one JSON object per line"""
+    
+    def __init__(self, fmt="text"):
+        super().__init__()
+        self.json = fmt == "json"
+    
+    def format(self, record):
+        fields = {key: getattr(record, key) for key in FIELDS if getattr(record, key, None) is not None}
+        if isinstance(fields.get("elapsed_ms"), float):
+            fields["elapsed_ms"] = round(fields["elapsed_ms"], 1)
+        message = record.getMessage()
+        if self.json:
+            return json.dumps({"ts": round(record.created, 3), "level": record.levelname, "logger": record.name,
+                               "msg": message, **fields}, ensure_ascii=False, default=str)
+        line = f"{self.formatTime(record, '%H:%M:%S')}.{int(record.msecs):03d} {record.levelname:<7} {message}"
+        if fields:
+            line += " [" + " ".join(f"{key}={value}" for key, value in fields.items()) + "]"
+        return line
+
+def setup_logging(level=None, fmt=None, path=None):
+    """Route the bot's logs through a queue to a background writer thread (once per process)
+    
+    Args:
+        level: Log level name (default: LOG_LEVEL env, INFO)
+        fmt: "text" or "json" (default: LOG_FORMAT env, text)
+        path: Also append to this file (default: LOG_FILE env, none)
+    
+    Returns:
+        logging.Logger: The bot's root logger
+    """
+    global listener
+    logger = logging.getLogger(ROOT_LOGGER)
+    with setup_lock:
+        if listener is not None:
+            if level:
+                logger.setLevel(level.upper())
+            return logger
+        
+        level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper().strip()
+        fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower().strip()
+        path = path if path is not None else os.getenv('LOG_FILE', '').strip()
+        
+        formatter = StructuredFormatter(fmt)
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if path:
+            handlers.append(logging.FileHandler(path, encoding="utf-8"))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        records = queue.SimpleQueue()
+        queue_handler = QueueHandler(records)
+        queue_handler.addFilter(ContextFilter())
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+        try:
+            logger.setLevel(level)
+        except ValueError:
+            print(f"Unknown LOG_LEVEL {level}, using INFO")
+            logger.setLevel(logging.INFO)
+        
+        listener = QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(shutdown_logging)
+    return logger
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global listener
+    with setup_lock:
+        if listener is not None:
+            listener.stop()
+            listener = None
+            logger = logging.getLogger(ROOT_LOGGER)
+            for handler in list(logger.handlers):
+                if isinstance(handler, QueueHandler):
+                    logger.removeHandler(handler)
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import threading
+from collections import deque
+import requests
+from bot_logging import get_logger
+
+logger = get_logger("cdp")
+
+class CDPError(Exception):
+    """A DevTools command returned an error or the page threw"""
+
+class CDPTimeout(CDPError):
+    """An awaited DevTools event didn't arrive in time"""
+
+class CDPLane:
+    """Direct DevTools websocket to one Chrome tab for hot-path actions
+    
+    Selenium commands go Python -> chromedriver HTTP -> CDP; this lane talks
+    to the tab's DevTools websocket directly, saving the chromedriver hop on
+    navigate, evaluate, click and text entry. Elements are still found by
+    Selenium's resolver, which leaves its match where the lane can click it.
+    Everything else stays on Selenium. Needs the websocket-client package
+    (imported on connect).
+    """
+    
+    def __init__(self, ws_url, target_id=None, timeout=5):
+        """
+        Args:
+            ws_url: webSocketDebuggerUrl of the tab
+            target_id: DevTools target ID of the tab (equals the Selenium window handle)
+            timeout: Seconds to wait for a command response
+        """
+        self.ws_url = ws_url
+        self.target_id = target_id
+        self.timeout = timeout
+        self.ws = None
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.events = deque(maxlen=200)
+        self.page_events = False
+        self.selected = False
+    
+    @classmethod
+    def for_driver(cls, driver, timeout=5):
+        """Attach to the tab the driver is currently on
+        
+        The DevTools address comes from the session capabilities, so this
+        works whether Selenium attached to a running Chrome or started one.
+        
+        Returns:
+            CDPLane: Connected lane, or None if the tab isn't listed
+        """
+        address = driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+        if not address:
+            logger.warning("Chrome session has no DevTools address")
+            return None
+        handle = driver.current_window_handle
+        response = requests.get(f"http://{address}/json/list", timeout=2)
+        for target in response.json():
+            if target.get("type") == "page" and target.get("id") == handle and target.get("webSocketDebuggerUrl"):
+                lane = cls(target["webSocketDebuggerUrl"], target_id=handle, timeout=timeout)
+                lane.connect()
+                lane.follow(driver, selected=True)
+                return lane
+        logger.warning("No DevTools target found for tab %s", handle)
+        return None
+    
+    def connect(self):
+        import websocket
+        # Chrome rejects websocket origins it wasn't told to allow, so send none
+        self.ws = websocket.create_connection(self.ws_url, timeout=self.timeout, suppress_origin=True, enable_multithread=True)
+        logger.info("CDP fast lane connected to %s", self.ws_url)
+    
+    def follow(self, driver, selected=False):
+        """Keep self.selected up to date by watching the driver's tab switches
+        
+        Asking chromedriver for current_window_handle is a round trip of its
+        own, too slow for every hot-path action, while every tab switch goes
+        through driver.switch_to anyway.
+        
+        Args:
+            driver: WebDriver whose tab switches to watch
+            selected: Whether the driver is on this lane's tab right now
+        """
+        self.selected = selected
+        # switch_to is a read-only property over this attribute
+        driver._switch_to = WindowSwitchTracker(driver._switch_to, self)
+    
+    def send(self, method, params=None, timeout=None):
+        """Send a command and wait for its result, buffering events that arrive in between"""
+        if self.ws is None:
+            raise CDPError("CDP lane is not connected")
+        with self.lock:
+            self.next_id += 1
+            command_id = self.next_id
+            self.ws.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+            deadline = time.monotonic() + (timeout or self.timeout)
+            while True:
+                self.ws.settimeout(max(0.01, deadline - time.monotonic()))
+                message = json.loads(self.ws.recv())
+                if "method" in message:
+                    self.events.append(message)
+                    continue
+                if message.get("id") != command_id:
+                    continue
+                if "error" in message:
+                    raise CDPError(f"{method}: {message['error'].get('message')}")
+                return message.get("result", {})
+    
+    def wait_event(self, method, predicate=None, timeout=None):
+        """Wait for an event (possibly buffered while a command was running)
+        
+        Returns:
+            dict: The event's params
+        """
+        predicate = predicate or (lambda params: True)
+        deadline = time.monotonic() + (timeout or self.timeout)
+        with self.lock:
+            for event in list(self.events):
+                if event["method"] == method and predicate(event.get("params", {})):
+                    self.events.remove(event)
+                    return event.get("params", {})
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CDPTimeout(f"Timed out waiting for {method}")
+                self.ws.settimeout(max(0.01, remaining))
+                try:
+                    message = json.loads(self.ws.recv())
+                except Exception as e:
+                    if time.monotonic() >= deadline:
+                        raise CDPTimeout(f"Timed out waiting for {method}") from e
+                    raise
+                if message.get("method") == method and predicate(message.get("params", {})):
+                    return message.get("params", {})
+                if "method" in message:
+                    self.events.append(message)
+    
+    def navigate(self, url, timeout=None):
+        """Navigate the tab and wait until the new document is committed
+        
+        Page.navigate returns once navigation has started, while the old
+        document (complete, with buttons) is still current. Waiting for the
+        frame's Page.frameNavigated with the new loader means readiness
+        checks that follow run against the new page. Load itself isn't
+        awaited.
+        
+        Returns:
+            str: The navigated frame's ID
+        
+        Raises:
+            CDPTimeout: The navigation started but didn't commit within the timeout
+        """
+        if not self.page_events:
+            self.send("Page.enable")
+            self.page_events = True
+        self.events.clear()
+        result = self.send("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            raise CDPError(f"Page.navigate: {result['errorText']}")
+        frame_id, loader_id = result.get("frameId"), result.get("loaderId")
+        if loader_id:
+            # Same-document navigations have no loader and commit right away
+            self.wait_event("Page.frameNavigated", lambda params: params.get("frame", {}).get("id") == frame_id and
+                            params.get("frame", {}).get("loaderId") == loader_id, timeout=timeout)
+        return frame_id
+    
+    def evaluate(self, expression, await_promise=False):
+        """Evaluate JavaScript in the page and return its value"""
+        result = self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        })
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            text = details.get("exception", {}).get("description") or details.get("text")
+            raise CDPError(f"Runtime.evaluate: {text}")
+        return result.get("result", {}).get("value")
+    
+    def click_at(self, x, y):
+        """Dispatch a trusted left click at viewport coordinates"""
+        for event in ("mousePressed", "mouseReleased"):
+            self.send("Input.dispatchMouseEvent", {"type": event, "x": x, "y": y, "button": "left", "clickCount": 1})
+    
+    def click_element(self, expression):
+        """Scroll the element a page expression evaluates to into view and click its center
+        
+        Returns:
+            bool: False if the expression gives no element that is still in the page
+        """
+        center = self.evaluate(
+            "(function(el) { if (!el || !el.isConnected) { return null; } el.scrollIntoView({block: 'center'});"
+            " var r = el.getBoundingClientRect(); return [r.left + r.width / 2, r.top + r.height / 2]; })"
+            f"({expression})"
+        )
+        if center is None:
+            return False
+        self.click_at(*center)
+        return True
+    
+    def click(self, selector):
+        """Click a CSS-selected element (see click_element)"""
+        return self.click_element(f"document.querySelector({json.dumps(selector)})")
+    
+    def insert_text(self, text):
+        """Insert text into the focused element as a single input event"""
+        self.send("Input.insertText", {"text": text})
+    
+    def close(self):
+        if self.ws is not None:
+            try:
+                self.ws.close()
+            except Exception:
+                pass
+            self.ws = None
+        self.selected = False
+
+class WindowSwitchTracker:
+    """Stands in for driver.switch_to, telling a CDP lane whether its tab is selected"""
+    
+    def __init__(self, switch_to, lane):
+        self.switch_to = switch_to
+        self.lane = lane
+    
+    def window(self, window_name):
+        # If the switch fails, the tab Selenium is on isn't known for sure
+        self.lane.selected = False
+        self.switch_to.window(window_name)
+        self.lane.selected = window_name == self.lane.target_id
+    
+    def new_window(self, type_hint=None):
+        self.lane.selected = False
+        self.switch_to.new_window(type_hint)
+    
+    def __getattr__(self, name):
+        return getattr(self.switch_to, name)
+
+def benchmark_command_overhead(lane, driver, rounds=50):
+    """Compare the round trip of a trivial script over the lane and over chromedriver
+    
+    Returns:
+        dict: path -> (median_ms, p95_ms)
+    """
+    def measure(call):
+        samples = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    
+    results = {
+        "chromedriver": measure(lambda: driver.execute_script("return 1")),
+        "cdp": measure(lambda: lane.evaluate("1")),
+    }
+    for path, (median, p95) in results.items():
+        print(f"{path}: median {median:.2f}ms, p95 {p95:.2f}ms per command ({rounds} rounds)")
+    return results
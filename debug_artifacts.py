@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import gzip
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+from collections import deque
+from bot_logging import get_logger
+
+logger = get_logger("artifacts")
+
+# Cheap page summary in one round trip: URL, title, buttons, inputs and modal state
+DOM_SUMMARY_SCRIPT = """
+function describe(el) {
+    return {
+        text: (el.innerText || el.value || '').trim().slice(0, 80),
+        cls: (el.getAttribute('class') || '').slice(0, 120),
+        type: el.getAttribute('type'),
+        disabled: !!el.disabled
+    };
+}
+var buttons = Array.prototype.slice.call(document.querySelectorAll('button'), 0, 30);
+var inputs = Array.prototype.slice.call(document.querySelectorAll('input'), 0, 10);
+return {
+    url: location.href,
+    title: document.title,
+    ready: document.readyState,
+    modal: !!document.querySelector("[class*='modal'], [role='dialog']"),
+    buttons: buttons.map(describe),
+    inputs: inputs.map(describe)
+};
+"""
+
+MODES = ("failure", "always", "off")
+
+class DebugArtifacts:
+    """Debug screenshots and page sources, written off the purchase hot path
+    
+    In "failure" mode (the default) checkpoints only keep a small DOM summary
+    in an in-memory ring; a screenshot, the gzipped page source and the recent
+    summaries are captured when something fails. "always" also screenshots
+    every checkpoint, "off" captures nothing. Files are written by a
+    background thread, and the directory is pruned by age, total size and
+    file count after every write.
+    """
+    
+    def __init__(self, directory="debug_artifacts", mode="failure", max_bytes=50 * 1024 * 1024,
+                 max_age=24 * 3600, max_files=200, ring_size=50):
+        """
+        Args:
+            directory: Where artifacts are written
+            mode: "failure", "always" or "off"
+            max_bytes: Maximum total size of the directory
+            max_age: Delete artifacts older than this many seconds
+            max_files: Maximum number of files kept
+            ring_size: Number of recent DOM summaries kept in memory
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown debug artifact mode: {mode} (choose from {', '.join(MODES)})")
+        self.directory = directory
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_files = max_files
+        self.ring = deque(maxlen=ring_size)
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = None
+        self.written = 0
+        self.pruned = 0
+    
+    def start(self):
+        """Start the writer thread (on first use)"""
+        with self.lock:
+            if self.thread is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self.thread = threading.Thread(target=self.writer, name="debug-artifact-writer", daemon=True)
+                self.thread.start()
+    
+    def summarize(self, driver):
+        try:
+            return driver.execute_script(DOM_SUMMARY_SCRIPT) or {}
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def checkpoint(self, driver, label, key=None):
+        """Note a step of a buy; only "always" mode takes a screenshot here
+        
+        Args:
+            driver: WebDriver on the page
+            label: Step name, e.g. "before" or "after_buy_click"
+            key: What the step belongs to (e.g. the username), to group summaries
+        """
+        if self.mode == "off":
+            return
+        summary = self.summarize(driver)
+        with self.lock:
+            self.ring.append({"at": time.time(), "key": key, "label": label, **summary})
+        if self.mode == "always":
+            self.save_screenshot(driver, f"{key}_{label}" if key else label)
+    
+    def save_screenshot(self, driver, name):
+        try:
+            png = driver.get_screenshot_as_png()
+        except Exception as e:
+            logger.warning("Error capturing screenshot %s: %s", name, e)
+            return
+        self.submit(name, ".png", png)
+    
+    def failure(self, driver, label, key=None):
+        """Capture a screenshot, the page source and the recent DOM summaries
+        
+        Capturing happens on the caller's thread (the WebDriver isn't thread
+        safe); encoding and disk writes happen on the writer thread.
+        
+        Returns:
+            dict: DOM summary of the page at the time of failure
+        """
+        if self.mode == "off":
+            return {}
+        summary = self.summarize(driver)
+        name = f"{key}_{label}" if key else label
+        self.save_screenshot(driver, name)
+        try:
+            self.submit(name, ".html.gz", driver.page_source)
+        except Exception as e:
+            logger.warning("Error capturing page source %s: %s", name, e)
+        with self.lock:
+            recent = [entry for entry in self.ring if key is None or entry["key"] == key]
+        self.submit(name, ".json.gz", json.dumps({"failure": label, "key": key, "page": summary, "recent": recent},
+                                                 ensure_ascii=False, indent=1))
+        logger.info("Debug artifacts for %s queued to %s/", name, self.directory)
+        return summary
+    
+    def submit(self, name, suffix, data):
+        self.start()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+        safe_name = re.sub(r"[^\w.-]+", "_", name)
+        self.queue.put((os.path.join(self.directory, f"{stamp}_{safe_name}{suffix}"), data))
+    
+    def writer(self):
+        """Write queued artifacts until the stop sentinel arrives"""
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    break
+                path, data = item
+                if isinstance(data, str):
+                    data = data.encode("utf-8")
+                if path.endswith(".gz"):
+                    data = gzip.compress(data, compresslevel=6)
+                with open(path, "wb") as f:
+                    f.write(data)
+                self.written += 1
+                self.prune()
+            except OSError as e:
+                logger.warning("Error writing debug artifact: %s", e)
+            finally:
+                self.queue.task_done()
+    
+    def prune(self):
+        """Delete artifacts past the age limit, then the oldest until within size and count limits"""
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        count = len(files)
+        for mtime, size, path in files:
+            if now - mtime <= self.max_age and total <= self.max_bytes and count <= self.max_files:
+                break
+            try:
+                os.remove(path)
+                self.pruned += 1
+            except OSError:
+                pass
+            total -= size
+            count -= 1
+    
+    def flush(self):
+        """Block until every queued artifact is written"""
+        if self.thread is not None:
+            self.queue.join()
+    
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+            if self.written:
+                logger.info("Wrote %d debug artifacts to %s/ (%d pruned by retention)", self.written, self.directory, self.pruned)
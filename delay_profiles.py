@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import time
+import random
+from collections import namedtuple
+
+# How text is entered: a keystroke at a time, a few characters per send_keys,
+# or the value set in one script call that fires input/change events
+TYPING_MODES = ("per_key", "chunked", "js")
+
+class DelayProfile(namedtuple("DelayProfile", ["name", "typing", "key_delay", "chunk_size", "jitter", "wait_scale"])):
+    """Pacing for one kind of browser work
+    
+    Fields:
+        name: Profile name
+        typing: One of TYPING_MODES
+        key_delay: (min, max) seconds between keystrokes (or chunks)
+        chunk_size: Characters per send_keys in "chunked" mode
+        jitter: (min, max) seconds paused between steps
+        wait_scale: Multiplier for readiness budgets (how long a step may wait)
+    """
+    
+    def pause_seconds(self, scale=1):
+        low, high = self.jitter
+        return random.uniform(low, high) * scale if high > 0 else 0
+    
+    def pause(self, scale=1):
+        """Sleep for a random inter-step pause (no-op when the profile has no jitter)"""
+        seconds = self.pause_seconds(scale)
+        if seconds > 0:
+            time.sleep(seconds)
+    
+    def key_pause(self):
+        low, high = self.key_delay
+        if high > 0:
+            time.sleep(random.uniform(low, high))
+
+PROFILES = {
+    # Purchase race: script-set values, no jitter, fail fast and let the retry loop take over
+    "snipe": DelayProfile("snipe", "js", (0, 0), 0, (0, 0), 0.5),
+    # Short chunks and a little jitter, full readiness budgets
+    "balanced": DelayProfile("balanced", "chunked", (0.02, 0.06), 4, (0, 0.05), 1.0),
+    # Human pacing: one key at a time, pauses between steps, patient waits
+    "stealth": DelayProfile("stealth", "per_key", (0.05, 0.2), 1, (0.5, 1.5), 1.5),
+}
+
+def get_profile(name, default="balanced"):
+    """Look up a profile by name, falling back to the default for unknown names"""
+    key = (name or default).lower().strip()
+    if key not in PROFILES:
+        print(f"Unknown delay profile '{name}', using '{default}' (choose from {', '.join(PROFILES)})")
+        key = default
+    return PROFILES[key]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+
+# Common debugging ports
+DEVTOOLS_PORTS = [9222, 9223, 9224, 9225, 9226, 9227, 9228, 9229, 9230]
+
+def probe_devtools(port, timeout=0.5):
+    """Ask a local port for Chrome's /json/version
+    
+    Returns:
+        dict: The version info, or None if no Chrome DevTools answers there
+    """
+    try:
+        response = requests.get(f"http://127.0.0.1:{port}/json/version", timeout=timeout)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200 or "Chrome" not in response.text:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+class DevToolsState:
+    """Last-good DevTools port, kept across runs"""
+    
+    def __init__(self, path="devtools_state.json"):
+        self.path = path
+        self.port = None
+        self.load()
+    
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.port = data.get("port")
+        except (OSError, ValueError) as e:
+            print(f"Error loading DevTools state {self.path}: {e}")
+    
+    def save(self, port):
+        """Atomically remember a working port"""
+        if port == self.port:
+            return
+        self.port = port
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"port": port, "saved_at": time.time()}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving DevTools state {self.path}: {e}")
+
+def discover_devtools_port(state=None, ports=DEVTOOLS_PORTS, timeout=0.5):
+    """Find a Chrome with remote debugging, trying the last-good port first
+    
+    The remaining candidates are probed concurrently, so a miss costs one
+    probe timeout instead of one per port.
+    
+    Returns:
+        int: The port, or None if no Chrome DevTools answered
+    """
+    if state and state.port:
+        if probe_devtools(state.port, timeout):
+            return state.port
+    
+    candidates = [port for port in ports if not state or port != state.port]
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        futures = {executor.submit(probe_devtools, port, timeout): port for port in candidates}
+        found = {}
+        for future in as_completed(futures):
+            info = future.result()
+            if info:
+                found[futures[future]] = info
+    if not found:
+        return None
+    
+    # Prefer the lowest port, like the old sequential scan
+    port = min(found)
+    if state:
+        state.save(port)
+    return port
+
+def wait_for_devtools(port, timeout=20, initial_delay=0.05, max_delay=0.5):
+    """Poll /json/version with a short backoff until Chrome answers
+    
+    Returns:
+        dict: The version info, or None if Chrome didn't come up in time
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while time.monotonic() < deadline:
+        info = probe_devtools(port, timeout=min(0.5, max(0.05, deadline - time.monotonic())))
+        if info:
+            return info
+        time.sleep(min(delay, max(0, deadline - time.monotonic())))
+        delay = min(delay * 2, max_delay)
+    return None
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from selenium.webdriver.common.by import By
+from bot_logging import get_logger
+
+logger = get_logger("resolver")
+
+# Candidate type for matching buttons by their visible text
+BY_TEXT = "button text"
+
+# Share of the timeout in which only specific candidates may match
+FALLBACK_GRACE_SHARE = 0.6
+
+# Page expression for the element the last resolve matched (null if none),
+# so the CDP lane can click it without another chromedriver round trip
+LAST_MATCH = "window.__lastResolved"
+
+# Polls the page for the first candidate that matches, in priority order.
+# Candidates from index specificCount on are generic fallbacks, only tried
+# once graceMs has passed without a specific match.
+# Resolves with [element, index], or [null, -1] when the timeout runs out.
+RESOLVE_SCRIPT = """
+window.__lastResolved = null;
+var candidates = arguments[0], timeoutMs = arguments[1], clickable = arguments[2], pollMs = arguments[3];
+var specificCount = arguments[4], graceMs = arguments[5];
+var done = arguments[arguments.length - 1];
+var started = performance.now();
+var deadline = started + timeoutMs;
+
+function usable(el) {
+    if (!clickable) { return true; }
+    if (el.disabled) { return false; }
+    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+}
+
+function matches(candidate) {
+    var type = candidate[0], value = candidate[1], els = [];
+    try {
+        if (type === 'xpath') {
+            var snap = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var i = 0; i < snap.snapshotLength; i++) { els.push(snap.snapshotItem(i)); }
+        } else if (type === 'css selector') {
+            els = Array.prototype.slice.call(document.querySelectorAll(value));
+        } else if (type === 'button text') {
+            els = Array.prototype.filter.call(document.querySelectorAll('button'), function(el) {
+                var text = el.innerText || el.textContent || '';
+                return value.every(function(fragment) { return text.indexOf(fragment) !== -1; });
+            });
+        }
+    } catch (e) {
+        return null;
+    }
+    for (var j = 0; j < els.length; j++) {
+        if (usable(els[j])) { return els[j]; }
+    }
+    return null;
+}
+
+function poll() {
+    var limit = performance.now() - started >= graceMs ? candidates.length : specificCount;
+    for (var i = 0; i < limit; i++) {
+        var el = matches(candidates[i]);
+        if (el) { window.__lastResolved = el; done([el, i]); return; }
+    }
+    if (performance.now() >= deadline) { done([null, -1]); return; }
+    setTimeout(poll, pollMs);
+}
+poll();
+"""
+
+class ElementResolver:
+    """Resolve a priority-ordered list of selectors in a single WebDriver round trip"""
+    
+    def __init__(self, driver, poll_ms=50):
+        self.driver = driver
+        self.poll_ms = poll_ms
+    
+    def normalize(self, candidate):
+        """Convert a candidate to the [type, value] form the page script expects
+        
+        Accepts a bare XPath string, a (By.XPATH / By.CSS_SELECTOR, value) tuple,
+        or a (BY_TEXT, [fragments]) tuple matching buttons whose text contains
+        every fragment.
+        """
+        if isinstance(candidate, str):
+            return [By.XPATH, candidate]
+        by, value = candidate
+        if by == BY_TEXT:
+            return [BY_TEXT, [value] if isinstance(value, str) else list(value)]
+        if by not in (By.XPATH, By.CSS_SELECTOR):
+            raise ValueError(f"Unsupported selector type: {by}")
+        return [by, value]
+    
+    def resolve(self, candidates, timeout=10, clickable=False, fallbacks=(), grace=None):
+        """Find the first matching candidate, polling in the page until the timeout
+        
+        Generic fallbacks (e.g. "any button in the market panel") would match
+        a page that is still rendering before the element that is actually
+        wanted exists, so they are only admitted after a grace period in
+        which none of the specific candidates matched.
+        
+        Args:
+            candidates: Priority-ordered selectors (see normalize)
+            timeout: Seconds to keep polling in the page
+            clickable: Only accept visible, enabled elements
+            fallbacks: Generic selectors tried after the grace period, in order
+            grace: Seconds before fallbacks are tried (default: 60% of the timeout)
+        
+        Returns:
+            tuple: (element, index) of the winning candidate, or (None, -1).
+                Indexes past the candidates refer to the fallbacks.
+        """
+        fallbacks = list(fallbacks)
+        if grace is None:
+            grace = timeout * FALLBACK_GRACE_SHARE
+        script_candidates = [self.normalize(c) for c in list(candidates) + fallbacks]
+        try:
+            self.driver.set_script_timeout(timeout + 2)
+            element, index = self.driver.execute_async_script(
+                RESOLVE_SCRIPT, script_candidates, int(timeout * 1000), clickable, self.poll_ms,
+                len(candidates), int(grace * 1000)
+            )
+        except Exception as e:
+            logger.warning("Error resolving elements: %s", e)
+            return None, -1
+        return element, index
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+from collections import namedtuple
+
+# Twitter handles: 1-15 word characters
+HANDLE_PATTERN = re.compile(r"^\w{1,15}$")
+
+# "@handle" not preceded by a word character, "@" or "." (skips e-mail addresses)
+MENTION_PATTERN = re.compile(r"(?<![\w@.])@(\w{1,15})(?!\w)")
+
+# Leading "@a @b" reply targets at the start of the text
+REPLY_PREFIX_PATTERN = re.compile(r"^(?:\s*@\w{1,15})+")
+
+# Classic retweet text ("RT @handle: ...") and timeline social context ("X has retweeted Y")
+RETWEET_TEXT_PATTERN = re.compile(r"^RT @(\w{1,15}):")
+RETWEETED_BY_PATTERN = re.compile(r"(?:has retweeted|has reposted|转推了|转发了)\s+@?(\w{1,15})", re.IGNORECASE)
+
+# time.fun profile links, with or without scheme and "@"
+TIMEFUN_LINK_PATTERN = re.compile(r"(?:https?://)?(?:www\.)?time\.fun/@?(\w{1,15})(?![\w.])", re.IGNORECASE)
+
+# Words around a mention that suggest it is the account being promoted
+CUE_PATTERN = re.compile(r"\b(?:welcome|joined|joins|live|launched|profile|now on|check out|buy|time with)\b", re.IGNORECASE)
+CUE_WINDOW = 40
+
+# time.fun paths that look like handles but aren't
+RESERVED_PATHS = {"explore", "login", "signup", "settings", "terms", "privacy", "about", "home"}
+
+DEFAULT_BLOCKLIST = ("timedotfun",)
+
+# Points a handle earns per source it was found in
+SOURCE_SCORES = {
+    "retweeted_author": 5.0,
+    "retweet_text": 4.0,
+    "link": 4.0,
+    "mention": 2.0,
+    "reply": 0.5,
+}
+FIRST_MENTION_BONUS = 1.0
+CUE_BONUS = 1.0
+
+Candidate = namedtuple("Candidate", ["handle", "score", "sources"])
+
+class HandleExtractor:
+    """Find the time.fun creator a tweet is promoting, ranked by relevance
+    
+    Handles are collected from the retweeted author, time.fun profile links,
+    classic "RT @handle:" text and mention entities (falling back to the
+    text when no entities are available). Each source adds points, with
+    a bonus for the first body mention and for mentions next to cue words
+    like "welcome" or "joined"; reply targets barely count. Blocklisted
+    handles and the author of an original tweet are dropped, and only
+    candidates reaching min_score are returned, best first.
+    """
+    
+    def __init__(self, blocklist=None, min_score=2.0, max_candidates=3):
+        """
+        Args:
+            blocklist: Handles never returned (default: HANDLE_BLOCKLIST env plus timedotfun)
+            min_score: Minimum score for a candidate to be returned (default: 2.0)
+            max_candidates: Maximum number of candidates returned (default: 3)
+        """
+        if blocklist is None:
+            blocklist = [handle for handle in os.getenv('HANDLE_BLOCKLIST', '').split(",") if handle.strip()]
+            blocklist.extend(DEFAULT_BLOCKLIST)
+        self.blocklist = {handle.strip().lstrip("@").lower() for handle in blocklist}
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+    
+    def candidates(self, text, mentions=None, urls=None, retweeted=None, author=None):
+        """Score every handle found in a tweet
+        
+        Args:
+            text: Tweet text
+            mentions: Mentioned handles from the tweet's entities (default: parsed from the text)
+            urls: Expanded link URLs from the tweet's entities
+            retweeted: Author of the retweeted tweet, for retweets
+            author: Author of the tweet itself, excluded unless it was retweeted
+        
+        Returns:
+            list: Candidate(handle, score, sources) reaching min_score, best first
+        """
+        text = text or ""
+        scores = {}
+        
+        def add(handle, source, points):
+            if not handle or not HANDLE_PATTERN.match(handle):
+                return
+            key = handle.lower()
+            if key not in scores:
+                scores[key] = [handle, 0.0, []]
+            scores[key][1] += points
+            if source not in scores[key][2]:
+                scores[key][2].append(source)
+        
+        if retweeted:
+            add(retweeted.lstrip("@"), "retweeted_author", SOURCE_SCORES["retweeted_author"])
+        match = RETWEET_TEXT_PATTERN.match(text) or RETWEETED_BY_PATTERN.search(text)
+        if match:
+            add(match.group(1), "retweet_text", SOURCE_SCORES["retweet_text"])
+        
+        for link in list(urls or []) + [text]:
+            for handle in TIMEFUN_LINK_PATTERN.findall(link or ""):
+                if handle.lower() not in RESERVED_PATHS:
+                    add(handle, "link", SOURCE_SCORES["link"])
+        
+        # Leading mentions are reply targets, not the subject of the tweet
+        reply_prefix = REPLY_PREFIX_PATTERN.match(text)
+        body_start = reply_prefix.end() if reply_prefix else 0
+        replies = {handle.lower() for handle in MENTION_PATTERN.findall(text[:body_start])}
+        entity_handles = {handle.lstrip("@").lower() for handle in mentions} if mentions is not None else None
+        
+        first = True
+        for match in MENTION_PATTERN.finditer(text):
+            handle = match.group(1)
+            if entity_handles is not None and handle.lower() not in entity_handles:
+                continue
+            if match.start() < body_start:
+                add(handle, "reply", SOURCE_SCORES["reply"])
+                continue
+            points = SOURCE_SCORES["mention"]
+            if first and handle.lower() not in self.blocklist:
+                points += FIRST_MENTION_BONUS
+                first = False
+            window = text[max(0, match.start() - CUE_WINDOW):match.end() + CUE_WINDOW]
+            if CUE_PATTERN.search(window):
+                points += CUE_BONUS
+            add(handle, "mention", points)
+        
+        # Entity mentions the text doesn't show (e.g. truncated text)
+        for handle in entity_handles or ():
+            if handle not in scores and handle not in replies:
+                add(handle, "mention", SOURCE_SCORES["mention"])
+        
+        excluded = set(self.blocklist)
+        if author and not retweeted:
+            excluded.add(author.lstrip("@").lower())
+        ranked = [Candidate(handle, round(score, 2), tuple(sources)) for key, (handle, score, sources) in scores.items()
+                  if key not in excluded and score >= self.min_score]
+        ranked.sort(key=lambda candidate: -candidate.score)
+        return ranked[:self.max_candidates]
+    
+    def extract(self, text, **entities):
+        """Likely promoted handles in ranked order (see candidates for the arguments)"""
+        return [candidate.handle for candidate in self.candidates(text, **entities)]
+    
+    def from_record(self, record):
+        """Candidates for a timeline record from TimelineExtractor"""
+        retweeted = record.get("author") if record.get("is_retweet") else None
+        return self.candidates(record.get("text", ""), mentions=record.get("mentions"), urls=record.get("urls"),
+                               retweeted=retweeted, author=record.get("author"))
+    
+    def from_status(self, status):
+        """Candidates for a tweepy Status (API v1.1, extended tweet mode)"""
+        retweeted_status = getattr(status, "retweeted_status", None)
+        retweeted = retweeted_status.user.screen_name if retweeted_status is not None else None
+        entities = getattr(status, "entities", None)
+        if retweeted_status is not None:
+            # Entities of the retweeted tweet aren't cut off like the "RT @x:" text is
+            entities = getattr(retweeted_status, "entities", None) or entities
+        mentions = urls = None
+        if entities:
+            mentions = [mention["screen_name"] for mention in entities.get("user_mentions", [])]
+            urls = [url.get("expanded_url") or url.get("url") for url in entities.get("urls", [])]
+        text = getattr(status, "full_text", None) or getattr(status, "text", "")
+        user = getattr(status, "user", None)
+        return self.candidates(text, mentions=mentions, urls=urls, retweeted=retweeted,
+                               author=user.screen_name if user is not None else None)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import threading
+
+class JournalRecorder:
+    """Record timeline snapshots or API payloads with their arrival times
+    
+    Only records not seen before are stored, plus (for timelines) the order
+    of visible tweet IDs, so a long session stays compact.
+    """
+    
+    def __init__(self, path, kind, account):
+        """
+        Args:
+            path: JSONL journal file to write
+            kind: "browser" (timeline records) or "api" (tweepy statuses)
+            account: The monitored account
+        """
+        self.path = path
+        self.kind = kind
+        self.started_at = time.time()
+        self.seen = set()
+        self.last_order = None
+        self.lock = threading.Lock()
+        self.file = open(path, "w", encoding="utf-8")
+        self.write({"journal": 1, "kind": kind, "account": account, "started_at": self.started_at})
+        print(f"Recording {kind} journal for @{account} to {path}")
+    
+    def write(self, entry):
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+    
+    def record(self, records):
+        """Record a timeline snapshot (TimelineExtractor records)"""
+        with self.lock:
+            order = [record["id"] for record in records if record.get("id")]
+            new = [record for record in records if record.get("id") and record["id"] not in self.seen]
+            if not new and order == self.last_order:
+                return
+            self.seen.update(record["id"] for record in new)
+            self.last_order = order
+            self.write({"t": round(time.time() - self.started_at, 3), "new": new, "order": order})
+    
+    def record_api(self, tweets):
+        """Record statuses returned by one poll"""
+        with self.lock:
+            new = []
+            for tweet in tweets:
+                if tweet.id in self.seen:
+                    continue
+                self.seen.add(tweet.id)
+                retweeted = getattr(tweet, "retweeted_status", None)
+                new.append({
+                    "id": tweet.id,
+                    "author": tweet.user.screen_name,
+                    "text": getattr(tweet, "full_text", None) or getattr(tweet, "text", ""),
+                    "retweeted_user": retweeted.user.screen_name if retweeted else None,
+                })
+            if new:
+                self.write({"t": round(time.time() - self.started_at, 3), "new": new})
+    
+    def close(self):
+        with self.lock:
+            self.file.close()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager
+from bot_logging import get_logger
+
+logger = get_logger("latency")
+
+# Pipeline stages in the order they normally happen
+STAGES = [
+    "tweet_created",
+    "detected",
+    "username_extracted",
+    "existence_checked",
+    "market_page_ready",
+    "modal_ready",
+    "amount_entered",
+    "confirm_clicked",
+    "confirmation_observed",
+]
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+class Trace:
+    """Monotonic timestamps for one tweet (or one purchase) through the pipeline
+    
+    Each stage is marked once; the span of a stage runs from the previous
+    mark to its own. Nothing is written until finish().
+    """
+    
+    def __init__(self, tracer, trace_id, attrs=None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.attrs = dict(attrs or {})
+        self.marks = {}
+        self.finished = False
+    
+    def mark(self, stage, at=None):
+        """Record reaching a stage (first time only)"""
+        if stage not in self.marks:
+            self.marks[stage] = time.monotonic() if at is None else at
+    
+    def mark_wall(self, stage, epoch_seconds):
+        """Record a stage that happened at a wall-clock time (e.g. tweet creation)"""
+        self.mark(stage, time.monotonic() - (time.time() - epoch_seconds))
+    
+    def rewind(self, stage):
+        """Drop marks after a stage, e.g. before retrying a purchase"""
+        stages = list(self.marks)
+        if stage in stages:
+            for later in stages[stages.index(stage) + 1:]:
+                del self.marks[later]
+    
+    def fork(self, suffix, **attrs):
+        """Copy this trace for one branch (e.g. one username of a tweet)"""
+        child = Trace(self.tracer, f"{self.trace_id}:{suffix}", {**self.attrs, **attrs})
+        child.marks = dict(self.marks)
+        return child
+    
+    def spans(self):
+        """(stage, previous_stage, start, end) for each mark after the first"""
+        ordered = sorted(self.marks.items(), key=lambda item: item[1])
+        return [(stage, previous, start, end)
+                for (previous, start), (stage, end) in zip(ordered, ordered[1:])]
+    
+    def finish(self, outcome):
+        """Write the spans with the outcome (once)"""
+        if not self.finished:
+            self.finished = True
+            self.tracer.write(self, outcome)
+
+class LatencyTracer:
+    """Span-based latency tracing to a JSONL file, with percentile summaries
+    
+    The active trace is thread-local, so deep code (buy_user,
+    check_user_exists) can mark stages without threading a trace argument.
+    """
+    
+    def __init__(self, path="latency_trace.jsonl"):
+        """
+        Args:
+            path: JSONL file spans are appended to; empty or None keeps them in memory only
+        """
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.durations = {}
+    
+    def start(self, trace_id, **attrs):
+        return Trace(self, str(trace_id), attrs)
+    
+    def current(self):
+        """The trace active on this thread, or None"""
+        return getattr(self.local, "trace", None)
+    
+    @contextmanager
+    def activate(self, trace):
+        """Make a trace current on this thread for the duration of the block"""
+        previous = self.current()
+        self.local.trace = trace
+        try:
+            yield trace
+        finally:
+            self.local.trace = previous
+    
+    def mark(self, stage):
+        """Mark a stage on the current trace, if any"""
+        trace = self.current()
+        if trace is not None:
+            trace.mark(stage)
+    
+    def write(self, trace, outcome):
+        spans = trace.spans()
+        if not spans:
+            return
+        lines = []
+        with self.lock:
+            for stage, previous, start, end in spans:
+                duration_ms = (end - start) * 1000
+                self.durations.setdefault(stage, []).append(duration_ms)
+                lines.append({"trace": trace.trace_id, "stage": stage, "from": previous, "start": start, "end": end,
+                              "duration_ms": round(duration_ms, 3), "outcome": outcome, **trace.attrs})
+            total_ms = (spans[-1][3] - spans[0][2]) * 1000
+            self.durations.setdefault("total", []).append(total_ms)
+            lines.append({"trace": trace.trace_id, "stage": "total", "from": spans[0][1], "start": spans[0][2],
+                          "end": spans[-1][3], "duration_ms": round(total_ms, 3), "outcome": outcome, **trace.attrs})
+            
+            if not self.path:
+                return
+            try:
+                if self.file is None:
+                    self.file = open(self.path, "a", encoding="utf-8")
+                for line in lines:
+                    self.file.write(json.dumps(line) + "\n")
+                self.file.flush()
+            except OSError as e:
+                logger.warning("Error writing latency trace %s: %s", self.path, e)
+    
+    def summary(self):
+        """p50/p95/p99 per stage in milliseconds
+        
+        Returns:
+            dict: stage -> {"count", "p50", "p95", "p99"}
+        """
+        with self.lock:
+            durations = {stage: sorted(values) for stage, values in self.durations.items()}
+        order = [stage for stage in STAGES + ["total"] if stage in durations]
+        order += sorted(stage for stage in durations if stage not in order)
+        return {stage: {"count": len(durations[stage]),
+                        "p50": percentile(durations[stage], 50),
+                        "p95": percentile(durations[stage], 95),
+                        "p99": percentile(durations[stage], 99)}
+                for stage in order}
+    
+    def report(self):
+        summary = self.summary()
+        if not summary:
+            return
+        print("=== Latency per stage (ms) ===")
+        for stage, s in summary.items():
+            print(f"{stage}: n={s['count']}, p50 {s['p50']:.1f}, p95 {s['p95']:.1f}, p99 {s['p99']:.1f}")
+    
+    def close(self):
+        """Print the summary and close the trace file"""
+        self.report()
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
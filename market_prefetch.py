@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import time
+from bot_logging import get_logger
+
+logger = get_logger("prefetch")
+
+# Where a speculative market page load ended up: redirected away (no such
+# creator), a rendered market page, or still loading
+PREFETCH_STATE_SCRIPT = """
+var handle = arguments[0].toLowerCase();
+var path = location.pathname.toLowerCase().replace(/\\/+$/, '');
+if (location.href === 'about:blank') { return 'loading'; }
+if (path !== '/' + handle) { return 'missing'; }
+if (document.readyState !== 'complete') { return 'loading'; }
+var buy = Array.prototype.some.call(document.querySelectorAll('button'), function(el) {
+    return (el.innerText || el.textContent || '').indexOf('Buy') !== -1;
+});
+return buy ? 'ready' : 'loading';
+"""
+
+class MarketPrefetcher:
+    """Speculatively load market pages for extracted handles in background tabs
+    
+    start() opens a tab per handle and starts navigation without waiting,
+    so the pages load while earlier handles are being bought. resolve()
+    infers existence from that same load: a redirect away from the handle
+    (time.fun sends unknown handles to /explore) means it isn't a creator,
+    a rendered Buy button means it is. The buy then continues in the
+    prefetched tab, and tabs for handles that don't exist are discarded.
+    Handles with an armed buy modal (see armed_modal.py) are not prefetched.
+    """
+    
+    def __init__(self, buyer, max_tabs=3, poll_interval=0.05):
+        """
+        Args:
+            buyer: TimeFunBuyer whose driver hosts the tabs (used from one thread only)
+            max_tabs: Maximum number of handles prefetched at once (default: 3)
+            poll_interval: Seconds between state polls while resolving (default: 0.05)
+        """
+        self.buyer = buyer
+        self.max_tabs = max_tabs
+        self.poll_interval = poll_interval
+        self.tabs = {}
+        self.results = {}
+        self.claimed = set()
+        self.home = None
+    
+    def start(self, usernames):
+        """Open a tab per handle and start loading its market page (returns immediately)"""
+        driver = self.buyer.driver
+        if self.home is None:
+            self.home = driver.current_window_handle
+        armed = self.buyer.armed
+        try:
+            for username in usernames:
+                key = username.lower()
+                if key in self.tabs or key in self.results or len(self.tabs) >= self.max_tabs:
+                    continue
+                if armed and armed.is_armed(username):
+                    # Its modal is already staged; a buy only needs the final clicks
+                    continue
+                driver.switch_to.new_window("tab")
+                self.tabs[key] = driver.current_window_handle
+                driver.execute_script("window.location.href = arguments[0];", f"{self.buyer.base_url}/{username}?tab=market")
+                logger.debug("Prefetching market page", extra={"username": username})
+        except Exception as e:
+            logger.warning("Error starting prefetch: %s", e)
+        finally:
+            driver.switch_to.window(self.home)
+    
+    def has(self, username):
+        key = username.lower()
+        return key in self.tabs or key in self.results
+    
+    def resolve(self, username, timeout=10):
+        """Existence of a prefetched handle, inferred from its market page load
+        
+        When the handle exists the driver is left on its tab, ready for the
+        buy; otherwise the tab is discarded and the driver goes back home.
+        The answer is kept, including a timeout, so a second check (e.g. the
+        one in buy_with_retry) doesn't wait again.
+        
+        Returns:
+            bool or None: True/False, or None if the load didn't settle in time
+        """
+        key = username.lower()
+        if key in self.results:
+            return self.results[key]
+        window = self.tabs.get(key)
+        if window is None:
+            return None
+        
+        driver = self.buyer.driver
+        started = time.monotonic()
+        state = "loading"
+        try:
+            driver.switch_to.window(window)
+            while time.monotonic() - started < timeout:
+                state = driver.execute_script(PREFETCH_STATE_SCRIPT, username)
+                if state != "loading":
+                    break
+                time.sleep(self.poll_interval)
+        except Exception as e:
+            logger.warning("Error resolving prefetched page: %s", e, extra={"username": username})
+            state = "loading"
+        elapsed_ms = (time.monotonic() - started) * 1000
+        
+        if state == "ready":
+            self.results[key] = True
+            logger.info("User '%s' exists on time.fun (prefetched market page)", username,
+                        extra={"stage": "existence_checked", "elapsed_ms": elapsed_ms})
+            return True
+        if state == "missing":
+            self.results[key] = False
+            logger.info("User '%s' does not exist on time.fun (prefetch redirected)", username,
+                        extra={"stage": "existence_checked", "elapsed_ms": elapsed_ms})
+            self.release(username)
+            return False
+        # Give up on the tab; the buy loads the market page itself
+        logger.warning("Prefetched page for %s did not settle within %ss", username, timeout, extra={"elapsed_ms": elapsed_ms})
+        self.results[key] = None
+        self.release(username)
+        return None
+    
+    def claim(self, username):
+        """Switch to the prefetched tab of an existing handle (once per handle)
+        
+        Returns:
+            bool: True if the driver is now on a prefetched market page
+        """
+        key = username.lower()
+        if not self.results.get(key) or key in self.claimed or key not in self.tabs:
+            return False
+        self.claimed.add(key)
+        self.buyer.driver.switch_to.window(self.tabs[key])
+        return True
+    
+    def release(self, username):
+        """Close a handle's tab and go back to the home tab"""
+        key = username.lower()
+        window = self.tabs.pop(key, None)
+        self.claimed.discard(key)
+        if window is None:
+            return
+        driver = self.buyer.driver
+        try:
+            driver.switch_to.window(window)
+            driver.close()
+        except Exception as e:
+            logger.warning("Error closing prefetch tab: %s", e)
+        finally:
+            driver.switch_to.window(self.home)
+    
+    def clear(self):
+        """Discard every prefetched tab and result (e.g. after each tweet)"""
+        for key in list(self.tabs):
+            self.release(key)
+        self.results = {}
+        self.claimed = set()
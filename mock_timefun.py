@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Render delays in milliseconds (page_delay is server-side, the rest happen in the page)
+DEFAULT_DELAYS = {
+    "page_delay": 50,      # server response time for the profile route
+    "render_delay": 300,   # hydration until the Buy button exists
+    "modal_delay": 200,    # Buy click until the modal and amount input render
+    "switch_delay": 100,   # USD switch until the currency changes
+    "amount_delay": 150,   # amount input until the "Buy N mins for $X" button enables
+    "confirm_delay": 200,  # Buy click until the confirm dialog renders
+    "settle_delay": 800,   # Confirm click until the transaction settles
+}
+
+# Buy button markup per DOM variant, matched by different buy_user selectors
+BUY_BUTTONS = {
+    "default": '<button class="inline-flex items-center rounded-lg bg-controls-primary text-primary-100">Buy</button>',
+    "legacy": '<button class="btn buy">Buy</button>',
+    "text": '<button>Buy</button>',
+    "decoy": '<button class="inline-flex items-center rounded-lg bg-controls-primary text-primary-100">Buy</button>',
+}
+
+# Buttons rendered in the market panel right away, before the Buy button hydrates
+DECOY_BUTTONS = {
+    "decoy": '<button class="rounded-full follow">Follow</button>',
+}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>@{username} | time.fun (stand-in)</title></head>
+<body>
+<div id="app"><h1>@{username}</h1><div class="market" id="market"></div></div>
+<script>
+var config = {config};
+var buyMarkup = {buy_button};
+var decoyMarkup = {decoy_button};
+function later(ms, fn) {{ setTimeout(fn, ms); }}
+function el(html) {{ var d = document.createElement('div'); d.innerHTML = html; return d.firstChild; }}
+
+if (decoyMarkup) {{
+    document.getElementById('market').appendChild(el(decoyMarkup));
+}}
+
+later(config.render_delay, function() {{
+    var buy = el(buyMarkup);
+    document.getElementById('market').appendChild(buy);
+    buy.addEventListener('click', openModal);
+}});
+
+function openModal() {{
+    later(config.modal_delay, function() {{
+        var modal = el('<div class="modal" data-currency="SOL"><div class="switch"><button>SOL</button><button>USD</button></div>' +
+                       '<input type="number" class="amount" min="0"><button class="amount-buy" disabled>Enter an amount</button></div>');
+        document.body.appendChild(modal);
+        var currency = 'SOL';
+        modal.querySelectorAll('.switch button')[1].addEventListener('click', function() {{
+            later(config.switch_delay, function() {{ currency = 'USD'; modal.setAttribute('data-currency', currency); }});
+        }});
+        var input = modal.querySelector('input');
+        var amountBuy = modal.querySelector('.amount-buy');
+        input.addEventListener('input', function() {{
+            var amount = parseFloat(input.value);
+            later(config.amount_delay, function() {{
+                if (amount > 0) {{
+                    amountBuy.disabled = false;
+                    amountBuy.textContent = 'Buy ' + Math.max(1, Math.round(amount / 2)) + ' mins for $' + amount;
+                }}
+            }});
+        }});
+        amountBuy.addEventListener('click', function() {{ openConfirm(modal, amountBuy.textContent); }});
+    }});
+}}
+
+function openConfirm(modal, label) {{
+    later(config.confirm_delay, function() {{
+        var confirm = el('<button class="confirm">Confirm &amp; ' + label + '</button>');
+        modal.appendChild(confirm);
+        confirm.addEventListener('click', function() {{
+            later(config.settle_delay, function() {{
+                confirm.remove();
+                modal.appendChild(el('<div class="success">Purchase complete</div>'));
+            }});
+        }});
+    }});
+}}
+</script>
+</body>
+</html>
+"""
+
+class MockTimeFun:
+    """Local stand-in for time.fun's profile, market tab and buy flow
+    
+    Serves /{username}?tab=market with the Buy button, modal, USD switch,
+    amount input and confirm dialog that buy_user drives, each rendered
+    after a configurable delay. Every handle exists except those starting
+    with "ghost", which redirect to /explore like unknown handles on the
+    real site.
+    """
+    
+    def __init__(self, port=0, variant="default", delays=None):
+        if variant not in BUY_BUTTONS:
+            raise ValueError(f"Unknown DOM variant: {variant} (choose from {', '.join(BUY_BUTTONS)})")
+        self.variant = variant
+        self.delays = {**DEFAULT_DELAYS, **(delays or {})}
+        self.requests = []
+        mock = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                mock.requests.append(self.path)
+                path = urlparse(self.path).path.strip("/")
+                if not path or path in ("explore", "home"):
+                    self.respond(200, "<html><body><h1>Explore</h1></body></html>")
+                elif "/" in path or path.lower().startswith("ghost"):
+                    self.send_response(307)
+                    self.send_header("Location", "/explore")
+                    self.end_headers()
+                else:
+                    time.sleep(mock.delays["page_delay"] / 1000)
+                    self.respond(200, mock.render(path))
+            
+            def respond(self, status, body):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.thread = None
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+    
+    def render(self, username):
+        return PAGE_TEMPLATE.format(username=username, config=json.dumps(self.delays),
+                                    buy_button=json.dumps(BUY_BUTTONS[self.variant]),
+                                    decoy_button=json.dumps(DECOY_BUTTONS.get(self.variant, "")))
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Mock time.fun ({self.variant}) serving at {self.url}")
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local time.fun stand-in")
+    parser.add_argument("--port", type=int, default=8765, help="Port to serve on (default: 8765)")
+    parser.add_argument("--variant", choices=sorted(BUY_BUTTONS), default="default", help="Buy button DOM variant")
+    for name, value in DEFAULT_DELAYS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value, help=f"ms (default: {value})")
+    args = parser.parse_args()
+    
+    mock = MockTimeFun(args.port, args.variant, {name: getattr(args, name) for name in DEFAULT_DELAYS}).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import threading
+from collections import deque
+from tweet_store import TweetDedupeStore
+from tweet_time import tweet_age_ms
+from bot_logging import get_logger
+
+logger = get_logger("multi_monitor")
+
+class MonitorTarget:
+    """An account to watch, with its priority, poll interval and detection stats"""
+    
+    def __init__(self, account, priority=1, interval=30, source="browser"):
+        self.account = account
+        self.priority = priority
+        self.interval = interval
+        self.source = source
+        
+        self.next_due = 0.0
+        self.in_flight = False
+        self.polls = 0
+        self.missed_deadlines = 0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self.detections = 0
+        self.lags_ms = deque(maxlen=100)
+    
+    def urgency(self, now):
+        """Priority-weighted lateness: grows the longer a poll is overdue, so nobody starves"""
+        lateness = max(0.0, now - self.next_due)
+        return self.priority * (1 + lateness / self.interval)
+    
+    def stats(self):
+        lags = sorted(self.lags_ms)
+        return {
+            "account": self.account,
+            "source": self.source,
+            "polls": self.polls,
+            "missed_deadlines": self.missed_deadlines,
+            "avg_lateness": self.total_lateness / self.polls if self.polls else 0.0,
+            "max_lateness": self.max_lateness,
+            "detections": self.detections,
+            "median_lag_ms": lags[len(lags) // 2] if lags else None,
+            "max_lag_ms": lags[-1] if lags else None,
+        }
+
+def load_targets(path):
+    """Load targets from a JSON file
+    
+    The file holds a list of objects like
+    {"account": "timedotfun", "priority": 3, "interval": 15, "source": "browser"}
+    where only "account" is required.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return [MonitorTarget(entry["account"],
+                          priority=entry.get("priority", 1),
+                          interval=entry.get("interval", 30),
+                          source=entry.get("source", "browser"))
+            for entry in entries]
+
+class BrowserTimelineSource:
+    """Poll account timelines through the buyer's browser (one poll at a time)
+    
+    Anything else that drives the buyer's browser from another thread
+    (e.g. an inline buy) holds self.lock while it does.
+    """
+    
+    def __init__(self, buyer, max_tweets=5):
+        self.buyer = buyer
+        self.max_tweets = max_tweets
+        self.stores = {}
+        self.lock = threading.Lock()
+    
+    def poll(self, target):
+        """Return (tweet_id, usernames) for new, recent tweets"""
+        store = self.stores.get(target.account)
+        if store is None:
+            store = self.stores[target.account] = TweetDedupeStore(f"processed_tweets_{target.account}.json")
+        
+        detections = []
+        with self.lock:
+            tweets = self.buyer.fetch_timeline(target.account, self.max_tweets)
+        for tweet in tweets:
+            if tweet["id"] in store:
+                continue
+            store.add(tweet["id"])
+            if not self.buyer.extract_tweet_time(tweet):
+                continue
+            usernames = self.buyer.extract_usernames(tweet["text"], tweet)
+            if usernames:
+                detections.append((tweet["id"], usernames))
+        store.save()
+        return detections
+
+class ApiTimelineSource:
+    """Poll account timelines through the Twitter API"""
+    
+    def __init__(self):
+        self.monitors = {}
+        self.lock = threading.Lock()
+    
+    def poll(self, target):
+        """Return (tweet_id, usernames) for new promotions"""
+        with self.lock:
+            monitor = self.monitors.get(target.account)
+            if monitor is None:
+                from twitter_monitor import TwitterMonitor
+                monitor = self.monitors[target.account] = TwitterMonitor(target.account, source="poll")
+        return [(tweet.id, [username]) for tweet, username in monitor.check_new_promotion_tweets()]
+
+class MultiAccountMonitor:
+    """Poll many accounts across sources with a deadline-aware fair scheduler
+    
+    Each source runs in its own lane (thread(s)); within a lane the due
+    target with the highest priority-weighted lateness is polled next, so
+    high-priority accounts keep their cadence under load while overdue
+    low-priority accounts still get their turn.
+    """
+    
+    def __init__(self, targets, sources, on_detection, lane_workers=None, report_interval=60):
+        """
+        Args:
+            targets: List of MonitorTarget
+            sources: Dict of source name -> object with poll(target)
+            on_detection: Callable(target, tweet_id, usernames)
+            lane_workers: Dict of source name -> concurrent polls (default: 1 each)
+            report_interval: Seconds between per-account reports
+        """
+        self.targets = targets
+        self.sources = sources
+        self.on_detection = on_detection
+        self.lane_workers = lane_workers or {}
+        self.report_interval = report_interval
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.threads = []
+        
+        unknown = {t.source for t in targets} - set(sources)
+        if unknown:
+            raise ValueError(f"No source configured for: {', '.join(sorted(unknown))}")
+    
+    def next_target(self, source):
+        """Pick the due target with the highest urgency, or return the wait time until one is due"""
+        now = time.monotonic()
+        with self.lock:
+            candidates = [t for t in self.targets if t.source == source and not t.in_flight]
+            due = [t for t in candidates if t.next_due <= now]
+            if due:
+                target = max(due, key=lambda t: t.urgency(now))
+                target.in_flight = True
+                return target, 0
+            wait = min((t.next_due - now for t in candidates), default=1.0)
+        return None, min(max(wait, 0.05), 1.0)
+    
+    def poll_target(self, target):
+        """Poll one target picked by next_target(), report its detections and reschedule it"""
+        poller = self.sources[target.source]
+        started = time.monotonic()
+        lateness = max(0.0, started - target.next_due) if target.polls else 0.0
+        try:
+            detections = poller.poll(target)
+        except Exception as e:
+            logger.warning("Error polling @%s (%s): %s", target.account, target.source, e)
+            detections = []
+        
+        for tweet_id, usernames in detections:
+            lag = tweet_age_ms(tweet_id)
+            with self.lock:
+                target.detections += 1
+                if lag is not None:
+                    target.lags_ms.append(lag)
+            lag_text = f"{lag / 1000:.1f}s" if lag is not None else "unknown"
+            logger.info("@%s: tweet detected (lag %s), usernames: %s", target.account, lag_text, usernames,
+                        extra={"tweet_id": tweet_id, "stage": "detected", "elapsed_ms": lag})
+            try:
+                self.on_detection(target, tweet_id, usernames)
+            except Exception as e:
+                logger.error("Error handling detection from @%s: %s", target.account, e, extra={"tweet_id": tweet_id})
+        
+        with self.lock:
+            target.polls += 1
+            target.total_lateness += lateness
+            target.max_lateness = max(target.max_lateness, lateness)
+            if lateness > target.interval:
+                target.missed_deadlines += 1
+            # Keep the cadence, but don't queue up polls for slots already missed
+            target.next_due = max(target.next_due + target.interval, time.monotonic())
+            target.in_flight = False
+    
+    def lane(self, source):
+        """Poll targets of one source until stopped"""
+        while not self.stopping.is_set():
+            target, wait = self.next_target(source)
+            if target is None:
+                self.stopping.wait(wait)
+                continue
+            self.poll_target(target)
+    
+    def start(self):
+        """Start one thread per concurrent poll slot of each source"""
+        for source in {t.source for t in self.targets}:
+            for i in range(self.lane_workers.get(source, 1)):
+                thread = threading.Thread(target=self.lane, args=(source,), name=f"{source}-lane-{i + 1}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        logger.info("Monitoring %d accounts across %d poll lanes", len(self.targets), len(self.threads))
+    
+    def run(self):
+        """Run until interrupted, reporting per-account stats periodically"""
+        self.start()
+        try:
+            while not self.stopping.wait(self.report_interval):
+                self.report()
+        finally:
+            self.stop()
+    
+    def stop(self, timeout=30):
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.report()
+    
+    def report(self):
+        """Print per-account cadence and detection lag"""
+        print("=== Per-account monitoring stats ===")
+        with self.lock:
+            stats = [t.stats() for t in sorted(self.targets, key=lambda t: -t.priority)]
+        for s in stats:
+            lag = f"{s['median_lag_ms'] / 1000:.1f}s (max {s['max_lag_ms'] / 1000:.1f}s)" if s["median_lag_ms"] is not None else "n/a"
+            print(f"@{s['account']} [{s['source']}]: polls {s['polls']}, avg lateness {s['avg_lateness']:.1f}s, "
+                  f"missed deadlines {s['missed_deadlines']}, detections {s['detections']}, detection lag {lag}")
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+import time
+import queue
+import logging
+import threading
+from collections import namedtuple
+from bot_logging import get_logger, log_context
+
+logger = get_logger("pipeline")
+
+# A detected promotion waiting to be bought (trace: optional latency Trace)
+PurchaseEvent = namedtuple("PurchaseEvent", ["tweet_id", "username", "detected_at", "trace"], defaults=[None])
+
+class PurchasePipeline:
+    """Bounded work queue between tweet detection and purchase workers
+    
+    The monitor loop only submits events; purchase workers consume them, each
+    with its own buyer (a WebDriver session cannot be shared across threads).
+    When the queue is full the oldest pending event is dropped to make room,
+    so detection never blocks on slow buys. If no worker can create its
+    buyer, the pipeline turns unhealthy and rejects new events, and callers
+    buy inline instead.
+    """
+    
+    def __init__(self, buyer_factory, workers=1, max_queue=20):
+        """
+        Args:
+            buyer_factory: Callable returning a buyer with buy_with_retry() and close()
+            workers: Number of purchase worker threads
+            max_queue: Maximum number of pending events
+        """
+        self.buyer_factory = buyer_factory
+        self.worker_count = workers
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.threads = []
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = set()  # usernames queued or in flight
+        self.broken = 0  # workers whose buyer could not be created
+        self.healthy = True
+        self.metrics = {
+            "submitted": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "completed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "max_depth": 0,
+            "total_wait": 0.0,
+        }
+    
+    def start(self):
+        """Start the purchase worker threads"""
+        for i in range(self.worker_count):
+            thread = threading.Thread(target=self.worker, name=f"purchase-worker-{i + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info("Started %d purchase workers (queue size: %d)", self.worker_count, self.queue.maxsize)
+    
+    def submit(self, tweet_id, username, detected_at=None, trace=None):
+        """Queue a purchase without blocking
+        
+        Returns:
+            bool: True if the event was queued, False if it was coalesced or rejected
+        """
+        if self.stopping.is_set() or not self.healthy:
+            return False
+        
+        key = username.lower()
+        with self.lock:
+            if key in self.pending:
+                self.metrics["coalesced"] += 1
+                logger.info("Purchase for %s already pending, skipping duplicate", username, extra={"tweet_id": tweet_id})
+                return False
+            self.pending.add(key)
+            self.metrics["submitted"] += 1
+        
+        event = PurchaseEvent(tweet_id, username, detected_at or time.time(), trace)
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                break
+            except queue.Full:
+                # Backpressure: drop the oldest pending event to make room
+                try:
+                    dropped = self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self.queue.task_done()
+                with self.lock:
+                    self.pending.discard(dropped.username.lower())
+                    self.metrics["dropped"] += 1
+                logger.warning("Purchase queue full, dropped pending purchase for %s", dropped.username,
+                               extra={"tweet_id": dropped.tweet_id})
+                if dropped.trace is not None:
+                    dropped.trace.finish("dropped")
+        
+        with self.lock:
+            self.metrics["max_depth"] = max(self.metrics["max_depth"], self.queue.qsize())
+        return True
+    
+    def depth(self):
+        """Number of events waiting for a worker"""
+        return self.queue.qsize()
+    
+    def worker(self):
+        """Consume purchase events until a stop sentinel arrives"""
+        try:
+            buyer = self.buyer_factory()
+        except Exception as e:
+            logger.error("Failed to start purchase worker: %s", e, exc_info=True)
+            with self.lock:
+                self.broken += 1
+                self.healthy = self.broken < self.worker_count
+            if not self.healthy and not self.stopping.is_set():
+                logger.error("No purchase worker could start, buying inline from now on")
+                self.discard_pending("no_worker")
+            return
+        
+        try:
+            while True:
+                event = self.queue.get()
+                if event is None:
+                    self.queue.task_done()
+                    break
+                
+                wait_time = time.time() - event.detected_at
+                with log_context(username=event.username, tweet_id=event.tweet_id):
+                    logger.info("Buying %s (queued %.1fs)", event.username, wait_time)
+                    try:
+                        if event.trace is not None:
+                            success = buyer.buy_with_retry(event.username, trace=event.trace)
+                        else:
+                            success = buyer.buy_with_retry(event.username)
+                    except Exception as e:
+                        logger.error("Error buying for user %s: %s", event.username, e)
+                        success = False
+                    finally:
+                        self.queue.task_done()
+                
+                with self.lock:
+                    self.pending.discard(event.username.lower())
+                    self.metrics["completed"] += 1
+                    self.metrics["succeeded" if success else "failed"] += 1
+                    self.metrics["total_wait"] += wait_time
+                logger.log(logging.INFO if success else logging.WARNING, "%s for user: %s",
+                           "Successfully bought" if success else "Failed to buy", event.username,
+                           extra={"tweet_id": event.tweet_id})
+        finally:
+            buyer.close()
+    
+    def stats(self):
+        """Snapshot of the pipeline metrics"""
+        with self.lock:
+            stats = dict(self.metrics)
+        stats["depth"] = self.depth()
+        total_wait = stats.pop("total_wait")
+        stats["avg_wait"] = total_wait / stats["completed"] if stats["completed"] else 0.0
+        return stats
+    
+    def report(self):
+        """Print queue depth and purchase metrics"""
+        stats = self.stats()
+        print(f"Purchase queue: depth {stats['depth']} (max {stats['max_depth']}), "
+              f"submitted {stats['submitted']}, dropped {stats['dropped']}, coalesced {stats['coalesced']}, "
+              f"succeeded {stats['succeeded']}, failed {stats['failed']}, avg wait {stats['avg_wait']:.1f}s")
+    
+    def discard_pending(self, outcome):
+        """Empty the queue, finishing each discarded event's trace with the outcome"""
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.queue.task_done()
+            with self.lock:
+                self.pending.discard(event.username.lower())
+            logger.info("Discarding pending purchase for %s", event.username, extra={"tweet_id": event.tweet_id})
+            if event.trace is not None:
+                event.trace.finish(outcome)
+    
+    def stop(self, drain=False, timeout=60):
+        """Stop accepting events and shut the workers down
+        
+        Args:
+            drain: Finish pending purchases first instead of discarding them
+            timeout: Seconds to wait for each worker to exit
+        """
+        self.stopping.set()
+        if not drain:
+            self.discard_pending("discarded")
+        
+        for _ in self.threads:
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                logger.warning("Purchase queue still full, a worker may not have stopped")
+        for thread in self.threads:
+            thread.join(timeout)
+        self.report()
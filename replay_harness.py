@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+from contextlib import contextmanager
+from unittest import mock
+from timeline_extractor import TIMELINE_EXTRACT_SCRIPT
+from tweet_time import snowflake_to_ms
+from latency_trace import percentile
+from handle_extraction import MENTION_PATTERN, REPLY_PREFIX_PATTERN
+
+class Journal:
+    """A recorded session loaded for replay"""
+    
+    def __init__(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        header = lines[0]
+        self.kind = header["kind"]
+        self.account = header["account"]
+        self.started_at = header["started_at"]
+        self.labels = header.get("expected")
+        self.entries = sorted(lines[1:], key=lambda entry: entry["t"])
+        self.duration = self.entries[-1]["t"] if self.entries else 0
+    
+    def expected(self):
+        """(tweet_id, username) pairs a correct monitor should act on
+        
+        Taken from the header's "expected" list when present. Otherwise every
+        tweet that appeared after the first snapshot is expected for each
+        account it promotes, excluding the monitored account itself: the
+        retweeted author for API journals; for timelines the author of a
+        retweet plus the mentions in the body (leading "@a @b" reply targets
+        don't count).
+        """
+        if self.labels is not None:
+            return {(str(tweet_id), username.lower()) for tweet_id, username in self.labels}
+        expected = set()
+        for entry in self.entries[1:]:
+            for record in entry["new"]:
+                if record.get("is_promoted"):
+                    continue
+                if self.kind == "api":
+                    usernames = [record["retweeted_user"]] if record.get("retweeted_user") else []
+                else:
+                    usernames = self.promoted_in(record)
+                for username in usernames:
+                    if username.lower() != self.account.lower():
+                        expected.add((str(record["id"]), username.lower()))
+        return expected
+    
+    @staticmethod
+    def promoted_in(record):
+        """Accounts a timeline record promotes: a retweet's author and the body mentions"""
+        text = record.get("text") or ""
+        reply_prefix = REPLY_PREFIX_PATTERN.match(text)
+        replies = {handle.lower() for handle in MENTION_PATTERN.findall(text[:reply_prefix.end()])} if reply_prefix else set()
+        usernames = [record["author"]] if record.get("is_retweet") and record.get("author") else []
+        usernames += [handle for handle in record.get("mentions") or [] if handle.lower() not in replies]
+        return usernames
+    
+    def baseline(self):
+        """IDs already on the timeline when recording started (neither expected nor false positives)"""
+        if self.labels is not None or not self.entries:
+            return set()
+        return {str(record["id"]) for record in self.entries[0]["new"]}
+
+class VirtualClock:
+    """Stand-in for the time module: sleeps advance virtual time
+    
+    speed 0 replays as fast as possible; 1 sleeps in real time; 10 is ten
+    times faster than real time. Only sleeps advance the clock, so a replay
+    is deterministic whatever the speed.
+    """
+    
+    def __init__(self, started_at, speed=0):
+        self.started_at = started_at
+        self.speed = speed
+        self.elapsed = 0.0
+    
+    def time(self):
+        return self.started_at + self.elapsed
+    
+    def monotonic(self):
+        return self.elapsed
+    
+    perf_counter = monotonic
+    
+    def sleep(self, seconds):
+        if self.speed:
+            time.sleep(seconds / self.speed)
+        self.elapsed += seconds
+    
+    def datetime_class(self):
+        """datetime whose now() follows this clock"""
+        clock = self
+        
+        class ReplayDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.fromtimestamp(clock.time(), tz)
+        
+        return ReplayDatetime
+
+class ReplayFinished(BaseException):
+    """The journal is exhausted (a BaseException so monitor loops don't swallow it)"""
+
+class ReplayTimeline:
+    """Rebuilds the visible timeline at any point of the journal"""
+    
+    def __init__(self, journal):
+        self.journal = journal
+        self.cursor = 0
+        self.records = {}
+        self.order = []
+    
+    def at(self, elapsed):
+        while self.cursor < len(self.journal.entries) and self.journal.entries[self.cursor]["t"] <= elapsed:
+            entry = self.journal.entries[self.cursor]
+            for record in entry["new"]:
+                self.records[record["id"]] = record
+            self.order = entry.get("order", self.order)
+            self.cursor += 1
+        return [dict(self.records[tweet_id]) for tweet_id in self.order]
+
+class ReplayDriver:
+    """The slice of a WebDriver that monitor_tweets uses, answered from a journal"""
+    
+    def __init__(self, journal, clock, end):
+        self.timeline = ReplayTimeline(journal)
+        self.clock = clock
+        self.end = end
+        self.current_url = "about:blank"
+        self.title = "replay"
+        self.page_source = ""
+        self.window_handles = ["replay"]
+        self.capabilities = {}
+        self.loads = 0
+    
+    def get(self, url):
+        if self.clock.elapsed > self.end:
+            raise ReplayFinished()
+        self.current_url = url
+        self.loads += 1
+    
+    def find_element(self, by, value):
+        # The timeline counts as loaded, even when it has no tweets yet
+        return SimpleNamespace(text="")
+    
+    def execute_script(self, script, *args):
+        if script == TIMELINE_EXTRACT_SCRIPT:
+            records = self.timeline.at(self.clock.elapsed)
+            limit = args[0] if args else 0
+            return records[:limit] if limit > 0 else records
+        return None
+    
+    def get_screenshot_as_png(self):
+        return b""
+    
+    def close(self):
+        pass
+
+class ReplayAPI:
+    """tweepy.API.user_timeline answered from an API journal"""
+    
+    def __init__(self, journal, clock):
+        self.journal = journal
+        self.clock = clock
+        self.cursor = 0
+        self.statuses = []
+        self.calls = 0
+    
+    def user_timeline(self, screen_name=None, count=20, since_id=None, max_id=None, **kwargs):
+        self.calls += 1
+        entries = self.journal.entries
+        while self.cursor < len(entries) and entries[self.cursor]["t"] <= self.clock.elapsed:
+            for record in entries[self.cursor]["new"]:
+                status = SimpleNamespace(id=record["id"], full_text=record["text"],
+                                         user=SimpleNamespace(screen_name=record["author"]))
+                if record.get("retweeted_user"):
+                    status.retweeted_status = SimpleNamespace(user=SimpleNamespace(screen_name=record["retweeted_user"]))
+                self.statuses.append(status)
+            self.cursor += 1
+        visible = sorted(self.statuses, key=lambda status: status.id, reverse=True)
+        if since_id is not None:
+            visible = [status for status in visible if status.id > since_id]
+        if max_id is not None:
+            visible = [status for status in visible if status.id <= max_id]
+        return visible[:count]
+
+class DetectionLog:
+    """Pipeline stand-in that records what the monitor would have bought"""
+    
+    def __init__(self, clock):
+        self.clock = clock
+        self.detections = []
+        self.healthy = True
+    
+    def submit(self, tweet_id, username, detected_at=None, trace=None):
+        self.detections.append((str(tweet_id), username, self.clock.time()))
+        return True
+    
+    def report(self):
+        pass
+
+class ReplayReport:
+    """Detection lag per tweet, missed tweets and false positives of one replay"""
+    
+    def __init__(self, journal, detections):
+        self.journal = journal
+        self.lags = {}
+        for tweet_id, username, detected_at in detections:
+            key = (tweet_id, username.lower())
+            if key not in self.lags:
+                created_ms = snowflake_to_ms(tweet_id)
+                self.lags[key] = detected_at * 1000 - created_ms if created_ms is not None else None
+        expected = journal.expected()
+        self.missed = sorted(expected - set(self.lags))
+        baseline = journal.baseline()
+        self.false_positives = sorted(key for key in set(self.lags) - expected if key[0] not in baseline)
+    
+    def as_dict(self):
+        lags = sorted(lag for lag in self.lags.values() if lag is not None)
+        return {
+            "kind": self.journal.kind,
+            "account": self.journal.account,
+            "detected": len(self.lags),
+            "missed": [list(key) for key in self.missed],
+            "false_positives": [list(key) for key in self.false_positives],
+            "lag_ms": {f"{tweet_id}:{username}": lag for (tweet_id, username), lag in sorted(self.lags.items())},
+            "lag_p50_ms": percentile(lags, 50),
+            "lag_p95_ms": percentile(lags, 95),
+        }
+    
+    def print(self):
+        summary = self.as_dict()
+        print(f"=== Replay of @{summary['account']} ({summary['kind']}) ===")
+        for key, lag in summary["lag_ms"].items():
+            print(f"{key}: detected after {lag / 1000:.1f}s" if lag is not None else f"{key}: detected (no snowflake time)")
+        for tweet_id, username in self.missed:
+            print(f"MISSED {tweet_id}:{username}")
+        for tweet_id, username in self.false_positives:
+            print(f"FALSE POSITIVE {tweet_id}:{username}")
+        if summary["lag_p50_ms"] is not None:
+            print(f"Detection lag: p50 {summary['lag_p50_ms'] / 1000:.1f}s, p95 {summary['lag_p95_ms'] / 1000:.1f}s")
+        print(f"Detected {summary['detected']}, missed {len(self.missed)}, false positives {len(self.false_positives)}")
+
+@contextmanager
+def isolated_run():
+    """Run in a scratch directory with settings that keep a replay offline"""
+    overrides = {"TAB_POOL_SIZE": "0", "CDP_LANE": "False", "USER_CHECK_MODE": "browser",
+                 "LATENCY_TRACE_FILE": "", "SELECTOR_STATS_FILE": "replay_selector_stats.json",
+                 "DEBUG_ARTIFACTS": "off"}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch, mock.patch.dict(os.environ, overrides):
+        os.chdir(scratch)
+        try:
+            yield scratch
+        finally:
+            os.chdir(cwd)
+
+def replay_monitor_tweets(journal, speed=0, check_interval=30, max_tweets=5, max_age=60):
+    """Replay a browser journal through TimeFunBuyer.monitor_tweets"""
+    import timefun_buyer_en
+    clock = VirtualClock(journal.started_at, speed)
+    driver = ReplayDriver(journal, clock, end=journal.duration + check_interval)
+    log = DetectionLog(clock)
+    with isolated_run(), mock.patch.object(timefun_buyer_en, "time", clock), \
+            mock.patch.object(timefun_buyer_en, "datetime", clock.datetime_class()):
+        buyer = timefun_buyer_en.TimeFunBuyer(fast_path=False, driver=driver)
+        buyer.max_tweet_age = max_age
+        buyer.is_logged_in = True
+        buyer.owns_tracer = False  # spans would mix virtual and real time
+        try:
+            buyer.monitor_tweets(journal.account, continuous_monitoring=True, check_interval=check_interval,
+                                 max_tweets_to_check=max_tweets, pipeline=log)
+        except ReplayFinished:
+            pass
+        finally:
+            buyer.close()
+    print(f"Replayed {driver.loads} timeline loads over {clock.elapsed:.0f}s of journal time")
+    return ReplayReport(journal, log.detections)
+
+def replay_check_new_promotions(journal, speed=0, check_interval=60):
+    """Replay an API journal through TwitterMonitor.check_new_promotions"""
+    from twitter_monitor import TwitterMonitor
+    clock = VirtualClock(journal.started_at, speed)
+    api = ReplayAPI(journal, clock)
+    detections = []
+    with isolated_run():
+        monitor = TwitterMonitor(journal.account, api=api)
+        while clock.elapsed <= journal.duration + check_interval:
+            for tweet, username in monitor.check_new_promotion_tweets():
+                detections.append((str(tweet.id), username, clock.time()))
+            clock.sleep(check_interval)
+    print(f"Replayed {api.calls} API calls over {clock.elapsed:.0f}s of journal time")
+    return ReplayReport(journal, detections)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded monitoring session")
+    parser.add_argument("journal", help="Journal recorded with --record")
+    parser.add_argument("--speed", type=float, default=0, help="Replay speed, 1 for real time, 0 for as fast as possible (default: 0)")
+    parser.add_argument("--interval", "-i", type=int, default=None, help="Poll interval in seconds (default: 30 browser, 60 API)")
+    parser.add_argument("--max-tweets", "-m", type=int, default=5, help="Maximum number of tweets checked per poll (default: 5)")
+    parser.add_argument("--max-age", "-a", type=float, default=60, help="Freshness window in seconds (default: 60)")
+    parser.add_argument("--json", metavar="FILE", help="Also write the report as JSON, for comparing runs")
+    args = parser.parse_args()
+    
+    journal = Journal(args.journal)
+    if journal.kind == "api":
+        report = replay_check_new_promotions(journal, args.speed, args.interval or 60)
+    else:
+        report = replay_monitor_tweets(journal, args.speed, args.interval or 30, args.max_tweets, args.max_age)
+    report.print()
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.as_dict(), f, indent=2)
+    sys.exit(1 if report.missed or report.false_positives else 0)
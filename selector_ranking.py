@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import threading
+from bot_logging import get_logger
+
+logger = get_logger("ranking")
+
+class SelectorRanking:
+    """Learn which selector wins for each buy step and rank candidates accordingly
+    
+    Stats are kept per step and per selector: hit and miss counts plus a
+    recency-weighted score (every observation decays older ones), persisted
+    to a small JSON file so the ranking survives restarts. A match only
+    counts as a win once the step it led to is confirmed (see propose), so
+    a selector that matched the wrong element doesn't promote itself. One
+    instance can be shared by several purchase workers.
+    """
+    
+    def __init__(self, path="selector_stats.json", decay=0.9):
+        self.path = path
+        self.decay = decay
+        self.stats = {}
+        self.dirty = False
+        self.pending = {}
+        self.lock = threading.RLock()
+        self.load()
+    
+    @staticmethod
+    def key(candidate):
+        """Stable string key for a selector candidate"""
+        if isinstance(candidate, str):
+            return candidate
+        by, value = candidate
+        if not isinstance(value, str):
+            value = " & ".join(value)
+        return f"{by}={value}"
+    
+    def load(self):
+        """Load stats from disk, starting fresh if the file is missing or corrupt"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.stats = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Error loading selector stats, starting fresh: %s", e)
+            self.stats = {}
+    
+    def save(self):
+        """Atomically write stats to disk if anything changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.stats, f, indent=2)
+                os.replace(tmp_path, self.path)
+                self.dirty = False
+            except OSError as e:
+                logger.warning("Error saving selector stats: %s", e)
+    
+    def rank(self, step, candidates):
+        """Return candidates ordered by score, keeping the original order for ties"""
+        with self.lock:
+            step_stats = {key: dict(entry) for key, entry in self.stats.get(step, {}).items()}
+        
+        def sort_key(item):
+            index, candidate = item
+            entry = step_stats.get(self.key(candidate))
+            return (-(entry["score"] if entry else 0.0), index)
+        
+        return [candidate for _, candidate in sorted(enumerate(candidates), key=sort_key)]
+    
+    def record(self, step, candidates, winner_index):
+        """Record the outcome of a lookup
+        
+        Args:
+            step: Buy step name (e.g. "buy_button")
+            candidates: Candidates in the order they were tried
+            winner_index: Index of the matching candidate, or -1 if none matched
+        """
+        with self.lock:
+            step_stats = self.stats.setdefault(step, {})
+            now = time.time()
+            
+            # Candidates ahead of the winner were tried and did not match
+            tried = candidates if winner_index < 0 else candidates[:winner_index + 1]
+            for entry in step_stats.values():
+                entry["score"] *= self.decay
+            
+            for index, candidate in enumerate(tried):
+                entry = step_stats.setdefault(self.key(candidate), {
+                    "hits": 0, "misses": 0, "score": 0.0, "last_hit": None
+                })
+                if index == winner_index:
+                    entry["hits"] += 1
+                    entry["score"] += 1.0
+                    entry["last_hit"] = now
+                else:
+                    entry["misses"] += 1
+            
+            self.dirty = True
+    
+    def propose(self, step, candidates, winner_index):
+        """Note a lookup whose winner still has to prove it found the right element
+        
+        Misses are recorded right away. A match is held until confirm() is
+        called for the step, e.g. once the modal opened after a Buy click.
+        A winner past the end of the candidates (a generic fallback) is
+        never ranked, and counts as a miss for every candidate.
+        
+        Args:
+            step: Buy step name (e.g. "buy_button")
+            candidates: Ranked candidates in the order they were tried
+            winner_index: Index of the matching candidate, or -1 if none matched
+        """
+        if winner_index < 0 or winner_index >= len(candidates):
+            self.record(step, candidates, -1)
+            return
+        with self.lock:
+            self.pending[(threading.get_ident(), step)] = (list(candidates), winner_index)
+    
+    def confirm(self, step, ok):
+        """Record a proposed match as a win if the step worked, otherwise as a miss"""
+        with self.lock:
+            proposal = self.pending.pop((threading.get_ident(), step), None)
+        if proposal is None:
+            return
+        candidates, winner_index = proposal
+        if ok:
+            self.record(step, candidates, winner_index)
+        else:
+            self.record(step, candidates[:winner_index + 1], -1)
+    
+    def discard(self, step):
+        """Drop a proposed match whose step couldn't be checked, recording nothing"""
+        with self.lock:
+            self.pending.pop((threading.get_ident(), step), None)
+    
+    def dead_selectors(self, min_misses=10, max_idle_days=30):
+        """List selectors that keep missing and have not matched recently
+        
+        Returns:
+            list: (step, selector, hits, misses) tuples
+        """
+        cutoff = time.time() - max_idle_days * 86400
+        dead = []
+        with self.lock:
+            items = [(step, selector, dict(entry)) for step, step_stats in self.stats.items()
+                     for selector, entry in step_stats.items()]
+        for step, selector, entry in items:
+            if entry["misses"] < min_misses:
+                continue
+            if entry["last_hit"] is None or entry["last_hit"] < cutoff:
+                dead.append((step, selector, entry["hits"], entry["misses"]))
+        return dead
+    
+    def report(self):
+        """Print selectors that no longer match"""
+        dead = self.dead_selectors()
+        if not dead:
+            return
+        print(f"{len(dead)} selectors have stopped matching:")
+        for step, selector, hits, misses in dead:
+            print(f"  [{step}] {selector} (hits: {hits}, misses: {misses})")
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+import time
+from collections import OrderedDict
+from selenium.webdriver.support.ui import WebDriverWait
+from bot_logging import get_logger
+
+logger = get_logger("tab_pool")
+
+# Client-side navigation: use the app router when exposed, otherwise pushState + popstate
+CLIENT_NAVIGATE_SCRIPT = """
+var route = arguments[0];
+if (window.next && window.next.router && typeof window.next.router.push === 'function') {
+    window.next.router.push(route);
+    return 'router';
+}
+window.history.pushState({}, '', route);
+window.dispatchEvent(new PopStateEvent('popstate', {state: {}}));
+return 'pushState';
+"""
+
+# Did the app render the route: the URL matches, the handle shows up in the
+# title or a heading, and the market's Buy button exists. The URL alone proves
+# nothing, since CLIENT_NAVIGATE_SCRIPT's pushState sets it before any render.
+ROUTE_RENDERED_SCRIPT = """
+var route = arguments[0], name = new RegExp('(^|[^\\\\w])' + arguments[1] + '(?!\\\\w)', 'i');
+if (location.pathname + location.search !== route) { return false; }
+var named = name.test(document.title) ||
+    Array.prototype.some.call(document.querySelectorAll('h1, h2, h3'), function(el) {
+        return name.test(el.textContent || '');
+    });
+var buy = Array.prototype.some.call(document.querySelectorAll('button'), function(el) {
+    return (el.innerText || el.textContent || '').indexOf('Buy') !== -1;
+});
+return named && buy;
+"""
+
+# Health probe: the tab is still on the app and finished loading
+HEALTH_SCRIPT = """
+return {
+    host: window.location.host,
+    ready: document.readyState,
+    hasApp: !!document.querySelector('body *')
+};
+"""
+
+class WarmTab:
+    """A browser tab with the time.fun app already loaded"""
+    
+    def __init__(self, handle):
+        self.handle = handle
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self.route = None
+
+class TabPool:
+    """Keep N tabs with time.fun loaded so a buy can start with client-side navigation
+    
+    Tabs are kept in LRU order: a route that already has a tab reuses it
+    (reloaded, so a failed or half-open modal from an earlier attempt is
+    gone), otherwise the least recently used tab is re-routed. Tabs that fail
+    a health check, get too old or have been used too many times are recycled,
+    ideally by health_check() between polls rather than during a buy.
+    """
+    
+    def __init__(self, driver, size=2, base_url="https://time.fun", max_age=1800, max_uses=50,
+                 route_timeout=3, check_interval=60):
+        self.driver = driver
+        self.size = size
+        self.base_url = base_url.rstrip("/")
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.route_timeout = route_timeout
+        self.check_interval = check_interval
+        self.last_checked = None
+        self.home_handle = None
+        self.tabs = OrderedDict()  # handle -> WarmTab, least recently used first
+    
+    def warm(self):
+        """Open tabs until the pool is full"""
+        if self.home_handle is None:
+            self.home_handle = self.driver.current_window_handle
+        
+        while len(self.tabs) < self.size:
+            tab = self.open_tab()
+            if tab is None:
+                break
+            self.tabs[tab.handle] = tab
+        
+        if self.home_handle in self.driver.window_handles:
+            self.driver.switch_to.window(self.home_handle)
+        logger.info("Tab pool warm: %d/%d tabs", len(self.tabs), self.size)
+    
+    def open_tab(self):
+        """Open a new tab and load the app in it"""
+        try:
+            self.driver.switch_to.new_window("tab")
+            self.driver.get(self.base_url)
+            return WarmTab(self.driver.current_window_handle)
+        except Exception as e:
+            logger.warning("Error opening warm tab: %s", e)
+            return None
+    
+    def close_tab(self, handle):
+        """Close a pool tab"""
+        self.tabs.pop(handle, None)
+        try:
+            if handle in self.driver.window_handles:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+        except Exception as e:
+            logger.warning("Error closing tab: %s", e)
+    
+    def is_healthy(self, tab):
+        """Check that a tab is alive, still on the app, and not too old or overused"""
+        if self.is_worn(tab):
+            return False
+        try:
+            self.driver.switch_to.window(tab.handle)
+            state = self.driver.execute_script(HEALTH_SCRIPT)
+        except Exception:
+            return False
+        return (self.base_url.split("://", 1)[-1] in state["host"]
+                and state["ready"] == "complete" and state["hasApp"])
+    
+    def recycle(self, tab):
+        """Replace a stale tab with a freshly loaded one"""
+        logger.info("Recycling stale tab (uses: %d, route: %s)", tab.uses, tab.route)
+        self.close_tab(tab.handle)
+        fresh = self.open_tab()
+        if fresh is not None:
+            self.tabs[fresh.handle] = fresh
+        return fresh
+    
+    def is_worn(self, tab):
+        return time.monotonic() - tab.created_at > self.max_age or tab.uses >= self.max_uses
+    
+    def health_check(self, force=False):
+        """Recycle tabs that are worn out or fail the health check
+        
+        Meant for idle moments (between polls), so open_route doesn't have to
+        reload a tab during a buy. Runs at most every check_interval seconds
+        unless forced; tabs used within that interval just rendered a route
+        and are only checked for age and uses.
+        """
+        now = time.monotonic()
+        if not force and self.last_checked is not None and now - self.last_checked < self.check_interval:
+            return
+        self.last_checked = now
+        switched = False
+        for tab in list(self.tabs.values()):
+            if self.is_worn(tab):
+                self.recycle(tab)
+                switched = True
+            elif now - tab.last_used >= self.check_interval:
+                switched = True
+                if not self.is_healthy(tab):
+                    self.recycle(tab)
+        if switched:
+            self.release()
+    
+    def open_route(self, route):
+        """Switch to a warm tab showing the given route (e.g. "/user?tab=market")
+        
+        Returns:
+            str: How the route was reached ("reload", "router", "pushState" or "load")
+        """
+        if self.home_handle is None or len(self.tabs) < self.size:
+            self.warm()
+        
+        # Prefer a tab already on this route, otherwise evict the least recently used
+        tab = next((t for t in self.tabs.values() if t.route == route), None)
+        if tab is None:
+            tab = next(iter(self.tabs.values()), None)
+        if tab is not None and not self.is_healthy(tab):
+            tab = self.recycle(tab)
+        if tab is None:
+            # Pool is unusable, fall back to a full load in the current tab
+            self.driver.get(self.base_url + route)
+            return "load"
+        
+        self.driver.switch_to.window(tab.handle)
+        if tab.route == route:
+            # Same route again (e.g. a retry): start over from a fresh page
+            self.driver.refresh()
+            method = "reload"
+        else:
+            method = self.navigate(route)
+        tab.route = route
+        tab.uses += 1
+        tab.last_used = time.monotonic()
+        self.tabs.move_to_end(tab.handle)
+        return method
+    
+    def navigate(self, route):
+        """Client-side navigate the current tab, falling back to a full page load
+        
+        The fallback happens when the app doesn't render the route (see
+        ROUTE_RENDERED_SCRIPT) within route_timeout.
+        """
+        handle = route.split("?", 1)[0].strip("/")
+        try:
+            method = self.driver.execute_script(CLIENT_NAVIGATE_SCRIPT, route)
+            WebDriverWait(self.driver, self.route_timeout, poll_frequency=0.05).until(
+                lambda d: d.execute_script(ROUTE_RENDERED_SCRIPT, route, handle)
+            )
+            return method
+        except Exception as e:
+            logger.warning("Client-side navigation to %s failed, doing a full load: %s", route, e)
+            self.driver.get(self.base_url + route)
+            return "load"
+    
+    def release(self):
+        """Switch back to the tab that was active when the pool was created"""
+        try:
+            if self.home_handle and self.home_handle in self.driver.window_handles:
+                self.driver.switch_to.window(self.home_handle)
+        except Exception as e:
+            logger.warning("Error switching back to home tab: %s", e)
+    
+    def close(self):
+        """Close all pool tabs"""
+        for handle in list(self.tabs):
+            self.close_tab(handle)
+        self.release()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+from mock_timefun import MockTimeFun
+from armed_modal import ArmedModal
+
+class FakeDriver:
+    """Just enough of a WebDriver for ArmedModal's tab bookkeeping"""
+    
+    def __init__(self):
+        self.windows = ["home"]
+        self.current_window_handle = "home"
+        self.switch_to = SimpleNamespace(new_window=self.new_window, window=self.window)
+    
+    def new_window(self, kind):
+        self.windows.append(f"tab-{len(self.windows)}")
+        self.current_window_handle = self.windows[-1]
+    
+    def window(self, handle):
+        self.current_window_handle = handle
+    
+    def close(self):
+        self.windows.remove(self.current_window_handle)
+    
+    def execute_script(self, script, *args):
+        return True
+
+class FakeBuyer:
+    """Stages every handle except ghosts, counting the staging passes"""
+    
+    def __init__(self):
+        self.driver = FakeDriver()
+        self.buy_amount = 10
+        self.staged = []
+    
+    def stage_purchase(self, username, use_tab_pool=True):
+        self.staged.append(username)
+        return not username.startswith("ghost")
+
+def test_maintain_bounded():
+    """Test that a maintenance pass stages at most one handle and failures don't starve the rest"""
+    print("Testing bounded armed-modal maintenance...")
+    buyer = FakeBuyer()
+    armed = ArmedModal(buyer, ["ghost1", "alpha", "beta"], check_interval=60)
+    
+    armed.maintain()
+    assert buyer.staged == ["ghost1"] and not armed.tabs
+    # Work is left, so the next call doesn't wait for check_interval, and the ghost waits its turn
+    armed.maintain()
+    armed.maintain()
+    assert buyer.staged == ["ghost1", "alpha", "beta"]
+    assert armed.is_armed("alpha") and armed.is_armed("beta")
+    
+    # Only the ghost is left and one pass covers it, so the next pass waits for check_interval
+    armed.maintain()
+    armed.maintain()
+    assert buyer.staged == ["ghost1", "alpha", "beta", "ghost1"]
+    
+    # Startup stages everything in one pass
+    buyer = FakeBuyer()
+    ArmedModal(buyer, ["alpha", "beta"]).maintain(force=True, stage_all=True)
+    assert buyer.staged == ["alpha", "beta"]
+    
+    print("All maintenance checks passed!")
+    return True
+
+def test_armed_mode():
+    """Test staging and firing armed modals against the local time.fun stand-in"""
+    print("Testing armed mode against local time.fun stand-in...")
+    site = MockTimeFun(delays={"page_delay": 10, "settle_delay": 200}).start()
+    settings = {"TIMEFUN_BASE_URL": site.url, "HEADLESS": "True", "TAB_POOL_SIZE": "0", "CDP_LANE": "False",
+                "LATENCY_TRACE_FILE": "", "SELECTOR_STATS_FILE": "test_selector_stats.json", "DEBUG_ARTIFACTS": "off"}
+    try:
+        with mock.patch.dict(os.environ, settings):
+            from timefun_buyer_en import TimeFunBuyer
+            try:
+                buyer = TimeFunBuyer(use_existing_session=False, fast_path=True)
+            except Exception as e:
+                # Needs a local Chrome; the maintenance logic is covered by test_maintain_bounded
+                print(f"Chrome not available, skipping armed mode test: {e}")
+                return True
+            try:
+                return check_armed_mode(buyer, site)
+            finally:
+                buyer.close()
+                try:
+                    buyer.driver.quit()  # this Chrome was started for the test
+                except Exception:
+                    pass
+    finally:
+        site.stop()
+
+def check_armed_mode(buyer, site):
+    buyer.is_logged_in = True
+    buyer.armed = ArmedModal(buyer, ["alpha", "beta"])
+    buyer.armed.maintain(force=True, stage_all=True)
+    assert buyer.armed.is_armed("alpha") and buyer.armed.is_armed("beta")
+    assert len(buyer.armed.staging_ms) == 2
+    assert buyer.armed.is_valid(buyer.armed.tabs["alpha"].window)
+    
+    # A detection only needs the final two clicks in the staged modal
+    requests = len(site.requests)
+    assert buyer.buy_with_retry("alpha") is True
+    assert len(site.requests) == requests  # no page load
+    assert buyer.armed.fired == 1 and len(buyer.armed.trigger_ms) == 1
+    assert not buyer.armed.is_armed("alpha") and buyer.armed.handles == ["beta"]
+    
+    assert buyer.armed.fire("beta") is True
+    assert not buyer.armed.tabs
+    print("All armed mode checks passed!")
+    return True
+
+if __name__ == "__main__":
+    try:
+        success = test_maintain_bounded() and test_armed_mode()
+    except AssertionError as e:
+        print(f"Test failed: {e}")
+        success = False
+    sys.exit(0 if success else 1)
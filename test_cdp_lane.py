@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+import sys
+import json
+import base64
+import socket
+import struct
+import hashlib
+import threading
+from types import SimpleNamespace
+from cdp_lane import CDPLane, CDPError, CDPTimeout
+
+WS_MAGIC = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+class FakeCDPServer:
+    """Minimal local DevTools websocket that answers a few CDP commands"""
+    
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(1)
+        self.port = self.sock.getsockname()[1]
+        self.commands = []
+        threading.Thread(target=self.serve, daemon=True).start()
+    
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/devtools/page/FAKE"
+    
+    def serve(self):
+        conn, _ = self.sock.accept()
+        request = b""
+        while b"\r\n\r\n" not in request:
+            request += conn.recv(1024)
+        key = [line.split(":", 1)[1].strip() for line in request.decode().split("\r\n") if line.lower().startswith("sec-websocket-key")][0]
+        accept = base64.b64encode(hashlib.sha1((key + WS_MAGIC).encode()).digest()).decode()
+        conn.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        try:
+            while True:
+                message = self.read_frame(conn)
+                if message is None:
+                    break
+                self.handle(conn, json.loads(message))
+        finally:
+            conn.close()
+    
+    def read_exact(self, conn, n):
+        data = b""
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("closed")
+            data += chunk
+        return data
+    
+    def read_frame(self, conn):
+        try:
+            head = self.read_exact(conn, 2)
+        except ConnectionError:
+            return None
+        opcode, length = head[0] & 0x0F, head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.read_exact(conn, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.read_exact(conn, 8))[0]
+        mask = self.read_exact(conn, 4)
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.read_exact(conn, length)))
+        return None if opcode == 0x8 else payload.decode()
+    
+    def write_frame(self, conn, message):
+        payload = json.dumps(message).encode()
+        if len(payload) < 126:
+            header = struct.pack(">BB", 0x81, len(payload))
+        else:
+            header = struct.pack(">BBH", 0x81, 126, len(payload))
+        conn.sendall(header + payload)
+    
+    def handle(self, conn, command):
+        self.commands.append((command["method"], command["params"]))
+        method, params = command["method"], command["params"]
+        # Unrelated events arrive before responses, like in a real tab
+        self.write_frame(conn, {"method": "Network.dataReceived", "params": {}})
+        if method == "Runtime.evaluate":
+            if "throw" in params["expression"]:
+                result = {"result": {"type": "object"}, "exceptionDetails": {"text": "Uncaught", "exception": {"description": "Error: boom"}}}
+            elif "getBoundingClientRect" in params["expression"]:
+                result = {"result": {"type": "object", "value": [40, 20]}}
+            else:
+                result = {"result": {"type": "number", "value": 2}}
+            self.write_frame(conn, {"id": command["id"], "result": result})
+        elif method == "Page.navigate":
+            self.write_frame(conn, {"id": command["id"], "result": {"frameId": "F1", "loaderId": "L2"}})
+            if "slow" in params["url"]:
+                return  # the new document never commits
+            # A child frame commits first, then the main frame's new document
+            self.write_frame(conn, {"method": "Page.frameNavigated", "params": {"frame": {"id": "F2", "loaderId": "L9"}}})
+            self.write_frame(conn, {"method": "Page.frameNavigated", "params": {"frame": {"id": "F1", "loaderId": "L2"}}})
+        elif method == "Bogus.method":
+            self.write_frame(conn, {"id": command["id"], "error": {"code": -32601, "message": "'Bogus.method' wasn't found"}})
+        else:
+            self.write_frame(conn, {"id": command["id"], "result": {}})
+
+class SwitchingDriver:
+    """Just the tab switching of a WebDriver, recording which tab is current"""
+    
+    def __init__(self):
+        self.current_window_handle = "FAKE"
+        self._switch_to = SimpleNamespace(window=self.window, new_window=self.new_window, default_content=lambda: "frame")
+    
+    @property
+    def switch_to(self):
+        return self._switch_to
+    
+    def window(self, handle):
+        self.current_window_handle = handle
+    
+    def new_window(self, kind):
+        self.current_window_handle = "NEW"
+
+def test_cdp_lane():
+    """Test the CDP fast lane commands against a local fake DevTools endpoint"""
+    print("Testing CDP fast lane against fake DevTools websocket...")
+    server = FakeCDPServer()
+    lane = CDPLane(server.url, target_id="FAKE", timeout=2)
+    lane.connect()
+    try:
+        # Navigation waits for the new document to commit in the main frame
+        assert lane.navigate("https://time.fun/someone?tab=market") == "F1"
+        assert [method for method, _ in server.commands[:2]] == ["Page.enable", "Page.navigate"]
+        assert not any(event["params"].get("frame", {}).get("id") == "F1" for event in lane.events)
+        assert lane.evaluate("1 + 1") == 2
+        try:
+            lane.navigate("https://time.fun/slow?tab=market", timeout=0.2)
+            assert False, "navigation timeout was not raised"
+        except CDPTimeout:
+            pass
+        
+        try:
+            lane.evaluate("throw new Error('boom')")
+            assert False, "page exception was not raised"
+        except CDPError as e:
+            assert "boom" in str(e)
+        try:
+            lane.send("Bogus.method")
+            assert False, "command error was not raised"
+        except CDPError as e:
+            assert "wasn't found" in str(e)
+        
+        # Selector click: one evaluate for the center, then a trusted press/release there
+        assert lane.click("button.buy") is True
+        press, release = server.commands[-2:]
+        assert press == ("Input.dispatchMouseEvent", {"type": "mousePressed", "x": 40, "y": 20, "button": "left", "clickCount": 1})
+        assert release[1]["type"] == "mouseReleased"
+        
+        # The resolver's last match is clicked the same way
+        assert lane.click_element("window.__lastResolved") is True
+        assert "(window.__lastResolved)" in server.commands[-3][1]["expression"]
+        assert server.commands[-1][0] == "Input.dispatchMouseEvent"
+        
+        lane.insert_text("10")
+        assert server.commands[-1] == ("Input.insertText", {"text": "10"})
+        
+        # Tab switches through the driver tell the lane whether its tab is selected
+        driver = SwitchingDriver()
+        lane.follow(driver, selected=True)
+        driver.switch_to.window("OTHER")
+        assert not lane.selected and driver.current_window_handle == "OTHER"
+        driver.switch_to.window("FAKE")
+        assert lane.selected
+        driver.switch_to.new_window("tab")
+        assert not lane.selected and driver.current_window_handle == "NEW"
+        assert driver.switch_to.default_content() == "frame"
+        
+        print("All CDP lane checks passed!")
+        return True
+    finally:
+        lane.close()
+
+if __name__ == "__main__":
+    try:
+        success = test_cdp_lane()
+    except AssertionError as e:
+        print(f"Test failed: {e}")
+        success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import sys
+from types import SimpleNamespace
+from handle_extraction import HandleExtractor
+
+def test_handle_extraction():
+    """Test candidate sources, blocklist, reply targets and ranking"""
+    extractor = HandleExtractor(blocklist=["timedotfun", "spambot"])
+    
+    # Plain text: the monitored account and e-mail addresses are never candidates
+    assert extractor.extract("Welcome @Zagabond to @timedotfun! mail us at team@time.fun") == ["Zagabond"]
+    
+    # Reply targets don't reach the buy path, the subject of the tweet does
+    assert extractor.extract("@someone @other congrats @LinqinEth on your launch") == ["LinqinEth"]
+    
+    # A retweet ranks the retweeted author first; the original author of a plain tweet is excluded
+    record = {"text": "Just set up my profile on @timedotfun, come buy my time @friend",
+              "mentions": ["timedotfun", "friend"], "urls": [], "author": "Zagabond", "is_retweet": True}
+    candidates = extractor.from_record(record)
+    assert [c.handle for c in candidates] == ["Zagabond", "friend"]
+    assert candidates[0].sources == ("retweeted_author",)
+    assert extractor.from_record({**record, "is_retweet": False, "author": "timedotfun"})[0].handle == "friend"
+    
+    # time.fun links count even without a mention; reserved paths and blocklisted handles don't
+    assert extractor.extract("new creator: https://time.fun/artist_one and time.fun/explore @spambot") == ["artist_one"]
+    
+    # Entity-aware: only real mention entities count, links come from expanded URLs
+    status = SimpleNamespace(full_text="RT @creator: on @timedotfun now https://t.co/x", user=SimpleNamespace(screen_name="timedotfun"),
+                             retweeted_status=SimpleNamespace(user=SimpleNamespace(screen_name="creator"),
+                                                              entities={"user_mentions": [{"screen_name": "timedotfun"}],
+                                                                        "urls": [{"url": "https://t.co/x", "expanded_url": "https://time.fun/creator"}]}))
+    candidates = extractor.from_status(status)
+    assert [c.handle for c in candidates] == ["creator"]
+    assert set(candidates[0].sources) == {"retweeted_author", "retweet_text", "link"}
+    
+    print("All handle extraction checks passed!")
+    return True
+
+if __name__ == "__main__":
+    try:
+        success = test_handle_extraction()
+    except AssertionError as e:
+        print(f"Test failed: {e}")
+        success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+from purchase_pipeline import PurchasePipeline
+
+class RecordingTrace:
+    """Remembers the outcome it was finished with"""
+    
+    def __init__(self):
+        self.outcome = None
+    
+    def finish(self, outcome):
+        self.outcome = outcome
+
+class FakeBuyer:
+    def __init__(self):
+        self.bought = []
+    
+    def buy_with_retry(self, username, trace=None):
+        self.bought.append(username)
+        if trace is not None:
+            trace.finish("bought")
+        return True
+    
+    def close(self):
+        pass
+
+def gated_factory(gate, buyer=None):
+    """A buyer factory that waits for the gate, then returns the buyer (or fails without one)"""
+    def factory():
+        gate.wait(5)
+        if buyer is None:
+            raise RuntimeError("Chrome did not start")
+        return buyer
+    return factory
+
+def test_dropped_events():
+    """Test that an event dropped for room has its trace finished"""
+    print("Testing purchase queue backpressure...")
+    gate = threading.Event()
+    buyer = FakeBuyer()
+    pipeline = PurchasePipeline(gated_factory(gate, buyer), workers=1, max_queue=1)
+    pipeline.start()
+    
+    first, second = RecordingTrace(), RecordingTrace()
+    assert pipeline.submit(1, "alice", trace=first)
+    assert pipeline.submit(2, "bob", trace=second)
+    assert first.outcome == "dropped" and pipeline.stats()["dropped"] == 1
+    
+    gate.set()
+    pipeline.stop(drain=True, timeout=5)
+    assert buyer.bought == ["bob"] and second.outcome == "bought"
+    print("Dropped events are traced!")
+    return True
+
+def test_worker_start_failure():
+    """Test that a pipeline without a working buyer turns unhealthy and gives up its queue"""
+    print("Testing purchase worker start failure...")
+    gate = threading.Event()
+    pipeline = PurchasePipeline(gated_factory(gate), workers=1)
+    pipeline.start()
+    
+    trace = RecordingTrace()
+    assert pipeline.submit(1, "alice", trace=trace)
+    gate.set()
+    pipeline.threads[0].join(5)
+    assert not pipeline.healthy
+    assert trace.outcome == "no_worker" and pipeline.depth() == 0
+    # Callers buy inline from here on
+    assert pipeline.submit(2, "bob") is False
+    pipeline.stop(timeout=1)
+    print("Unhealthy pipeline rejects new purchases!")
+    return True
+
+if __name__ == "__main__":
+    try:
+        success = test_dropped_events() and test_worker_start_failure()
+    except AssertionError as e:
+        print(f"Test failed: {e}")
+        success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import tempfile
+from types import SimpleNamespace
+from tweet_time import TWITTER_EPOCH_MS
+from journal_recorder import JournalRecorder
+from replay_harness import Journal, replay_check_new_promotions, replay_monitor_tweets
+
+def snowflake(epoch_seconds):
+    """A tweet ID created at the given Unix time"""
+    return (int(epoch_seconds * 1000) - TWITTER_EPOCH_MS) << 22
+
+def status(tweet_id, text, retweeted_user=None):
+    tweet = SimpleNamespace(id=tweet_id, full_text=text, user=SimpleNamespace(screen_name="timedotfun"))
+    if retweeted_user:
+        tweet.retweeted_status = SimpleNamespace(user=SimpleNamespace(screen_name=retweeted_user))
+    return tweet
+
+def timeline_record(tweet_id, text, mentions, promoted=False, retweet_of=None):
+    """A TimelineExtractor record for a @timedotfun tweet, or its retweet of another author's tweet"""
+    return {"id": str(tweet_id), "author": retweet_of or "timedotfun", "text": text, "mentions": mentions, "urls": [],
+            "datetime": None, "time_text": "", "is_retweet": bool(retweet_of), "is_pinned": False,
+            "is_promoted": promoted, "social_context": "timedotfun reposted" if retweet_of else ""}
+
+def test_replay_harness():
+    """Test that journals stay compact and replay deterministically through TwitterMonitor"""
+    print("Testing journal recording and API replay...")
+    with tempfile.TemporaryDirectory() as scratch:
+        # Only statuses not seen before are recorded
+        path = os.path.join(scratch, "recorded.jsonl")
+        recorder = JournalRecorder(path, "api", "timedotfun")
+        first = status(snowflake(recorder.started_at), "RT @zagabond", "zagabond")
+        recorder.record_api([first])
+        recorder.record_api([first])
+        recorder.close()
+        with open(path, "r", encoding="utf-8") as f:
+            assert len(f.readlines()) == 2
+        
+        # A session with one promotion before and two after recording started
+        started_at = 1700000000.0
+        path = os.path.join(scratch, "session.jsonl")
+        entries = [
+            {"journal": 1, "kind": "api", "account": "timedotfun", "started_at": started_at},
+            {"t": 0, "new": [{"id": snowflake(started_at - 600), "author": "timedotfun", "text": "RT", "retweeted_user": "olduser"}]},
+            {"t": 70, "new": [{"id": snowflake(started_at + 65), "author": "timedotfun", "text": "RT", "retweeted_user": "alice"}]},
+            {"t": 130, "new": [{"id": snowflake(started_at + 125), "author": "timedotfun", "text": "gm", "retweeted_user": None},
+                               {"id": snowflake(started_at + 128), "author": "timedotfun", "text": "RT", "retweeted_user": "bob"}]},
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps(entry) for entry in entries))
+        
+        journal = Journal(path)
+        assert {username for _, username in journal.expected()} == {"alice", "bob"}
+        
+        # Polling every 60s finds alice at t=120 and bob at t=180
+        report = replay_check_new_promotions(journal, speed=0, check_interval=60)
+        summary = report.as_dict()
+        assert not report.missed and not report.false_positives
+        assert summary["lag_ms"][f"{snowflake(started_at + 65)}:alice"] == 55000
+        assert summary["lag_ms"][f"{snowflake(started_at + 128)}:bob"] == 52000
+        
+        # Replays are deterministic
+        assert replay_check_new_promotions(journal, speed=0, check_interval=60).as_dict() == summary
+    
+    print("All replay checks passed!")
+    return True
+
+def test_browser_replay():
+    """Test that a browser journal replays through monitor_tweets with ReplayDriver"""
+    print("Testing browser journal replay...")
+    started_at = 1700000000.0
+    old = timeline_record(snowflake(started_at - 600), "Welcome @olduser to time.fun", ["olduser"])
+    alice = timeline_record(snowflake(started_at + 35), "Welcome @alice to time.fun", ["alice"])
+    ad = timeline_record(snowflake(started_at + 50), "Buy now @spammer", ["spammer"], promoted=True)
+    bob = timeline_record(snowflake(started_at + 95), "Welcome @bob to time.fun", ["bob"])
+    # A retweet names only @timedotfun in its text; a reply's leading handles aren't promoted
+    creator = timeline_record(snowflake(started_at + 100), "Just set up my profile on @timedotfun", ["timedotfun"],
+                              retweet_of="creator")
+    reply = timeline_record(snowflake(started_at + 102), "@a @b congrats @carol", ["a", "b", "carol"])
+    entries = [
+        {"journal": 1, "kind": "browser", "account": "timedotfun", "started_at": started_at},
+        {"t": 0, "new": [old], "order": [old["id"]]},
+        {"t": 40, "new": [ad, alice], "order": [ad["id"], alice["id"], old["id"]]},
+        {"t": 100, "new": [bob], "order": [ad["id"], bob["id"], alice["id"], old["id"]]},
+        {"t": 105, "new": [creator, reply], "order": [ad["id"], reply["id"], creator["id"], bob["id"], alice["id"], old["id"]]},
+    ]
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "browser.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps(entry) for entry in entries))
+        journal = Journal(path)
+        assert {username for _, username in journal.expected()} == {"alice", "bob", "creator", "carol"}
+        
+        # Loading every 30s finds alice at t=40 and the rest at t=110; the ad, the old tweet and reply targets are skipped
+        report = replay_monitor_tweets(journal, speed=0, check_interval=30)
+        summary = report.as_dict()
+        assert not report.missed and not report.false_positives
+        assert summary["lag_ms"] == {f"{alice['id']}:alice": 5000, f"{bob['id']}:bob": 15000,
+                                     f"{creator['id']}:creator": 10000, f"{reply['id']}:carol": 8000}
+        
+        # Replays are deterministic
+        assert replay_monitor_tweets(journal, speed=0, check_interval=30).as_dict() == summary
+    
+    print("All browser replay checks passed!")
+    return True
+
+if __name__ == "__main__":
+    try:
+        success = test_replay_harness() and test_browser_replay()
+    except AssertionError as e:
+        print(f"Test failed: {e}")
+        success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import sys
+from types import SimpleNamespace
+from tab_pool import TabPool, CLIENT_NAVIGATE_SCRIPT, ROUTE_RENDERED_SCRIPT, HEALTH_SCRIPT
+
+class StubDriver:
+    """Tabs with a URL each; client-side routes render unless listed in broken_routes"""
+    
+    def __init__(self):
+        self.urls = {"home": "https://time.fun/"}
+        self.current_window_handle = "home"
+        self.switch_to = SimpleNamespace(new_window=self.new_window, window=self.window)
+        self.broken_routes = set()
+        self.unhealthy = set()
+        self.loads = []
+        self.refreshes = 0
+        self.opened = 0
+    
+    @property
+    def window_handles(self):
+        return list(self.urls)
+    
+    def new_window(self, kind):
+        self.opened += 1
+        self.current_window_handle = f"tab-{self.opened}"
+        self.urls[self.current_window_handle] = "about:blank"
+    
+    def window(self, handle):
+        self.current_window_handle = handle
+    
+    def get(self, url):
+        self.loads.append(url)
+        self.urls[self.current_window_handle] = url
+    
+    def refresh(self):
+        self.refreshes += 1
+    
+    def close(self):
+        del self.urls[self.current_window_handle]
+    
+    def execute_script(self, script, *args):
+        url = self.urls[self.current_window_handle]
+        if script == CLIENT_NAVIGATE_SCRIPT:
+            self.urls[self.current_window_handle] = "https://time.fun" + args[0]
+            return "pushState"
+        if script == ROUTE_RENDERED_SCRIPT:
+            return url.endswith(args[0]) and args[0] not in self.broken_routes
+        if script == HEALTH_SCRIPT:
+            host = "" if self.current_window_handle in self.unhealthy else "time.fun"
+            return {"host": host, "ready": "complete", "hasApp": True}
+        return None
+
+def test_tab_pool():
+    """Test warm-up, client-side routing with fallback, LRU reuse and idle health checks"""
+    print("Testing tab pool against a stub driver...")
+    driver = StubDriver()
+    pool = TabPool(driver, size=2, route_timeout=0.2, check_interval=60)
+    pool.warm()
+    assert list(pool.tabs) == ["tab-1", "tab-2"] and driver.current_window_handle == "home"
+    
+    # Routes render client-side; a route that never renders gets a full load
+    assert pool.open_route("/alice?tab=market") == "pushState"
+    driver.broken_routes.add("/bob?tab=market")
+    assert pool.open_route("/bob?tab=market") == "load"
+    assert driver.loads[-1] == "https://time.fun/bob?tab=market"
+    bob_tab = pool.tabs[driver.current_window_handle]
+    
+    # The same route again is reloaded in its tab; a new route evicts the least recently used tab (bob's)
+    assert pool.open_route("/alice?tab=market") == "reload" and driver.refreshes == 1
+    alice_tab = pool.tabs[driver.current_window_handle]
+    assert pool.open_route("/carol?tab=market") == "pushState"
+    assert alice_tab.route == "/alice?tab=market" and bob_tab.route == "/carol?tab=market"
+    
+    # Idle health checks: recently used tabs aren't probed, idle and worn ones are recycled
+    for tab in pool.tabs.values():
+        tab.last_used -= 120
+    unhealthy, worn = list(pool.tabs.values())
+    driver.unhealthy.add(unhealthy.handle)
+    worn.last_used += 120
+    worn.uses = pool.max_uses
+    pool.health_check()
+    assert unhealthy.handle not in pool.tabs and worn.handle not in pool.tabs
+    assert len(pool.tabs) == 2 and driver.current_window_handle == "home"
+    
+    # Passes closer together than check_interval are skipped unless forced
+    fresh = next(iter(pool.tabs.values()))
+    fresh.uses = pool.max_uses
+    pool.health_check()
+    assert fresh.handle in pool.tabs
+    pool.health_check(force=True)
+    assert fresh.handle not in pool.tabs
+    
+    # A tab used within check_interval isn't probed at all
+    recent = next(iter(pool.tabs.values()))
+    driver.unhealthy.add(recent.handle)
+    pool.health_check(force=True)
+    assert recent.handle in pool.tabs
+    
+    print("All tab pool checks passed!")
+    return True
+
+if __name__ == "__main__":
+    try:
+        success = test_tab_pool()
+    except AssertionError as e:
+        print(f"Test failed: {e}")
+        success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tweet_stream import FilteredStream, StreamEventParser
+from twitter_monitor import TwitterMonitor
+
+def retweet_event(tweet_id, creator, text="Just set up my profile on @timedotfun"):
+    """v2 stream payload for a @timedotfun retweet of a creator's tweet"""
+    return {
+        "data": {"id": str(tweet_id), "text": f"RT @{creator}: {text}", "author_id": "1",
+                 "referenced_tweets": [{"type": "retweeted", "id": str(tweet_id - 1)}]},
+        "includes": {
+            "users": [{"id": "1", "username": "timedotfun"}, {"id": "2", "username": creator}],
+            "tweets": [{"id": str(tweet_id - 1), "author_id": "2", "text": text,
+                        "entities": {"mentions": [{"username": "timedotfun"}]}}],
+        },
+        "matching_rules": [{"id": "1", "tag": "timefun-monitor"}],
+    }
+
+def original_event(tweet_id, text):
+    return {"data": {"id": str(tweet_id), "text": text, "author_id": "1"},
+            "includes": {"users": [{"id": "1", "username": "timedotfun"}]}}
+
+class StreamStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the filtered stream: canned chunked responses per connection"""
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    rules = []
+    
+    def send_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+        time.sleep(0.02)
+    
+    def do_GET(self):
+        if self.path.startswith("/stream/rules"):
+            body = json.dumps({"data": StreamStandIn.rules}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        
+        StreamStandIn.connections += 1
+        if StreamStandIn.connections == 2:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if StreamStandIn.connections == 1:
+            self.send_chunk(b"\r\n")  # heartbeat
+            line = json.dumps(retweet_event(101, "Zagabond")).encode() + b"\r\n"
+            self.send_chunk(line[:40])  # one event split across chunks
+            self.send_chunk(line[40:])
+            self.send_chunk(json.dumps(original_event(103, "gm")).encode() + b"\r\n")
+            # Connection drops without the terminating chunk
+            self.close_connection = True
+        else:
+            self.send_chunk(json.dumps(retweet_event(101, "Zagabond")).encode() + b"\r\n")  # duplicate
+            self.send_chunk(json.dumps(retweet_event(107, "artist_one")).encode() + b"\r\n")
+            try:
+                while True:
+                    self.send_chunk(b"\r\n")
+            except OSError:
+                self.close_connection = True
+    
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        for rule in payload.get("add", []):
+            StreamStandIn.rules.append({"id": str(len(StreamStandIn.rules) + 1), **rule})
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class GapAPI:
+    """Timeline stand-in: a retweet posted while the stream was reconnecting"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.calls = []
+        self.connects = []
+    
+    def user_timeline(self, since_id=None, **kwargs):
+        self.calls.append(since_id)
+        self.connects.append(self.stream.connects)
+        if len(self.calls) == 1:
+            return []
+        status = SimpleNamespace(id=105, full_text="RT @gap_creator: hello", user=SimpleNamespace(screen_name="timedotfun"),
+                                 retweeted_status=SimpleNamespace(user=SimpleNamespace(screen_name="gap_creator")))
+        return [status] if since_id is None or status.id > since_id else []
+
+def test_tweet_stream():
+    """Test incremental parsing, reconnect with backoff and the gap catch-up"""
+    parser = StreamEventParser()
+    assert parser.feed(b'{"a": 1}\r\n\r\n{"b"') == [{"a": 1}]
+    assert parser.feed(b': 2}\n') == [{"b": 2}] and parser.heartbeats == 1
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StreamStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stream = FilteredStream("token", url=f"http://127.0.0.1:{server.server_port}/stream", read_timeout=5,
+                            backoff={"network": (0.01, 0.05), "http": (0.01, 0.05)})
+    cwd = os.getcwd()
+    found = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            monitor = TwitterMonitor(api=GapAPI(stream), source="stream", stream=stream)
+            reader = []
+            
+            def callback(username):
+                found.append(username)
+                reader.append(threading.current_thread())
+                if len(found) == 3:
+                    stream.stop()
+            
+            thread = threading.Thread(target=monitor.monitor, args=(callback,), daemon=True)
+            thread.start()
+            thread.join(timeout=10)
+            assert not thread.is_alive(), "stream did not stop"
+        
+        assert StreamStandIn.rules[0]["value"] == "from:timedotfun"
+        # Streamed retweet, the one posted during the gap (caught up by polling), then the next streamed one
+        assert found == ["Zagabond", "gap_creator", "artist_one"], found
+        assert StreamStandIn.connections == 3 and stream.connects == 2
+        assert monitor.api.calls[1] == 103  # catch-up resumed after the last streamed tweet
+        assert monitor.api.connects == [1, 2]  # caught up once connected, the first time included
+        assert thread not in reader  # buys don't run on the stream's read loop
+        assert stream.heartbeats >= 1
+        
+        print("All stream checks passed!")
+        return True
+    finally:
+        os.chdir(cwd)
+        stream.stop()
+        server.shutdown()
+
+if __name__ == "__main__":
+    try:
+        success = test_tweet_stream()
+    except AssertionError as e:
+        print(f"Test failed: {e}")
+        success = False
+    sys.exit(0 if success else 1)
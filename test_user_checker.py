@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from user_checker import UserExistenceChecker
+
+# Handles the stand-in server treats as time.fun creators
+CREATORS = {"zagabond", "linqineth"}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in for time.fun profile routes"""
+    requests_seen = []
+    
+    def do_GET(self):
+        handle = self.path.strip("/").split("?")[0]
+        StandInHandler.requests_seen.append(handle)
+        if handle == "challenge":
+            self.send_response(403)
+            self.end_headers()
+        elif handle.lower() in CREATORS:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(f'<html><head><title>{handle} | time.fun</title>'
+                             f'<meta property="og:url" content="https://time.fun/{handle}"></head>'
+                             f'<body><div id="app"></div></body></html>'.encode())
+        elif handle in ("shell", "zagabond_fan"):
+            # The single-page app shell, served for any route the server doesn't redirect
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(b'<html><head><title>time.fun</title>'
+                             b'<meta property="og:url" content="https://time.fun/zagabond"></head>'
+                             b'<body><div id="app"></div></body></html>')
+        else:
+            self.send_response(307)
+            self.send_header("Location", "/explore")
+            self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+def start_stand_in():
+    """Start the stand-in server on a free local port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_user_checker():
+    """Test HTTP existence checks, caching and the browser fallback"""
+    print("Testing HTTP existence checks against local stand-in...")
+    server = start_stand_in()
+    fallback_calls = []
+    
+    def browser_fallback(username):
+        fallback_calls.append(username)
+        return True
+    
+    checker = UserExistenceChecker(base_url=f"http://127.0.0.1:{server.server_port}", browser_fallback=browser_fallback)
+    try:
+        assert checker.check("Zagabond") is True
+        assert checker.check("nobody") is False
+        
+        # Cached answers don't hit the server again
+        seen = len(StandInHandler.requests_seen)
+        assert checker.check("zagabond") is True
+        assert checker.check("nobody") is False
+        assert len(StandInHandler.requests_seen) == seen
+        
+        # Inconclusive responses go to the browser
+        assert checker.check("challenge") is True
+        assert fallback_calls == ["challenge"]
+        
+        # A 200 only counts when the page names the handle; the bare app shell is inconclusive
+        assert checker.probe("shell") is None
+        assert checker.probe("zagabond_fan") is None
+        assert UserExistenceChecker.is_profile_page('<title>@Zagabond | time.fun</title>', "zagabond")
+        assert not UserExistenceChecker.is_profile_page('<title>@Zagabond | time.fun</title>', "zaga")
+        
+        # Concurrent probes warm the cache
+        results = checker.check_many(["LinqinEth", "ghost", "LinqinEth"])
+        assert results == {"LinqinEth": True, "ghost": False}
+        assert checker.cache.get("ghost") == (True, False)
+        
+        print("All existence checks passed!")
+        return True
+    finally:
+        checker.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    try:
+        success = test_user_checker()
+    except AssertionError as e:
+        print(f"Test failed: {e}")
+        success = False
+    sys.exit(0 if success else 1)
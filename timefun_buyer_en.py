@@ -6,20 +6,122 @@ import random
 import socket
 import subprocess
 import re
+import psutil
 from datetime import datetime, timezone, timedelta
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webelement import WebElement
 from dotenv import load_dotenv
 import argparse
+import asyncio
+import logging
+from element_resolver import ElementResolver, BY_TEXT, LAST_MATCH
+from selector_ranking import SelectorRanking
+from tab_pool import TabPool
+from purchase_pipeline import PurchasePipeline
+from user_checker import UserExistenceChecker
+from tweet_store import TweetDedupeStore
+from tweet_time import snowflake_to_datetime, status_id_from_url
+from timeline_extractor import TimelineExtractor
+from timeline_watcher import TimelineWatcher
+from multi_monitor import MultiAccountMonitor, MonitorTarget, BrowserTimelineSource, ApiTimelineSource, load_targets
+from async_runtime import AsyncRuntime, AsyncSniper
+from cdp_lane import CDPLane, CDPTimeout, benchmark_command_overhead
+from devtools_discovery import DevToolsState, discover_devtools_port, wait_for_devtools
+from latency_trace import LatencyTracer
+from journal_recorder import JournalRecorder
+from debug_artifacts import DebugArtifacts
+from bot_logging import get_logger, log_context, setup_logging
+from delay_profiles import PROFILES, get_profile
+from armed_modal import ArmedModal
+from market_prefetch import MarketPrefetcher
+from handle_extraction import HandleExtractor
+
+logger = get_logger("buyer")
+
+# Resolves once the DOM has seen no mutations for quiet_ms, or -1 when the budget runs out
+DOM_QUIET_SCRIPT = """
+var quietMs = arguments[0], budgetMs = arguments[1], done = arguments[arguments.length - 1];
+var start = performance.now(), finished = false, timer = null, cap = null;
+var observer = new MutationObserver(function() {
+    clearTimeout(timer);
+    timer = setTimeout(function() { finish(performance.now() - start); }, quietMs);
+});
+function finish(result) {
+    if (finished) { return; }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    clearTimeout(cap);
+    done(result);
+}
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+timer = setTimeout(function() { finish(performance.now() - start); }, quietMs);
+cap = setTimeout(function() { finish(-1); }, budgetMs);
+"""
+
+# Sets an input's value the way React expects (native setter) and fires input/change events
+SET_VALUE_SCRIPT = """
+var el = arguments[0], value = arguments[1];
+var proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+el.focus();
+el.dispatchEvent(new Event('input', {bubbles: true}));
+el.dispatchEvent(new Event('change', {bubbles: true}));
+return el.value;
+"""
+
+# Which currency the buy modal is in: "USD", "other", or "unknown" when the page
+# marks neither the modal (data-currency) nor the USD toggle (aria/data state)
+CURRENCY_STATE_SCRIPT = """
+var root = document.querySelector('[data-currency]');
+if (root) { return root.getAttribute('data-currency') === 'USD' ? 'USD' : 'other'; }
+var usd = Array.prototype.find.call(document.querySelectorAll('button'), function(el) {
+    return (el.innerText || el.textContent || '').trim() === 'USD';
+});
+if (!usd) { return 'unknown'; }
+var marks = ['aria-pressed', 'aria-selected', 'aria-checked', 'data-state', 'data-active'];
+var marked = marks.filter(function(name) { return usd.hasAttribute(name); });
+if (!marked.length) { return 'unknown'; }
+return marked.some(function(name) {
+    return ['true', 'on', 'active', 'checked'].indexOf(usd.getAttribute(name)) !== -1;
+}) ? 'USD' : 'other';
+"""
+
+# Reads a tweet article's permalink, datetime and relative time text in one call
+TWEET_TIME_SCRIPT = """
+var time = arguments[0].querySelector('time');
+if (!time) { return null; }
+var link = time.closest('a[href*="/status/"]') || arguments[0].querySelector('a[href*="/status/"]');
+return {
+    href: link ? link.getAttribute('href') : null,
+    datetime: time.getAttribute('datetime'),
+    text: time.textContent
+};
+"""
+
+# Relative tweet times like "5s", "2m", "3 min", "1h", "30秒前"
+RELATIVE_TIME_PATTERN = re.compile(r"(\d+)\s*(s|sec|m|min|h|hr|秒|分钟|小时)")
 
 class TimeFunBuyer:
-    def __init__(self, use_existing_session=True):
+    # Per-step latency budgets (seconds) for the fast path
+    FAST_PATH_BUDGETS = {
+        "page_ready": 10,
+        "modal_ready": 5,
+        "currency_switched": 2,
+        "amount_applied": 5,
+        "confirm_dialog": 5,
+        "transaction_settled": 10,
+    }
+    
+    def __init__(self, use_existing_session=True, fast_path=None, driver=None):
         load_dotenv(dotenv_path=".env.utf8")
+        setup_logging()
         
         # Get TimeFun account information
         self.email = os.getenv('TIMEFUN_EMAIL')
@@ -35,15 +137,116 @@ class TimeFunBuyer:
             print("Please make sure your .env.utf8 file does not contain comments after values.")
             raise
         
+        # Site to buy on (point at a local stand-in for benchmarks)
+        self.base_url = os.getenv('TIMEFUN_BASE_URL', 'https://time.fun').strip().rstrip('/')
+        
         # Browser settings
         self.headless = os.getenv('HEADLESS', 'True').lower().strip() == 'true'
         self.use_existing_session = use_existing_session
         self.chrome_process = None
-        self.setup_browser()
+        
+        # Fast path: wait on readiness conditions instead of fixed sleeps
+        if fast_path is None:
+            fast_path = os.getenv('FAST_PATH', 'False').lower().strip() == 'true'
+        self.fast_path = fast_path
+        self.step_timings = {}
+        
+        # Delay profiles: typing mode, jitter between steps and readiness budgets
+        self.buy_profile = get_profile(os.getenv('BUY_PROFILE', 'balanced'))
+        self.login_profile = get_profile(os.getenv('LOGIN_PROFILE', 'stealth'), default="stealth")
+        
+        # Freshness window for tweets (seconds)
+        try:
+            self.max_tweet_age = float(os.getenv('TWEET_MAX_AGE', '60').strip())
+        except ValueError as e:
+            print(f"Error parsing TWEET_MAX_AGE: {e}")
+            print("Using default value of 60 seconds")
+            self.max_tweet_age = 60
+        self.last_tweet_age_ms = None
+        
+        # Per-stage latency spans from tweet to confirmation
+        self.tracer = LatencyTracer(os.getenv('LATENCY_TRACE_FILE', 'latency_trace.jsonl').strip())
+        self.owns_tracer = True
+        
+        # Debug screenshots and page sources, written in the background
+        try:
+            self.artifacts = DebugArtifacts(
+                directory=os.getenv('DEBUG_ARTIFACTS_DIR', 'debug_artifacts').strip(),
+                mode=os.getenv('DEBUG_ARTIFACTS', 'failure').lower().strip(),
+                max_bytes=int(float(os.getenv('DEBUG_ARTIFACTS_MAX_MB', '50').strip()) * 1024 * 1024),
+                max_age=float(os.getenv('DEBUG_ARTIFACTS_MAX_AGE_HOURS', '24').strip()) * 3600,
+            )
+        except ValueError as e:
+            print(f"Error parsing debug artifact settings: {e}")
+            print("Using defaults (failure mode, 50 MB, 24 hours)")
+            self.artifacts = DebugArtifacts()
+        self.owns_artifacts = True
+        
+        # Selector ranking learned from previous buys
+        self.selector_ranking = SelectorRanking(os.getenv('SELECTOR_STATS_FILE', 'selector_stats.json').strip())
+        self.owns_selector_ranking = True
+        self.selector_ranking.report()
+        
+        # Last-good DevTools port, tried first at startup
+        self.devtools_state = DevToolsState(os.getenv('DEVTOOLS_STATE_FILE', 'devtools_state.json').strip())
+        
+        # Use a given driver (e.g. the replay harness), otherwise connect to Chrome
+        if driver is not None:
+            self.attach_driver(driver)
+        else:
+            self.setup_browser()
+        
+        # Optional journal of timeline snapshots (see replay_harness.py)
+        self.journal = None
+        
+        # Pre-staged buy modals for expected targets (see armed_modal.py)
+        self.armed = None
+        
+        # Direct DevTools websocket for hot-path actions
+        self.cdp_lane_enabled = os.getenv('CDP_LANE', 'False').lower().strip() == 'true'
+        self.cdp = self.connect_cdp_lane() if self.cdp_lane_enabled else None
+        
+        # Pre-warmed time.fun tabs (disabled when TAB_POOL_SIZE is 0)
+        try:
+            tab_pool_size = int(os.getenv('TAB_POOL_SIZE', '0').strip())
+        except ValueError as e:
+            print(f"Error parsing TAB_POOL_SIZE: {e}")
+            print("Tab pool disabled")
+            tab_pool_size = 0
+        self.tab_pool = TabPool(self.driver, size=tab_pool_size, base_url=self.base_url) if tab_pool_size > 0 else None
+        
+        # Existence checks: HTTP with the browser as fallback, or browser only
+        self.user_check_mode = os.getenv('USER_CHECK_MODE', 'http').lower().strip()
+        self.user_checker = UserExistenceChecker(base_url=self.base_url, browser_fallback=self.check_user_exists_in_browser)
+        
+        # Speculative market page loads for extracted handles, doubling as the existence check
+        prefetch = os.getenv('SPECULATIVE_PREFETCH', 'False').lower().strip() == 'true'
+        self.prefetcher = MarketPrefetcher(self) if prefetch else None
+        
+        # Ranks the handles in a tweet so only the likely promoted creator is bought
+        self.handle_extractor = HandleExtractor()
         
         # Login status
         self.is_logged_in = False
     
+    def connect_cdp_lane(self):
+        """Open the CDP fast lane to the current tab, or return None if it isn't available"""
+        try:
+            return CDPLane.for_driver(self.driver)
+        except ImportError:
+            print("CDP fast lane needs the websocket-client package, using chromedriver only")
+        except Exception as e:
+            print(f"Could not open CDP fast lane, using chromedriver only: {e}")
+        return None
+    
+    def fast_lane(self):
+        """The CDP lane if it's attached to the tab Selenium is on, else None
+        
+        The lane tracks tab switches itself (see CDPLane.follow), so this
+        costs no round trip.
+        """
+        return self.cdp if self.cdp and self.cdp.selected else None
+    
     def find_chrome_debugging_port(self):
         """Find an available port for Chrome debugging"""
         # Find an available port
@@ -54,37 +257,24 @@ class TimeFunBuyer:
         return port
     
     def is_chrome_running_with_debugging(self):
-        """Check if Chrome is already running with remote debugging enabled"""
-        # Common debugging ports
-        common_ports = [9222, 9223, 9224, 9225, 9226, 9227, 9228, 9229, 9230]
+        """Check if Chrome is already running with remote debugging enabled
         
-        for port in common_ports:
-            try:
-                # Try to connect to the port
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                result = sock.connect_ex(('127.0.0.1', port))
-                sock.close()
-                
-                if result == 0:  # Port is open
-                    # Try to access the Chrome DevTools JSON API
-                    try:
-                        import requests
-                        response = requests.get(f"http://localhost:{port}/json/version", timeout=1)
-                        if response.status_code == 200 and "Chrome" in response.text:
-                            print(f"Found Chrome running with debugging on port {port}")
-                            return port
-                    except:
-                        pass
-            except:
-                pass
-        
-        return None
+        Tries the last-good port from the DevTools state file first, then
+        probes the common ports concurrently.
+        """
+        port = discover_devtools_port(self.devtools_state)
+        if port is not None:
+            print(f"Found Chrome running with debugging on port {port}")
+        return port
     
     def setup_browser(self):
         """Connect to an already running Chrome instance or start a new one"""
+        setup_started = time.monotonic()
+        self.startup_timings = {}
         if self.use_existing_session:
             # First check if Chrome is already running with debugging
             debug_port = self.is_chrome_running_with_debugging()
+            self.startup_timings["discovery"] = time.monotonic() - setup_started
             
             if debug_port is None:
                 print("No Chrome instance with debugging found. Starting Chrome...")
@@ -117,12 +307,12 @@ class TimeFunBuyer:
                 
                 # Wait for Chrome to start
                 print("Waiting for Chrome to start...")
-                time.sleep(5)
-                
-                # Try to find the debugging port again
-                debug_port = self.is_chrome_running_with_debugging()
-                if debug_port is None:
+                launched = time.monotonic()
+                if wait_for_devtools(9222) is None:
                     raise Exception("Failed to start Chrome with remote debugging")
+                debug_port = 9222
+                self.devtools_state.save(debug_port)
+                self.startup_timings["launch"] = time.monotonic() - launched
             
             try:
                 # Connect to the running Chrome instance
@@ -141,7 +331,7 @@ class TimeFunBuyer:
                 
                 # Initialize the driver
                 self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                self.wait = WebDriverWait(self.driver, 10)
+                self.attach_driver(self.driver)
                 print("Successfully connected to Chrome session")
             except Exception as e:
                 print(f"Failed to connect to Chrome session: {e}")
@@ -195,11 +385,30 @@ class TimeFunBuyer:
                 # Modify navigator properties to avoid detection
                 self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
                 
-                self.wait = WebDriverWait(self.driver, 10)
+                self.attach_driver(self.driver)
                 print("Browser setup successful")
             except Exception as e:
                 print(f"Failed to initialize browser: {e}")
                 raise
+        
+        self.startup_timings["total"] = time.monotonic() - setup_started
+        self.report_startup()
+    
+    def report_startup(self):
+        """Print how long it took to get a ready driver, and since the process started (imports included)"""
+        timings = self.startup_timings
+        connect = timings["total"] - timings.get("discovery", 0) - timings.get("launch", 0)
+        parts = [f"{step} {timings[step]:.2f}s" for step in ("discovery", "launch") if step in timings]
+        parts.append(f"connect {connect:.2f}s")
+        print(f"Driver ready in {timings['total']:.2f}s ({', '.join(parts)}), "
+              f"{time.time() - psutil.Process().create_time():.2f}s since process start")
+    
+    def attach_driver(self, driver):
+        """Use a WebDriver and build the helpers that wrap it"""
+        self.driver = driver
+        self.wait = WebDriverWait(self.driver, 10)
+        self.resolver = ElementResolver(self.driver)
+        self.timeline_extractor = TimelineExtractor(self.driver)
     
     def is_element_present(self, by, value):
         """Check if an element is present on the page"""
@@ -303,7 +512,7 @@ class TimeFunBuyer:
             self.driver.get("https://time.fun/login")
             
             # Add a small delay to simulate human behavior
-            time.sleep(random.uniform(1, 3))
+            self.login_profile.pause(2)
             
             # Check if we need to handle Cloudflare
             if not self.is_element_present(By.ID, "email"):
@@ -334,7 +543,7 @@ class TimeFunBuyer:
             self.human_like_typing(email_input, self.email)
             
             # Add a small delay before clicking the button
-            time.sleep(random.uniform(0.5, 1.5))
+            self.login_profile.pause()
             
             # Click "Send Code" button
             print("Clicking Send Code button...")
@@ -358,7 +567,7 @@ class TimeFunBuyer:
             self.human_like_typing(code_input, verification_code)
             
             # Add a small delay before clicking the button
-            time.sleep(random.uniform(0.5, 1.5))
+            self.login_profile.pause()
             
             # Click login button
             print("Clicking login button...")
@@ -376,282 +585,517 @@ class TimeFunBuyer:
             print(f"Login failed: {e}")
             return False
     
-    def human_like_typing(self, element, text):
-        """Type text into an element with random delays to simulate human typing"""
-        for character in text:
-            element.send_keys(character)
-            time.sleep(random.uniform(0.05, 0.2))  # Random delay between keystrokes
+    def human_like_typing(self, element, text, profile=None):
+        """Type text into an element, paced by a delay profile
+        
+        "per_key" sends one keystroke at a time and "chunked" a few characters
+        per send_keys, pausing between them. "js" sets the value in one call
+        (through the CDP lane when it's attached) so the page sees a single
+        input event.
+        
+        Args:
+            element: Input element (already cleared)
+            text: Text to enter
+            profile: DelayProfile to use (default: the login profile)
+        """
+        profile = profile or self.login_profile
+        lane = self.fast_lane() if profile.typing == "js" else None
+        if lane:
+            element.click()
+            lane.insert_text(text)
+            return
+        if profile.typing == "js":
+            self.driver.execute_script(SET_VALUE_SCRIPT, element, text)
+            return
+        
+        size = max(1, profile.chunk_size) if profile.typing == "chunked" else 1
+        for start in range(0, len(text), size):
+            element.send_keys(text[start:start + size])
+            profile.key_pause()  # Random delay between keystrokes
     
-    def find_and_click_element(self, xpaths, description, timeout=10):
-        """Find an element using multiple XPaths and click it"""
-        print(f"Looking for {description}...")
+    def find_and_click_element(self, xpaths, description, timeout=10, step=None, fallbacks=()):
+        """Find an element using multiple XPaths and click it
         
-        for xpath in xpaths:
-            print(f"Trying XPath: {xpath}")
-            try:
-                # Use a shorter timeout for each attempt
-                element = WebDriverWait(self.driver, timeout/len(xpaths)).until(
-                    EC.element_to_be_clickable((By.XPATH, xpath))
-                )
-                print(f"Found {description} with XPath: {xpath}")
-                element.click()
-                print(f"Clicked {description}")
-                return True
-            except Exception as e:
-                print(f"Failed to find/click with XPath {xpath}: {e}")
+        All XPaths are resolved in the page in a single round trip; the first
+        one (in priority order) with a visible, enabled match wins. Generic
+        fallback XPaths are only tried once the specific ones had most of the
+        timeout to match. If a step name is given, the specific XPaths are
+        re-ranked by past wins and the match is proposed to the ranking; the
+        caller confirms it once the next step is ready.
+        """
+        logger.debug("Looking for %s...", description, extra={"stage": step})
+        
+        if step:
+            xpaths = self.selector_ranking.rank(step, xpaths)
+        element, index = self.resolver.resolve(xpaths, timeout=timeout, clickable=True, fallbacks=fallbacks)
+        if step:
+            # Counted as a win once the step's readiness check confirms it (see stage_purchase)
+            self.selector_ranking.propose(step, xpaths, index)
+        if element is None:
+            logger.warning("Could not find %s with any of the provided XPaths", description, extra={"stage": step})
+            return False
         
-        print(f"Could not find {description} with any of the provided XPaths")
-        return False
+        tried = list(xpaths) + list(fallbacks)
+        logger.debug("Found %s with XPath: %s", description, tried[index], extra={"stage": step})
+        try:
+            self.click_match(element)
+        except Exception as e:
+            logger.warning("Failed to click %s: %s", description, e, extra={"stage": step})
+            return False
+        logger.debug("Clicked %s", description, extra={"stage": step})
+        return True
     
-    def find_input_element(self, selectors, description, timeout=10):
-        """Find an input element using multiple selectors"""
-        print(f"Looking for {description}...")
+    def click_match(self, element):
+        """Click an element the resolver just matched, over the CDP lane when it's attached
         
-        for selector_type, selector_value in selectors:
-            print(f"Trying selector: {selector_type} = {selector_value}")
-            try:
-                # Use a shorter timeout for each attempt
-                element = WebDriverWait(self.driver, timeout/len(selectors)).until(
-                    EC.presence_of_element_located((selector_type, selector_value))
-                )
-                print(f"Found {description} with selector: {selector_type} = {selector_value}")
-                return element
-            except Exception as e:
-                print(f"Failed to find with selector {selector_type} = {selector_value}: {e}")
+        The resolver leaves its match in the page, so the lane clicks it with
+        no chromedriver round trip at all; Selenium clicks it otherwise.
+        """
+        lane = self.fast_lane()
+        if lane and lane.click_element(LAST_MATCH):
+            return
+        element.click()
+    
+    def find_input_element(self, selectors, description, timeout=10, step=None):
+        """Find an input element using multiple selectors (resolved in a single round trip)"""
+        logger.debug("Looking for %s...", description, extra={"stage": step})
         
-        print(f"Could not find {description} with any of the provided selectors")
-        return None
+        if step:
+            selectors = self.selector_ranking.rank(step, selectors)
+        element, index = self.resolver.resolve(selectors, timeout=timeout)
+        if step:
+            self.selector_ranking.propose(step, selectors, index)
+        if element is None:
+            logger.warning("Could not find %s with any of the provided selectors", description, extra={"stage": step})
+            return None
+        
+        selector_type, selector_value = selectors[index]
+        logger.debug("Found %s with selector: %s = %s", description, selector_type, selector_value, extra={"stage": step})
+        return element
+    
+    def find_button_by_text(self, fragments, description, timeout=5):
+        """Find a clickable button whose text contains every fragment (single round trip)"""
+        logger.debug("Looking for %s...", description)
+        
+        element, _ = self.resolver.resolve([(BY_TEXT, fragments)], timeout=timeout, clickable=True)
+        if element is None:
+            logger.warning("Could not find %s", description)
+        return element
+    
+    def wait_until(self, condition, step, budget=None):
+        """Wait for a readiness condition within the step's latency budget
+        
+        Args:
+            condition: Callable taking the driver, returning a truthy value when ready
+            step: Name of the step (key in FAST_PATH_BUDGETS)
+            budget: Seconds to wait (default: the step's budget)
+        
+        Returns:
+            The condition's result, or None if the budget ran out
+        """
+        if budget is None:
+            budget = self.FAST_PATH_BUDGETS.get(step, 10)
+        
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, budget, poll_frequency=0.05).until(condition)
+        except TimeoutException:
+            result = None
+        elapsed = time.monotonic() - start
+        self.step_timings[step] = elapsed
+        
+        if result is None:
+            logger.warning("Step not ready within %ss budget", budget, extra={"stage": step, "elapsed_ms": elapsed * 1000})
+        else:
+            logger.debug("Step ready", extra={"stage": step, "elapsed_ms": elapsed * 1000})
+        return result
+    
+    def wait_for_dom_quiet(self, step, quiet_ms=250, budget=None):
+        """Wait until the page stops mutating, using an injected MutationObserver
+        
+        Returns:
+            bool: True if the DOM went quiet within the budget, False otherwise
+        """
+        if budget is None:
+            budget = self.FAST_PATH_BUDGETS.get(step, 10)
+        
+        start = time.monotonic()
+        try:
+            self.driver.set_script_timeout(budget + 1)
+            result = self.driver.execute_async_script(DOM_QUIET_SCRIPT, quiet_ms, int(budget * 1000))
+        except Exception as e:
+            logger.warning("Error waiting for DOM quiescence: %s", e, extra={"stage": step})
+            result = -1
+        elapsed = time.monotonic() - start
+        self.step_timings[step] = elapsed
+        
+        if result is None or result < 0:
+            logger.warning("DOM still changing after %ss budget", budget, extra={"stage": step, "elapsed_ms": elapsed * 1000})
+            return False
+        logger.debug("DOM quiet", extra={"stage": step, "elapsed_ms": elapsed * 1000})
+        return True
+    
+    def settle(self, step, condition=None, fallback_sleep=0, quiet_ms=250, profile=None):
+        """Wait for a buy step to be ready
+        
+        In fast path mode, waits on the given readiness condition (or DOM
+        quiescence if no condition is given) within the step's budget, scaled
+        by the profile's wait_scale. Otherwise falls back to the fixed sleep.
+        Either way the profile's inter-step jitter follows, in fast path mode
+        too (none with "snipe", up to 50 ms per step with "balanced").
+        
+        Args:
+            profile: DelayProfile to pace the step with (default: the buy profile)
+        
+        Returns:
+            The condition's result in fast path mode, True otherwise
+        """
+        profile = profile or self.buy_profile
+        if not self.fast_path:
+            time.sleep(fallback_sleep)
+            profile.pause()
+            return True
+        
+        budget = self.FAST_PATH_BUDGETS.get(step, 10) * profile.wait_scale
+        if condition is None:
+            result = self.wait_for_dom_quiet(step, quiet_ms=quiet_ms, budget=budget)
+        else:
+            result = self.wait_until(condition, step, budget=budget)
+        profile.pause()
+        return result
+    
+    def confirm_selector(self, step, condition, settled=None):
+        """Confirm the selector proposed for a step by the next step's readiness
+        
+        A truthy fast-path settle result confirms it as is. Otherwise (slow
+        mode, where settle only slept, or a fast-path timeout) the condition
+        is evaluated once now. If it can't be evaluated the proposal is
+        dropped rather than counted either way.
+        
+        Args:
+            step: Buy step whose selector was proposed (e.g. "buy_button")
+            condition: Readiness condition of the step that follows it
+            settled: What settle() returned for that condition
+        """
+        if self.fast_path and settled:
+            self.selector_ranking.confirm(step, True)
+            return
+        try:
+            ready = condition(self.driver)
+        except (NoSuchElementException, StaleElementReferenceException):
+            ready = False
+        except Exception as e:
+            logger.debug("Could not check readiness, leaving the selector unranked: %s", e, extra={"stage": step})
+            self.selector_ranking.discard(step)
+            return
+        self.selector_ranking.confirm(step, bool(ready))
     
     def buy_user(self, username):
         """Buy a specific user on TimeFun"""
         if not self.is_logged_in and not self.login():
-            print("Not logged in, cannot perform buy operation")
+            logger.error("Not logged in, cannot perform buy operation")
             return False
         
+        self.step_timings = {}
+        started = time.monotonic()
         try:
-            # Check for locally saved page
-            local_path = os.path.join(os.getcwd(), f"{username}.html")
-            if os.path.exists(local_path):
-                print(f"Opening local page: {local_path}")
-                self.driver.get(f"file:///{local_path}")
-            else:
-                # Visit online page
-                user_market_url = f"https://time.fun/{username}?tab=market"
-                print(f"Visiting user market page: {user_market_url}")
-                self.driver.get(user_market_url)
-            
-            # Wait for page load
-            time.sleep(random.uniform(2, 4))
-            
-            # Print debug info
-            print(f"Current URL: {self.driver.current_url}")
-            print(f"Page title: {self.driver.title}")
-            
-            # Save page screenshot
-            screenshot_path = f"debug_screenshot_{username}_before.png"
-            self.driver.save_screenshot(screenshot_path)
-            print(f"Screenshot saved: {screenshot_path}")
-            
-            # Find Buy button (using more general selectors)
-            buy_button_xpaths = [
-                # Most specific selectors
-                "//button[contains(@class, 'inline-flex') and contains(@class, 'bg-controls-primary')]",
-                "//button[contains(@class, 'bg-controls-primary')]",
-                "//button[contains(@class, 'text-primary-100')]",
-                # Class-based selectors
-                "//button[contains(@class, 'primary')]",
-                "//button[contains(@class, 'buy')]",
-                # Text-based selectors
-                "//button[text()='Buy']",
-                "//button[contains(text(), 'Buy')]",
-                # General button selectors
-                "//button[contains(@class, 'rounded')]",
-                "//div[contains(@class, 'market')]//button",
-                # Most general selectors
-                "//button"
-            ]
-            
-            if not self.find_and_click_element(buy_button_xpaths, "Buy button"):
-                print("Saving page source and screenshot for debugging...")
-                page_source = self.driver.page_source
-                with open(f"debug_page_source_{username}.html", "w", encoding="utf-8") as f:
-                    f.write(page_source)
-                print("Page source saved. Analyzing buttons on page...")
-                
-                # Print all buttons for debugging
-                try:
-                    buttons = self.driver.find_elements(By.TAG_NAME, "button")
-                    print(f"Found {len(buttons)} buttons on page:")
-                    for i, button in enumerate(buttons):
-                        try:
-                            print(f"Button {i+1}:")
-                            print(f"Text: {button.text}")
-                            print(f"Class: {button.get_attribute('class')}")
-                            print(f"Type: {button.get_attribute('type')}")
-                            print("---")
-                        except:
-                            pass
-                except Exception as e:
-                    print(f"Error analyzing buttons: {e}")
-                
-                print("Buy button not found after trying all selectors")
-                return False
-            
-            # Wait for buy modal
-            print("Waiting for buy modal to appear...")
-            time.sleep(2)
-            
-            # Save modal screenshot
-            screenshot_path = f"debug_screenshot_{username}_after_buy_click.png"
-            self.driver.save_screenshot(screenshot_path)
-            print(f"Modal screenshot saved: {screenshot_path}")
-            
-            # Try to switch to USD
-            currency_switch_xpaths = [
-                "//button[contains(text(), 'USD')]",
-                "//button[contains(@class, 'currency-switch') and contains(text(), 'USD')]",
-                "//div[contains(@class, 'modal')]//button[contains(text(), 'USD')]",
-                "//div[contains(@class, 'modal')]//div[contains(@class, 'switch')]//button[last()]"
-            ]
-            
-            print("Attempting to switch to USD...")
-            self.find_and_click_element(currency_switch_xpaths, "USD switch button")
-            time.sleep(1)  # Wait for switch to complete
-            
-            # Find amount input field
-            amount_input_selectors = [
-                (By.XPATH, "//div[contains(@class, 'modal')]//input[@type='number']"),
-                (By.XPATH, "//input[@type='number']"),
-                (By.XPATH, "//div[contains(@class, 'modal')]//input[contains(@class, 'amount')]"),
-                (By.XPATH, "//div[contains(@class, 'modal')]//input"),
-                (By.CSS_SELECTOR, "div.modal input[type='number']"),
-                (By.CSS_SELECTOR, "input.amount"),
-                (By.CSS_SELECTOR, "div.modal input")
-            ]
-            
-            amount_input = self.find_input_element(amount_input_selectors, "amount input field")
-            
-            if not amount_input:
-                print("Amount input field not found")
+            if not self.stage_purchase(username):
                 return False
-            
-            # Enter buy amount
-            print(f"Entering buy amount: {self.buy_amount} USDC")
-            amount_input.clear()
-            self.human_like_typing(amount_input, str(self.buy_amount))
-            
-            # Wait for input completion and button update
-            print("Waiting for button to update with amount...")
-            time.sleep(3)  # Wait longer for button text to update
-            
-            # Find first Buy button with amount
-            print("Looking for initial Buy button...")
-            try:
-                buttons = self.driver.find_elements(By.TAG_NAME, "button")
-                target_button = None
-                print("Analyzing all buttons:")
-                for button in buttons:
-                    try:
-                        text = button.text
-                        print(f"Button text: {text}")
-                        # Look for button that contains both "Buy" and "mins for $"
-                        if "Buy" in text and "mins for $" in text:
-                            target_button = button
-                            print(f"Found matching button: {text}")
-                            break
-                    except:
-                        continue
-                
-                if target_button:
-                    print(f"Clicking initial Buy button with text: {target_button.text}")
-                    target_button.click()
-                    
-                    # Wait for confirmation dialog
-                    print("Waiting for confirmation dialog...")
-                    time.sleep(2)
-                    
-                    # Look for Confirm & Buy button
-                    print("Looking for Confirm & Buy button...")
-                    buttons = self.driver.find_elements(By.TAG_NAME, "button")
-                    confirm_button = None
-                    for button in buttons:
-                        try:
-                            text = button.text
-                            print(f"Confirm button text: {text}")
-                            # Look for button that contains "Confirm & Buy" and "mins for $"
-                            if "Confirm" in text and "Buy" in text and "mins for $" in text:
-                                confirm_button = button
-                                print(f"Found confirm button: {text}")
-                                break
-                        except:
-                            continue
-                    
-                    if confirm_button:
-                        print(f"Clicking final Confirm & Buy button: {confirm_button.text}")
-                        confirm_button.click()
-                    else:
-                        print("Could not find Confirm & Buy button")
-                        screenshot_path = f"debug_screenshot_{username}_no_confirm.png"
-                        self.driver.save_screenshot(screenshot_path)
-                        print(f"Debug screenshot saved: {screenshot_path}")
-                        return False
-                else:
-                    print("Could not find initial Buy button")
-                    screenshot_path = f"debug_screenshot_{username}_no_button.png"
-                    self.driver.save_screenshot(screenshot_path)
-                    print(f"Debug screenshot saved: {screenshot_path}")
-                    return False
-                
-            except Exception as e:
-                print(f"Error during buy process: {e}")
+            if not self.complete_purchase(username):
                 return False
             
-            # Wait for transaction
-            print("Waiting for transaction to complete...")
-            time.sleep(5)
-            
-            # Save final screenshot
-            screenshot_path = f"debug_screenshot_{username}_final.png"
-            self.driver.save_screenshot(screenshot_path)
-            print(f"Final screenshot saved: {screenshot_path}")
-            
-            print(f"Successfully bought {username}'s time coin!")
+            logger.info("Successfully bought %s's time coin!", username, extra={"elapsed_ms": (time.monotonic() - started) * 1000})
             return True
             
         except Exception as e:
-            print(f"Error during purchase: {e}")
+            logger.error("Error during purchase: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             try:
-                screenshot_path = f"error_screenshot_{username}.png"
-                self.driver.save_screenshot(screenshot_path)
-                print(f"Error screenshot saved: {screenshot_path}")
-            except:
+                self.artifacts.failure(self.driver, "error", key=username)
+            except Exception:
                 pass
             return False
     
-    def buy_with_retry(self, username):
-        """Try to buy multiple times until success or max attempts reached"""
-        # First check if user exists on time.fun
-        if not self.check_user_exists(username):
-            print(f"Cannot buy {username} as they don't exist on time.fun")
+    def stage_purchase(self, username, use_tab_pool=True):
+        """Open the market page and the buy modal, switch to USD and enter the amount
+        
+        This is everything before the final two clicks (see complete_purchase),
+        so it can also be done ahead of time (see armed_modal.py).
+        
+        Args:
+            username: time.fun username to buy
+            use_tab_pool: Route a pre-warmed pool tab to the market page (default: True)
+        
+        Returns:
+            bool: True once the amount is entered and applied
+        """
+        # Check for locally saved page
+        local_path = os.path.join(os.getcwd(), f"{username}.html")
+        if self.prefetcher and self.prefetcher.claim(username):
+            # The market page has been loading since the handle was extracted
+            logger.info("Using prefetched market page for %s", username)
+        elif os.path.exists(local_path):
+            logger.info("Opening local page: %s", local_path)
+            self.driver.get(f"file:///{local_path}")
+        elif use_tab_pool and self.tab_pool:
+            # Route a pre-warmed tab to the market page
+            route = f"/{username}?tab=market"
+            method = self.tab_pool.open_route(route)
+            logger.info("Opened user market page %s in warm tab (%s)", route, method)
+        else:
+            # Visit online page
+            user_market_url = f"{self.base_url}/{username}?tab=market"
+            logger.info("Visiting user market page: %s", user_market_url)
+            lane = self.fast_lane()
+            if lane:
+                # Returns once the new document is committed; page_ready below waits for it to render
+                try:
+                    lane.navigate(user_market_url)
+                except CDPTimeout as e:
+                    # The navigation is under way, just slow to commit: page_ready waits for it
+                    logger.warning("Market page navigation not committed yet (%s), waiting for the page", e)
+            else:
+                self.driver.get(user_market_url)
+        
+        # Wait for page load
+        self.settle(
+            "page_ready",
+            lambda d: d.execute_script(
+                "return document.readyState === 'complete' && document.querySelector('button') !== null"
+            ),
+            fallback_sleep=3
+        )
+        self.tracer.mark("market_page_ready")
+        
+        # Print debug info (two round trips, so only when asked for)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Current URL: %s, page title: %s", self.driver.current_url, self.driver.title)
+        
+        self.artifacts.checkpoint(self.driver, "before", key=username)
+        
+        # Find Buy button (using more general selectors)
+        buy_button_xpaths = [
+            # Most specific selectors
+            "//button[contains(@class, 'inline-flex') and contains(@class, 'bg-controls-primary')]",
+            "//button[contains(@class, 'bg-controls-primary')]",
+            "//button[contains(@class, 'text-primary-100')]",
+            # Class-based selectors
+            "//button[contains(@class, 'primary')]",
+            "//button[contains(@class, 'buy')]",
+            # Text-based selectors
+            "//button[text()='Buy']",
+            "//button[contains(text(), 'Buy')]"
+        ]
+        # General button selectors, only tried when no specific one matched for a while:
+        # on a page that is still rendering they would match some other button first
+        buy_button_fallbacks = [
+            "//button[contains(@class, 'rounded')]",
+            "//div[contains(@class, 'market')]//button"
+        ]
+        
+        if not self.find_and_click_element(buy_button_xpaths, "Buy button", step="buy_button",
+                                           fallbacks=buy_button_fallbacks):
+            logger.warning("Buy button not found after trying all selectors, saving debug artifacts")
+            page = self.artifacts.failure(self.driver, "no_buy_button", key=username)
+            
+            # Print all buttons for debugging (from the failure summary, one round trip)
+            if logger.isEnabledFor(logging.DEBUG):
+                buttons = page.get("buttons", [])
+                logger.debug("Found %d buttons on page", len(buttons))
+                for i, button in enumerate(buttons):
+                    logger.debug("Button %d: text=%r class=%r type=%r", i + 1, button["text"], button["cls"], button["type"])
             return False
+        
+        # Wait for buy modal
+        logger.debug("Waiting for buy modal to appear...")
+        modal_ready = EC.presence_of_element_located((By.XPATH, "//input[@type='number'] | //div[contains(@class, 'modal')]//input"))
+        modal = self.settle("modal_ready", modal_ready, fallback_sleep=2)
+        self.confirm_selector("buy_button", modal_ready, modal)
+        self.tracer.mark("modal_ready")
+        
+        self.artifacts.checkpoint(self.driver, "after_buy_click", key=username)
+        
+        # Try to switch to USD
+        currency_switch_xpaths = [
+            "//button[contains(text(), 'USD')]",
+            "//button[contains(@class, 'currency-switch') and contains(text(), 'USD')]",
+            "//div[contains(@class, 'modal')]//button[contains(text(), 'USD')]",
+            "//div[contains(@class, 'modal')]//div[contains(@class, 'switch')]//button[last()]"
+        ]
+        
+        logger.debug("Attempting to switch to USD...")
+        self.find_and_click_element(currency_switch_xpaths, "USD switch button", step="currency_switch")
+        if self.driver.execute_script(CURRENCY_STATE_SCRIPT) == "unknown":
+            # Nothing on the page says which currency is active: wait for the switch to render, rank nothing
+            self.settle("currency_switched", fallback_sleep=1)
+            self.selector_ranking.discard("currency_switch")
+        else:
+            usd_active = lambda d: d.execute_script(CURRENCY_STATE_SCRIPT) == "USD"
+            switched = self.settle("currency_switched", usd_active, fallback_sleep=1)
+            self.confirm_selector("currency_switch", usd_active, switched)
+        
+        # Find amount input field
+        amount_input_selectors = [
+            (By.XPATH, "//div[contains(@class, 'modal')]//input[@type='number']"),
+            (By.XPATH, "//input[@type='number']"),
+            (By.XPATH, "//div[contains(@class, 'modal')]//input[contains(@class, 'amount')]"),
+            (By.XPATH, "//div[contains(@class, 'modal')]//input"),
+            (By.CSS_SELECTOR, "div.modal input[type='number']"),
+            (By.CSS_SELECTOR, "input.amount"),
+            (By.CSS_SELECTOR, "div.modal input")
+        ]
+        
+        amount_input = self.find_input_element(amount_input_selectors, "amount input field", step="amount_input")
+        
+        if not amount_input:
+            logger.warning("Amount input field not found")
+            return False
+        
+        # Enter buy amount
+        logger.debug("Entering buy amount: %s USDC", self.buy_amount)
+        amount_input.clear()
+        self.human_like_typing(amount_input, str(self.buy_amount), self.buy_profile)
+        self.tracer.mark("amount_entered")
+        
+        # Wait for input completion and button update
+        logger.debug("Waiting for button to update with amount...")
+        amount_applied = EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Buy') and contains(., 'mins for $')]"))
+        applied = self.settle("amount_applied", amount_applied, fallback_sleep=3)  # Wait longer for button text to update
+        self.confirm_selector("amount_input", amount_applied, applied)
+        return True
+    
+    def complete_purchase(self, username):
+        """Click "Buy ... mins for $" and "Confirm & Buy" in a staged modal, then wait for the transaction
+        
+        Returns:
+            bool: True if the transaction was confirmed
+        """
+        # Find first Buy button with amount
+        try:
+            # Look for button that contains both "Buy" and "mins for $"
+            target_button = self.find_button_by_text(["Buy", "mins for $"], "initial Buy button")
             
-        for attempt in range(1, self.max_buy_attempts + 1):
-            print(f"Attempting to buy {username} (Attempt {attempt}/{self.max_buy_attempts})")
-            
-            if self.buy_user(username):
-                return True
+            if target_button:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Clicking initial Buy button with text: %s", target_button.text)
+                self.click_match(target_button)
+                
+                # Wait for confirmation dialog
+                logger.debug("Waiting for confirmation dialog...")
+                self.settle(
+                    "confirm_dialog",
+                    EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Confirm') and contains(., 'mins for $')]")),
+                    fallback_sleep=2
+                )
+                
+                # Look for button that contains "Confirm & Buy" and "mins for $"
+                confirm_button = self.find_button_by_text(["Confirm", "Buy", "mins for $"], "Confirm & Buy button")
+                
+                if confirm_button:
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Clicking final Confirm & Buy button: %s", confirm_button.text)
+                    self.click_match(confirm_button)
+                    self.tracer.mark("confirm_clicked")
+                else:
+                    logger.warning("Could not find Confirm & Buy button")
+                    self.artifacts.failure(self.driver, "no_confirm", key=username)
+                    return False
+            else:
+                logger.warning("Could not find initial Buy button")
+                self.artifacts.failure(self.driver, "no_button", key=username)
+                return False
+        
+        except Exception as e:
+            logger.error("Error during buy process: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return False
+        
+        # Wait for transaction
+        logger.debug("Waiting for transaction to complete...")
+        self.settle(
+            "transaction_settled",
+            EC.invisibility_of_element_located((By.XPATH, "//button[contains(., 'Confirm') and contains(., 'mins for $')]")),
+            fallback_sleep=5
+        )
+        self.tracer.mark("confirmation_observed")
+        
+        self.artifacts.checkpoint(self.driver, "final", key=username)
+        return True
+    
+    def buy_with_retry(self, username, trace=None):
+        """Try to buy multiple times until success or max attempts reached
+        
+        Args:
+            username: time.fun username to buy
+            trace: Latency trace to mark and finish (default: the current trace, left open)
+        """
+        if trace is not None:
+            with self.tracer.activate(trace):
+                success = self.buy_with_retry(username)
+            trace.finish("bought" if success else "failed")
+            return success
+        
+        with log_context(username=username):
+            # A pre-staged modal only needs the final two clicks
+            if self.armed and self.armed.is_armed(username):
+                if self.armed.fire(username):
+                    return True
+                logger.warning("Armed purchase for %s failed, falling back to a full buy", username)
             
-            # If failed and still have attempts, wait a bit before retrying
-            if attempt < self.max_buy_attempts:
-                wait_time = self.buy_delay * 2
-                print(f"Buy failed, retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-        
-        print(f"Max attempts reached, giving up on buying {username}")
-        return False
+            try:
+                # First check if user exists on time.fun
+                if not self.check_user_exists(username):
+                    logger.warning("Cannot buy %s as they don't exist on time.fun", username)
+                    return False
+                
+                for attempt in range(1, self.max_buy_attempts + 1):
+                    logger.info("Attempting to buy %s (Attempt %d/%d)", username, attempt, self.max_buy_attempts)
+                    
+                    # Only the final attempt's stages count
+                    trace = self.tracer.current()
+                    if trace is not None:
+                        trace.rewind("existence_checked")
+                        trace.attrs["attempts"] = attempt
+                    success = self.buy_user(username)
+                    self.selector_ranking.save()
+                    if self.tab_pool:
+                        self.tab_pool.release()
+                    if success:
+                        return True
+                    
+                    # If failed and still have attempts, wait a bit before retrying
+                    if attempt < self.max_buy_attempts:
+                        wait_time = self.buy_delay * 2
+                        logger.warning("Buy failed, retrying in %s seconds...", wait_time)
+                        time.sleep(wait_time)
+                
+                logger.error("Max attempts reached, giving up on buying %s", username)
+                return False
+            finally:
+                if self.prefetcher:
+                    # Close the prefetched tab, whatever happened in it
+                    self.prefetcher.release(username)
     
     def close(self):
         """Close browser"""
+        if self.owns_tracer:
+            self.tracer.close()
+        if self.owns_artifacts:
+            self.artifacts.close()
+        if self.armed:
+            self.armed.report()
+            self.armed.close()
+        if self.prefetcher:
+            self.prefetcher.clear()
+        self.user_checker.close()
+        if self.owns_selector_ranking:
+            self.selector_ranking.save()
+            self.selector_ranking.report()
+        
+        if getattr(self, 'tab_pool', None):
+            self.tab_pool.close()
+        
+        if getattr(self, 'cdp', None):
+            self.cdp.close()
+        
         if hasattr(self, 'driver'):
             # Don't quit the driver, just close the current window
             # This keeps the Chrome instance running
@@ -675,31 +1119,48 @@ class TimeFunBuyer:
     def check_user_exists(self, username):
         """Check if a user exists on time.fun platform
         
+        Uses the speculative market page load when the handle was prefetched,
+        otherwise a cached HTTP probe unless USER_CHECK_MODE is "browser"; the
+        browser check is the fallback when the HTTP answer is inconclusive.
+        
         Args:
             username: Username to check
             
         Returns:
             bool: True if user exists, False otherwise
         """
+        exists = None
+        if self.prefetcher and self.prefetcher.has(username):
+            # Inferred from the speculative market page load, no separate navigation
+            exists = self.prefetcher.resolve(username, timeout=self.FAST_PATH_BUDGETS["page_ready"] * self.buy_profile.wait_scale)
+        if exists is None and self.user_check_mode == 'browser':
+            exists = self.check_user_exists_in_browser(username)
+        elif exists is None:
+            exists = self.user_checker.check(username)
+        self.tracer.mark("existence_checked")
+        return exists
+    
+    def check_user_exists_in_browser(self, username):
+        """Check if a user exists on time.fun by visiting their page in the browser"""
         try:
-            print(f"Checking if user '{username}' exists on time.fun...")
+            logger.debug("Checking if user '%s' exists on time.fun...", username)
             # Visit user page
-            user_url = f"https://time.fun/{username}"
+            user_url = f"{self.base_url}/{username}"
             self.driver.get(user_url)
             time.sleep(3)  # Wait for page to load or redirect
             
             # Check current URL
             current_url = self.driver.current_url
-            print(f"Current URL after check: {current_url}")
+            logger.debug("Current URL after check: %s", current_url)
             
             # If redirected to explore page, user doesn't exist
-            if "explore" in current_url or current_url == "https://time.fun/":
-                print(f"User '{username}' does not exist on time.fun")
+            if "explore" in current_url or current_url == f"{self.base_url}/":
+                logger.info("User '%s' does not exist on time.fun", username)
                 return False
                 
             # Check if we're on the user's page
             if username.lower() in current_url.lower():
-                print(f"User '{username}' exists on time.fun")
+                logger.info("User '%s' exists on time.fun", username)
                 return True
                 
             # Additional check for page content
@@ -708,90 +1169,159 @@ class TimeFunBuyer:
                 if self.is_element_present(By.XPATH, f"//h1[contains(text(), '{username}')]") or \
                    self.is_element_present(By.XPATH, "//button[contains(text(), 'Buy Time')]") or \
                    self.is_element_present(By.XPATH, "//div[contains(@class, 'profile')]"):
-                    print(f"User '{username}' exists on time.fun (verified by page content)")
+                    logger.info("User '%s' exists on time.fun (verified by page content)", username)
                     return True
             except:
                 pass
                 
             # Default to false if unsure
-            print(f"Cannot verify if user '{username}' exists on time.fun")
+            logger.warning("Cannot verify if user '%s' exists on time.fun", username)
             return False
             
         except Exception as e:
-            print(f"Error checking if user exists: {e}")
+            logger.error("Error checking if user exists: %s", e)
             return False
     
-    def extract_tweet_time(self, tweet, timezone_offset=8):
+    def extract_tweet_time(self, tweet, timezone_offset=8, max_age=None, tweet_id=None):
         """Extract the timestamp from a tweet and determine if it's recent
         
+        The creation time is decoded from the tweet's snowflake ID (given
+        directly, from a tweepy object, or from the status link in the
+        article) without extra browser round trips. The <time> element's
+        datetime and relative text are only used as a fallback.
+        
         Args:
-            tweet: The tweet element
+            tweet: The tweet element, timeline record dict, or tweepy tweet
             timezone_offset: Hours offset from UTC (default: 8 for Beijing time)
+            max_age: Freshness window in seconds (default: TWEET_MAX_AGE env, 60)
+            tweet_id: Status ID if already known (default: None)
             
         Returns:
-            bool: True if the tweet is from the last minute, False otherwise
+            bool: True if the tweet is within the freshness window, False otherwise
         """
+        if max_age is None:
+            max_age = self.max_tweet_age
+        self.last_tweet_age_ms = None
+        trace = self.tracer.current()
+        if trace is not None:
+            trace.mark("detected")
+        
         try:
-            # Look for time element
-            time_element = tweet.find_element(By.CSS_SELECTOR, "time")
-            
-            # Get the timestamp attribute
-            timestamp = time_element.get_attribute("datetime")
-            if timestamp:
+            timestamp = None
+            relative_time = ""
+            if isinstance(tweet, dict):
+                # Records from TimelineExtractor already hold everything
+                tweet_id = tweet_id or tweet.get("id")
+                timestamp = tweet.get("datetime")
+                relative_time = (tweet.get("time_text") or "").lower()
+            elif tweet_id is None and not isinstance(tweet, WebElement):
+                # Tweepy objects carry their ID
+                tweet_id = getattr(tweet, 'id', None)
+            elif tweet_id is None:
+                # One round trip for the permalink, datetime and relative text
+                info = self.driver.execute_script(TWEET_TIME_SCRIPT, tweet) or {}
+                tweet_id = status_id_from_url(info.get("href"))
+                timestamp = info.get("datetime")
+                relative_time = (info.get("text") or "").lower()
+            
+            current_time_utc = datetime.now(timezone.utc)
+            tweet_time = snowflake_to_datetime(tweet_id)
+            if tweet_time is None and timestamp:
                 # Convert to datetime
                 tweet_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                
-                # Get current time in UTC
-                current_time_utc = datetime.now(timezone.utc)
-                
-                # Calculate time difference in seconds (both in UTC for accurate comparison)
-                time_diff = (current_time_utc - tweet_time).total_seconds()
+            
+            if tweet_time is not None:
+                # Calculate time difference (both in UTC for accurate comparison)
+                age_ms = (current_time_utc - tweet_time).total_seconds() * 1000
+                self.last_tweet_age_ms = age_ms
+                if trace is not None:
+                    trace.mark_wall("tweet_created", tweet_time.timestamp())
                 
                 # Format times for logging, converting to local time for better readability
                 local_tweet_time = tweet_time + timedelta(hours=timezone_offset)
                 local_current_time = current_time_utc + timedelta(hours=timezone_offset)
                 
-                print(f"Tweet timestamp: {local_tweet_time} (beijing), Current time: {local_current_time} (beijing)")
-                print(f"Time difference: {time_diff:.0f} seconds ago")
+                logger.debug("Tweet timestamp: %s (UTC+%s), Current time: %s (UTC+%s)",
+                             local_tweet_time, timezone_offset, local_current_time, timezone_offset)
+                logger.debug("Time difference: %.3f seconds ago", age_ms / 1000, extra={"tweet_id": tweet_id})
                 
-                # Check if it's within the last minute (60 seconds)
                 # This calculation is timezone-independent because we're comparing UTC timestamps
-                return time_diff <= 60
-            
-            # If no timestamp attribute, check the text
-            relative_time = time_element.text.lower()
-            print(f"Tweet relative time: {relative_time}")
-            
-            # Check common recent time indicators
-            recent_indicators = ["just now", "now", "1s", "2s", "3s", "4s", "5s", "6s", "7s", "8s", "9s", 
-                                "10s", "20s", "30s", "40s", "50s", "s ago", "just", "刚刚", "秒前"]
-            
-            for indicator in recent_indicators:
-                if indicator in relative_time:
-                    print(f"Tweet is recent based on text indicator: {relative_time}")
-                    return True
-                    
-            # If it mentions minutes, check if it's under 1m
-            if "m" in relative_time or "min" in relative_time:
-                for num in range(2, 60):  # Checking for "2m", "3m", etc.
-                    if f"{num}m" in relative_time or f"{num} m" in relative_time or f"{num} min" in relative_time:
-                        return False
-                
-                # If it's "1m" or "1 min", it might be just crossing over the 1-minute threshold
-                # Conservatively treat it as recent
-                if "1m" in relative_time or "1 min" in relative_time:
-                    print("Tweet is from 1 minute ago, considering it recent")
-                    return True
+                return age_ms <= max_age * 1000
             
-            # By default, consider it not recent if we can't determine
-            return False
+            # If no timestamp at all, check the text
+            logger.debug("Tweet relative time: %s", relative_time)
+            age = self.parse_relative_time(relative_time)
+            if age is None:
+                # By default, consider it not recent if we can't determine
+                return False
+            return age <= max_age
                 
         except Exception as e:
-            print(f"Error extracting tweet time: {e}")
+            logger.warning("Error extracting tweet time: %s", e)
             # If we can't determine the time, default to not recent
             return False
     
-    def monitor_tweets(self, username, continuous_monitoring=False, check_interval=30, timezone_offset=8, max_tweets_to_check=5):
+    def parse_relative_time(self, relative_time):
+        """Lower bound on a tweet's age in seconds from relative text like "5s", "2m" or "刚刚"
+        
+        Returns:
+            float or None: Age in seconds, or None if the text can't be parsed
+        """
+        if not relative_time:
+            return None
+        
+        # Common "just posted" indicators
+        if any(indicator in relative_time for indicator in ["just now", "now", "just", "刚刚"]):
+            return 0
+        
+        match = RELATIVE_TIME_PATTERN.search(relative_time)
+        if not match:
+            return None
+        
+        value = int(match.group(1))
+        unit = match.group(2)
+        if unit.startswith(("s", "秒")):
+            return value
+        if unit.startswith(("m", "分")):
+            # "1m" may be just past the minute mark, so use the lower bound
+            return (value - 1) * 60 + 1
+        if unit.startswith(("h", "小")):
+            return (value - 1) * 3600 + 1
+        return None
+    
+    def fetch_timeline(self, username, max_tweets_to_check=5):
+        """Load a user's profile and read the most recent tweets
+        
+        Args:
+            username: Twitter username to load
+            max_tweets_to_check: Maximum number of tweets to return (default: 5)
+        
+        Returns:
+            list: Tweet records from TimelineExtractor, ads skipped
+        """
+        # Visit user profile
+        url = f"https://x.com/{username}"
+        self.driver.get(url)
+        time.sleep(5)  # Wait for page load
+        
+        # Wait for tweets to load
+        tweet_selector = "article[data-testid='tweet']"
+        WebDriverWait(self.driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, tweet_selector))
+        )
+        
+        # Get all tweets as plain records in one round trip
+        all_tweets = self.timeline_extractor.extract()
+        logger.debug("Found %d tweets on @%s's page", len(all_tweets), username)
+        if self.journal:
+            self.journal.record(all_tweets)
+        
+        # Limit to checking only the most recent tweets, skipping ads
+        tweets = [tweet for tweet in all_tweets if not tweet["is_promoted"]][:max_tweets_to_check]
+        logger.debug("Checking the %d most recent tweets", len(tweets))
+        return tweets
+    
+    def monitor_tweets(self, username, continuous_monitoring=False, check_interval=30, timezone_offset=8, max_tweets_to_check=5, pipeline=None):
         """Monitor tweets of specified user
         
         Args:
@@ -800,140 +1330,261 @@ class TimeFunBuyer:
             check_interval: Time between checks in seconds (default: 30)
             timezone_offset: Hours offset from UTC (default: 8 for Beijing time)
             max_tweets_to_check: Maximum number of tweets to check each time (default: 5)
+            pipeline: PurchasePipeline to hand purchases to; buys inline if None (default: None)
         """
         last_tweet_id = None
-        processed_tweets = set()  # Track processed tweet IDs
+        processed_tweets = TweetDedupeStore(f"processed_tweets_{username}.json")  # Track processed tweet IDs
         
         while True:
             try:
-                print(f"Starting to monitor @{username}'s tweets...")
-                
-                # Visit user profile
-                url = f"https://x.com/{username}"
-                self.driver.get(url)
-                time.sleep(5)  # Wait for page load
-                
-                # Wait for tweets to load
-                tweet_selector = "article[data-testid='tweet']"
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, tweet_selector))
-                )
-                
-                # Get all tweets
-                all_tweets = self.driver.find_elements(By.CSS_SELECTOR, tweet_selector)
-                print(f"Found {len(all_tweets)} tweets on the page")
-                
-                # Limit to checking only the most recent tweets
-                tweets = all_tweets[:max_tweets_to_check] if max_tweets_to_check < len(all_tweets) else all_tweets
-                print(f"Checking the {len(tweets)} most recent tweets")
+                logger.debug("Checking @%s's tweets...", username)
+                tweets = self.fetch_timeline(username, max_tweets_to_check)
                 
                 if tweets:
-                    found_recent_tweet = False
-                    for tweet in tweets:
-                        try:
-                            # Get tweet ID
-                            tweet_id = tweet.get_attribute("data-tweet-id")
-                            if tweet_id in processed_tweets:
-                                continue
-                            
-                            # Check if the tweet is recent (within the last minute)
-                            if not self.extract_tweet_time(tweet, timezone_offset):
-                                print("Skipping tweet - not from the last minute")
-                                processed_tweets.add(tweet_id)  # Still mark as processed
-                                continue
-                                
-                            found_recent_tweet = True
-                            print("Found recent tweet (within last minute), processing...")
-                            
-                            # Get tweet text
-                            tweet_text = tweet.find_element(By.CSS_SELECTOR, "[data-testid='tweetText']").text
-                            print(f"New tweet content: {tweet_text}")
-                            
-                            # Check if it's a retweet
-                            is_retweet = False
-                            try:
-                                retweet_indicator = tweet.find_element(By.XPATH, 
-                                    ".//span[contains(text(), 'Retweeted') or contains(text(), '转发') or contains(text(), 'reposted')]")
-                                is_retweet = True
-                                print("This is a retweet")
-                            except:
-                                print("This is an original tweet")
-                            
-                            # Extract usernames
-                            usernames = self.extract_usernames(tweet_text)
-                            if usernames:
-                                print(f"Extracted usernames: {usernames}")
-                                
-                                # Try to buy for each username
-                                for username_to_buy in usernames:
-                                    print(f"Attempting to buy for user: {username_to_buy}")
-                                    try:
-                                        # First check if user exists on time.fun
-                                        if not self.check_user_exists(username_to_buy):
-                                            print(f"Skipping {username_to_buy} as they don't exist on time.fun")
-                                            continue
-                                            
-                                        # Use our own buy method directly
-                                        success = self.buy_with_retry(username_to_buy)
-                                        if success:
-                                            print(f"Successfully bought for user: {username_to_buy}")
-                                        else:
-                                            print(f"Failed to buy for user: {username_to_buy}")
-                                    except Exception as e:
-                                        print(f"Error buying for user {username_to_buy}: {str(e)}")
-                            else:
-                                print("No usernames found in tweet")
-                                
-                            # Mark tweet as processed
-                            processed_tweets.add(tweet_id)
-                            
-                        except Exception as e:
-                            print(f"Error processing tweet: {str(e)}")
-                            continue
-                    
-                    if not found_recent_tweet:
-                        print("No recent tweets found within the last minute")
+                    self.process_tweets(tweets, processed_tweets, timezone_offset, pipeline)
                 else:
-                    print("No tweets found")
+                    logger.warning("No tweets found")
+                
+                processed_tweets.save()
+                if pipeline:
+                    pipeline.report()
+                if self.armed:
+                    self.armed.maintain()
+                if self.tab_pool:
+                    self.tab_pool.health_check()
                 
                 if not continuous_monitoring:
                     break
                     
                 # Wait before next check
-                print(f"Waiting {check_interval} seconds before next check...")
+                logger.debug("Waiting %s seconds before next check...", check_interval)
                 time.sleep(check_interval)
                 
             except Exception as e:
-                print(f"Error monitoring tweets: {str(e)}")
+                logger.error("Error monitoring tweets: %s", e)
                 self.save_debug_info("monitor_tweets_error")
                 if not continuous_monitoring:
                     break
                 time.sleep(check_interval)  # Wait before retrying
                 
-    def extract_usernames(self, text):
-        """Extract usernames from text"""
-        # Match @username format
-        pattern = r'@(\w+)'
-        usernames = re.findall(pattern, text)
-        return usernames 
+    def watch_tweets(self, username, timezone_offset=8, pipeline=None, drain_interval=1, stale_after=60):
+        """Watch tweets of specified user in a persistent tab
+        
+        Instead of reloading x.com every interval, a MutationObserver in the
+        page queues new tweets and this loop drains them with a cheap script
+        call. The page is only reloaded when the watcher is lost or stale.
+        Every drained tweet is checked: the watcher has already marked them
+        seen, so one left out here would never come back.
+        
+        Args:
+            username: Twitter username to monitor
+            timezone_offset: Hours offset from UTC (default: 8 for Beijing time)
+            pipeline: PurchasePipeline to hand purchases to; buys inline if None (default: None)
+            drain_interval: Seconds between drains (default: 1)
+            stale_after: Reload if no new tweet appears for this many seconds (default: 60)
+        """
+        processed_tweets = TweetDedupeStore(f"processed_tweets_{username}.json")  # Track processed tweet IDs
+        watcher = TimelineWatcher(self.driver, stale_after=stale_after)
+        url = f"https://x.com/{username}"
+        
+        while True:
+            try:
+                if not watcher.active:
+                    logger.info("Loading @%s's timeline and installing watcher...", username)
+                    self.driver.get(url)
+                    WebDriverWait(self.driver, 15).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "article[data-testid='tweet']"))
+                    )
+                    watcher.install()
+                
+                records = watcher.drain()
+                if records is None:
+                    logger.warning("Timeline watcher lost (page reloaded or navigated), reinstalling...")
+                    continue
+                
+                tweets = [tweet for tweet in records if not tweet["is_promoted"]]
+                if tweets:
+                    logger.debug("Watcher delivered %d new tweets", len(tweets))
+                    self.process_tweets(tweets, processed_tweets, timezone_offset, pipeline)
+                    processed_tweets.save()
+                    if pipeline:
+                        pipeline.report()
+                
+                if self.armed:
+                    self.armed.maintain()
+                if self.tab_pool:
+                    self.tab_pool.health_check()
+                
+                if watcher.is_stale():
+                    logger.info("No new tweets for %s seconds, reloading timeline...", stale_after)
+                    watcher.active = False
+                    continue
+                
+                time.sleep(drain_interval)
+            
+            except Exception as e:
+                logger.error("Error watching tweets: %s", e)
+                self.save_debug_info("watch_tweets_error")
+                watcher.active = False
+                time.sleep(drain_interval * 5)  # Wait before retrying
+    
+    def process_tweets(self, tweets, processed_tweets, timezone_offset=8, pipeline=None):
+        """Act on new, recent tweets: extract usernames and buy (or queue) them
+        
+        Args:
+            tweets: Tweet records from TimelineExtractor or TimelineWatcher
+            processed_tweets: TweetDedupeStore of tweets already handled
+            timezone_offset: Hours offset from UTC (default: 8 for Beijing time)
+            pipeline: PurchasePipeline to hand purchases to; buys inline if None or unhealthy (default: None)
+        
+        Returns:
+            bool: True if any tweet was within the freshness window
+        """
+        if pipeline and not pipeline.healthy:
+            # No purchase worker could start (see PurchasePipeline.worker)
+            pipeline = None
+        found_recent_tweet = False
+        for tweet in tweets:
+            try:
+                # Get tweet ID (from the status permalink)
+                tweet_id = tweet["id"]
+                if tweet_id in processed_tweets:
+                    continue
+                
+                # Check if the tweet is recent (within the freshness window)
+                trace = self.tracer.start(tweet_id, author=tweet.get("author"))
+                with self.tracer.activate(trace):
+                    is_recent = self.extract_tweet_time(tweet, timezone_offset)
+                if not is_recent:
+                    logger.debug("Skipping tweet - older than %.0f seconds", self.max_tweet_age, extra={"tweet_id": tweet_id})
+                    processed_tweets.add(tweet_id)  # Still mark as processed
+                    trace.finish("stale")
+                    continue
+                
+                found_recent_tweet = True
+                logger.info("Found recent tweet (within %.0f seconds), processing...", self.max_tweet_age,
+                            extra={"tweet_id": tweet_id, "elapsed_ms": self.last_tweet_age_ms})
+                
+                # Get tweet text
+                tweet_text = tweet["text"]
+                logger.debug("New tweet content: %s", tweet_text, extra={"tweet_id": tweet_id})
+                
+                # Check if it's a retweet
+                is_retweet = tweet["is_retweet"]
+                if is_retweet:
+                    logger.debug("This is a retweet of @%s", tweet["author"], extra={"tweet_id": tweet_id})
+                else:
+                    logger.debug("This is an original tweet", extra={"tweet_id": tweet_id})
+                
+                # Extract usernames
+                usernames = self.extract_usernames(tweet_text, tweet)
+                trace.mark("username_extracted")
+                if usernames:
+                    logger.info("Extracted usernames: %s", usernames, extra={"tweet_id": tweet_id})
+                    if self.prefetcher and not pipeline:
+                        # Start loading the market pages now; the loads double as existence checks
+                        self.prefetcher.start(usernames)
+                    elif self.user_check_mode != 'browser':
+                        # Probe all handles concurrently so the checks below hit the cache
+                        self.user_checker.check_many(usernames)
+                
+                # Hand purchases to the workers so detection keeps its cadence
+                if usernames and pipeline:
+                    for username_to_buy in usernames:
+                        user_trace = trace.fork(username_to_buy, username=username_to_buy)
+                        if self.armed and self.armed.is_armed(username_to_buy):
+                            # Armed tabs live in this driver, so fire here instead of queueing
+                            with log_context(tweet_id=tweet_id):
+                                self.buy_with_retry(username_to_buy, trace=user_trace)
+                        else:
+                            pipeline.submit(tweet_id, username_to_buy, trace=user_trace)
+                elif usernames:
+                    # Try to buy for each username
+                    for username_to_buy in usernames:
+                        logger.debug("Attempting to buy for user: %s", username_to_buy, extra={"tweet_id": tweet_id})
+                        user_trace = trace.fork(username_to_buy, username=username_to_buy)
+                        try:
+                            # First check if user exists on time.fun
+                            with self.tracer.activate(user_trace):
+                                exists = self.check_user_exists(username_to_buy)
+                            if not exists:
+                                logger.info("Skipping %s as they don't exist on time.fun", username_to_buy, extra={"tweet_id": tweet_id})
+                                user_trace.finish("not_found")
+                                continue
+                            
+                            # Use our own buy method directly
+                            with log_context(tweet_id=tweet_id):
+                                success = self.buy_with_retry(username_to_buy, trace=user_trace)
+                            if success:
+                                logger.info("Successfully bought for user: %s", username_to_buy, extra={"tweet_id": tweet_id})
+                            else:
+                                logger.warning("Failed to buy for user: %s", username_to_buy, extra={"tweet_id": tweet_id})
+                        except Exception as e:
+                            logger.error("Error buying for user %s: %s", username_to_buy, e, extra={"tweet_id": tweet_id})
+                    if self.prefetcher:
+                        self.prefetcher.clear()
+                else:
+                    logger.debug("No usernames found in tweet", extra={"tweet_id": tweet_id})
+                    trace.finish("no_usernames")
+                
+                # Mark tweet as processed
+                processed_tweets.add(tweet_id)
+            
+            except Exception as e:
+                logger.error("Error processing tweet: %s", e)
+                continue
+        
+        if not found_recent_tweet:
+            logger.debug("No recent tweets found within the last %.0f seconds", self.max_tweet_age)
+        return found_recent_tweet
+    
+    def extract_usernames(self, text, record=None):
+        """Extract the likely promoted handles from a tweet, best first
+        
+        Args:
+            text: Tweet text
+            record: Timeline record the text came from, for its mentions, links and retweet state
+        
+        Returns:
+            list: Handles that scored high enough to be worth a purchase attempt
+        """
+        if record is not None:
+            candidates = self.handle_extractor.from_record({**record, "text": text})
+        else:
+            candidates = self.handle_extractor.candidates(text)
+        if candidates:
+            logger.debug("Handle candidates: %s", ", ".join(f"{c.handle}={c.score:g} ({'+'.join(c.sources)})" for c in candidates))
+        return [candidate.handle for candidate in candidates]
 
+    def spawn_worker_buyer(self):
+        """Create a buyer with its own WebDriver session and tab, for a purchase worker"""
+        worker = TimeFunBuyer(use_existing_session=self.use_existing_session, fast_path=self.fast_path)
+        worker.is_logged_in = self.is_logged_in
+        # One trace file and summary for the whole process
+        worker.tracer = self.tracer
+        worker.owns_tracer = False
+        worker.artifacts.close()
+        worker.artifacts = self.artifacts
+        worker.owns_artifacts = False
+        # One ranking (and stats file writer) shared by all workers
+        worker.selector_ranking = self.selector_ranking
+        worker.owns_selector_ranking = False
+        worker.driver.switch_to.new_window("tab")
+        if worker.cdp:
+            # Follow the worker to its own tab
+            worker.cdp.close()
+            worker.cdp = worker.connect_cdp_lane()
+        return worker
+    
     def save_debug_info(self, prefix):
-        """Save debug information including screenshot and page source"""
+        """Save debug information including screenshot and page source (written in the background)"""
         try:
-            # Save screenshot
-            screenshot_path = f"debug_{prefix}_screenshot.png"
-            self.driver.save_screenshot(screenshot_path)
-            print(f"Debug screenshot saved: {screenshot_path}")
-            
-            # Save page source
-            page_source_path = f"debug_{prefix}_page_source.html"
-            with open(page_source_path, "w", encoding="utf-8") as f:
-                f.write(self.driver.page_source)
-            print(f"Debug page source saved: {page_source_path}")
+            self.artifacts.failure(self.driver, prefix)
         except Exception as e:
             print(f"Error saving debug info: {str(e)}")
 
-def run_monitor(twitter_username="timedotfun", check_interval=30, skip_login_check=True, timezone_offset=8, max_tweets=5):
+def run_monitor(twitter_username="timedotfun", check_interval=30, skip_login_check=True, timezone_offset=8, max_tweets=5, fast_path=None,
+                purchase_workers=0, queue_size=20, max_tweet_age=None, watch_mode=False, record_path=None, armed_handles=None):
     """Run the TimeFun Sniper Bot to monitor Twitter and auto-buy
     
     Args:
@@ -942,6 +1593,13 @@ def run_monitor(twitter_username="timedotfun", check_interval=30, skip_login_che
         skip_login_check: Skip login verification (default: True)
         timezone_offset: Hours offset from UTC (default: 8 for Beijing time)
         max_tweets: Maximum number of tweets to check each time (default: 5)
+        fast_path: Use readiness waits instead of fixed sleeps (default: FAST_PATH env)
+        purchase_workers: Number of background purchase workers; 0 buys inline (default: 0)
+        queue_size: Maximum number of pending purchases for the workers (default: 20)
+        max_tweet_age: Only act on tweets newer than this many seconds (default: TWEET_MAX_AGE env, 60)
+        watch_mode: Watch the timeline in a persistent tab instead of reloading every interval (default: False)
+        record_path: Record every timeline load to this journal for replay_harness.py (default: None)
+        armed_handles: time.fun handles to keep a pre-staged buy modal open for (default: None)
     """
     print(f"=== TimeFun Sniper Bot ===")
     print(f"Initializing bot to monitor @{twitter_username} tweets and auto-buy...")
@@ -950,7 +1608,12 @@ def run_monitor(twitter_username="timedotfun", check_interval=30, skip_login_che
     print(f"Checking max {max_tweets} recent tweets each time")
     
     # Initialize the buyer
-    buyer = TimeFunBuyer(use_existing_session=True)
+    buyer = TimeFunBuyer(use_existing_session=True, fast_path=fast_path)
+    if max_tweet_age is not None:
+        buyer.max_tweet_age = max_tweet_age
+    if record_path:
+        buyer.journal = JournalRecorder(record_path, "browser", twitter_username)
+    pipeline = None
     
     try:
         # Check login status only if explicitly requested
@@ -965,20 +1628,167 @@ def run_monitor(twitter_username="timedotfun", check_interval=30, skip_login_che
             print("Skipping login check. Starting Twitter monitoring...")
             buyer.is_logged_in = True
         
+        # Load the time.fun app in the pool tabs before the first target arrives
+        if buyer.tab_pool:
+            buyer.tab_pool.warm()
+        
+        # Stage buy modals for the expected targets
+        if armed_handles:
+            try:
+                refresh_interval = float(os.getenv('ARMED_REFRESH', '300').strip())
+            except ValueError as e:
+                print(f"Error parsing ARMED_REFRESH: {e}")
+                print("Using default value of 300 seconds")
+                refresh_interval = 300
+            buyer.armed = ArmedModal(buyer, armed_handles, refresh_interval=refresh_interval)
+            buyer.armed.maintain(force=True, stage_all=True)
+        
+        # Start purchase workers so buys don't block detection
+        if purchase_workers > 0:
+            pipeline = PurchasePipeline(buyer.spawn_worker_buyer, workers=purchase_workers, max_queue=queue_size)
+            pipeline.start()
+        
         # Start monitoring tweets
-        buyer.monitor_tweets(twitter_username, continuous_monitoring=True, 
-                           check_interval=check_interval, timezone_offset=timezone_offset,
-                           max_tweets_to_check=max_tweets)
+        if watch_mode:
+            # The interval becomes the staleness limit before a reload
+            buyer.watch_tweets(twitter_username, timezone_offset=timezone_offset,
+                               pipeline=pipeline, stale_after=check_interval)
+        else:
+            buyer.monitor_tweets(twitter_username, continuous_monitoring=True, 
+                               check_interval=check_interval, timezone_offset=timezone_offset,
+                               max_tweets_to_check=max_tweets, pipeline=pipeline)
+        
+    except KeyboardInterrupt:
+        print("\nBot stopped by user.")
+    except Exception as e:
+        print(f"Error running bot: {e}")
+        buyer.save_debug_info("bot_error")
+    finally:
+        if pipeline:
+            print("Stopping purchase workers...")
+            pipeline.stop()
+        if buyer.journal:
+            buyer.journal.close()
+        print("Closing browser session...")
+        buyer.close()
+
+def run_multi_monitor(targets_file, skip_login_check=True, max_tweets=5, fast_path=None,
+                      purchase_workers=1, queue_size=20, max_tweet_age=None, api_lanes=2):
+    """Monitor several accounts at once with a fair, priority-aware scheduler
+    
+    Args:
+        targets_file: JSON file listing the accounts to monitor (see multi_monitor.load_targets)
+        skip_login_check: Skip login verification (default: True)
+        max_tweets: Maximum number of tweets to check per browser poll (default: 5)
+        fast_path: Use readiness waits instead of fixed sleeps (default: FAST_PATH env)
+        purchase_workers: Number of background purchase workers, at least 1 (default: 1)
+        queue_size: Maximum number of pending purchases for the workers (default: 20)
+        max_tweet_age: Only act on tweets newer than this many seconds (default: TWEET_MAX_AGE env, 60)
+        api_lanes: Concurrent polls for API-sourced accounts (default: 2)
+    """
+    targets = load_targets(targets_file)
+    print(f"=== TimeFun Sniper Bot (multi-account) ===")
+    for target in targets:
+        print(f"@{target.account}: priority {target.priority}, every {target.interval}s via {target.source}")
+    
+    buyer = TimeFunBuyer(use_existing_session=True, fast_path=fast_path)
+    if max_tweet_age is not None:
+        buyer.max_tweet_age = max_tweet_age
+    pipeline = None
+    
+    try:
+        if not skip_login_check and not buyer.check_login_status():
+            print("Not logged in to TimeFun.")
+            print("Please log in to TimeFun in your Chrome browser, then restart the bot.")
+            return
+        buyer.is_logged_in = True
+        
+        # Detections arrive from several lanes at once, so buys always go through workers
+        pipeline = PurchasePipeline(buyer.spawn_worker_buyer, workers=max(1, purchase_workers), max_queue=queue_size)
+        pipeline.start()
+        
+        browser = BrowserTimelineSource(buyer, max_tweets=max_tweets)
         
+        def on_detection(target, tweet_id, usernames):
+            for username in usernames:
+                if pipeline.healthy:
+                    pipeline.submit(tweet_id, username)
+                    continue
+                # No purchase worker could start: buy in this browser, between polls
+                with browser.lock, log_context(tweet_id=tweet_id):
+                    buyer.buy_with_retry(username)
+        
+        sources = {"browser": browser, "api": ApiTimelineSource()}
+        # The browser lane shares one WebDriver session, so it polls one account at a time
+        monitor = MultiAccountMonitor(targets, sources, on_detection, lane_workers={"browser": 1, "api": api_lanes})
+        monitor.run()
+    
     except KeyboardInterrupt:
         print("\nBot stopped by user.")
     except Exception as e:
         print(f"Error running bot: {e}")
         buyer.save_debug_info("bot_error")
     finally:
+        if pipeline:
+            print("Stopping purchase workers...")
+            pipeline.stop()
         print("Closing browser session...")
         buyer.close()
 
+def run_async_monitor(twitter_username="timedotfun", check_interval=30, targets_file=None, skip_login_check=True,
+                      max_tweets=5, fast_path=None, purchase_workers=1, queue_size=20, max_tweet_age=None,
+                      api_lanes=2, executor_workers=8):
+    """Run detection, existence checks and purchases as asyncio tasks in one process
+    
+    Args:
+        twitter_username: Twitter username to monitor when no targets file is given (default: timedotfun)
+        check_interval: Time between checks of that username in seconds (default: 30)
+        targets_file: JSON file listing the accounts to monitor (default: None)
+        skip_login_check: Skip login verification (default: True)
+        max_tweets: Maximum number of tweets to check per browser poll (default: 5)
+        fast_path: Use readiness waits instead of fixed sleeps (default: FAST_PATH env)
+        purchase_workers: Number of concurrent purchase workers, at least 1 (default: 1)
+        queue_size: Maximum number of pending events per stage (default: 20)
+        max_tweet_age: Only act on tweets newer than this many seconds (default: TWEET_MAX_AGE env, 60)
+        api_lanes: Concurrent polls for API-sourced accounts (default: 2)
+        executor_workers: Threads for blocking HTTP and API calls (default: 8)
+    """
+    if targets_file:
+        targets = load_targets(targets_file)
+    else:
+        targets = [MonitorTarget(twitter_username, interval=check_interval)]
+    print(f"=== TimeFun Sniper Bot (async) ===")
+    for target in targets:
+        print(f"@{target.account}: priority {target.priority}, every {target.interval}s via {target.source}")
+    
+    buyer = TimeFunBuyer(use_existing_session=True, fast_path=fast_path)
+    if max_tweet_age is not None:
+        buyer.max_tweet_age = max_tweet_age
+    if not skip_login_check and not buyer.check_login_status():
+        print("Not logged in to TimeFun.")
+        print("Please log in to TimeFun in your Chrome browser, then restart the bot.")
+        buyer.close()
+        return
+    buyer.is_logged_in = True
+    
+    runtime = AsyncRuntime(workers=executor_workers)
+    # From here on the monitoring driver is only touched from its own lane
+    browser_executor = runtime.lane_executor("browser")
+    runtime.add_cleanup(buyer.close, browser_executor)
+    
+    sources = {"browser": BrowserTimelineSource(buyer, max_tweets=max_tweets), "api": ApiTimelineSource()}
+    monitor = MultiAccountMonitor(targets, sources, None, lane_workers={"browser": 1, "api": api_lanes})
+    sniper = AsyncSniper(runtime, monitor, buyer.user_checker, buyer.spawn_worker_buyer,
+                         browser_executor=browser_executor, purchase_workers=max(1, purchase_workers),
+                         max_queue=queue_size, check_mode=buyer.user_check_mode)
+    runtime.add_cleanup(monitor.report)
+    runtime.add_cleanup(sniper.report)
+    
+    try:
+        asyncio.run(runtime.run(sniper.start))
+    except KeyboardInterrupt:
+        print("\nBot stopped by user.")
+
 if __name__ == "__main__":
     # Load environment variables
     load_dotenv(dotenv_path=".env.utf8")
@@ -995,15 +1805,59 @@ if __name__ == "__main__":
                         help="Timezone offset from UTC in hours (default: 8 for Beijing)")
     parser.add_argument("--max-tweets", "-m", type=int, default=5,
                         help="Maximum number of tweets to check (default: 5)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Watch the timeline in a persistent tab instead of reloading it every interval")
+    parser.add_argument("--max-age", "-a", type=float, default=None,
+                        help="Only act on tweets newer than this many seconds (default: TWEET_MAX_AGE env, 60)")
     parser.add_argument("--buy", "-b", metavar="TIMEFUN_USERNAME",
                         help="Directly buy a specific user without monitoring")
     parser.add_argument("--verify", "-v", metavar="TIMEFUN_USERNAME",
                         help="Verify if a user exists on time.fun without buying")
+    parser.add_argument("--fast", "-f", action="store_true", default=None,
+                        help="Fast path: wait on page readiness instead of fixed sleeps (default: FAST_PATH env)")
+    parser.add_argument("--workers", "-w", type=int, default=0,
+                        help="Number of background purchase workers, 0 buys inline (default: 0)")
+    parser.add_argument("--queue-size", type=int, default=20,
+                        help="Maximum number of pending purchases for the workers (default: 20)")
+    parser.add_argument("--targets", metavar="FILE",
+                        help="Monitor every account listed in this JSON file instead of a single username")
+    parser.add_argument("--bench-cdp", action="store_true",
+                        help="Compare per-command latency of the CDP fast lane and chromedriver, then exit")
+    parser.add_argument("--async", dest="async_mode", action="store_true",
+                        help="Run detection, existence checks and purchases as concurrent asyncio tasks")
+    parser.add_argument("--record", metavar="FILE",
+                        help="Record every timeline load to a journal that replay_harness.py can replay")
+    parser.add_argument("--arm", metavar="HANDLES", default=os.getenv('ARMED_HANDLES', ''),
+                        help="Comma-separated time.fun handles to keep a pre-staged buy modal open for (default: ARMED_HANDLES env)")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], type=str.upper,
+                        help="Log level, DEBUG shows every selector, step timing and button dump (default: LOG_LEVEL env, INFO)")
+    parser.add_argument("--profile", choices=sorted(PROFILES),
+                        help="Delay profile for purchases: snipe, balanced or stealth (default: BUY_PROFILE env, balanced)")
+    parser.add_argument("--login-profile", choices=sorted(PROFILES),
+                        help="Delay profile for login (default: LOGIN_PROFILE env, stealth)")
     
     args = parser.parse_args()
+    setup_logging(args.log_level)
+    
+    # Explicit env wins over .env.utf8, and purchase workers pick it up too
+    if args.profile:
+        os.environ["BUY_PROFILE"] = args.profile
+    if args.login_profile:
+        os.environ["LOGIN_PROFILE"] = args.login_profile
     
+    # Benchmark the CDP fast lane against chromedriver
+    if args.bench_cdp:
+        buyer = TimeFunBuyer(use_existing_session=True)
+        try:
+            lane = buyer.cdp or buyer.connect_cdp_lane()
+            if lane:
+                benchmark_command_overhead(lane, buyer.driver)
+                lane.close()
+                buyer.cdp = None
+        finally:
+            buyer.close()
     # Run in verification-only mode if specified
-    if args.verify:
+    elif args.verify:
         buyer = TimeFunBuyer(use_existing_session=True)
         try:
             exists = buyer.check_user_exists(args.verify)
@@ -1012,7 +1866,7 @@ if __name__ == "__main__":
             buyer.close()
     # Run in buy-only mode if specified
     elif args.buy:
-        buyer = TimeFunBuyer(use_existing_session=True)
+        buyer = TimeFunBuyer(use_existing_session=True, fast_path=args.fast)
         try:
             if args.check_login and not buyer.check_login_status():
                 print("Not logged in to TimeFun. Please log in and try again.")
@@ -1022,14 +1876,27 @@ if __name__ == "__main__":
                 buyer.is_logged_in = True
             
             print(f"Attempting to buy user: {args.buy}")
-            success = buyer.buy_with_retry(args.buy)
+            success = buyer.buy_with_retry(args.buy, trace=buyer.tracer.start(f"buy:{args.buy}", username=args.buy))
             if success:
                 print(f"Successfully bought {args.buy}'s time coin!")
             else:
                 print(f"Failed to buy {args.buy}")
         finally:
             buyer.close()
+    elif args.async_mode:
+        # Run monitor, checks and purchases on the asyncio runtime
+        run_async_monitor(args.username, args.interval, args.targets, not args.check_login, args.max_tweets,
+                          fast_path=args.fast, purchase_workers=args.workers, queue_size=args.queue_size,
+                          max_tweet_age=args.max_age)
+    elif args.targets:
+        # Run in multi-account monitor mode
+        run_multi_monitor(args.targets, not args.check_login, args.max_tweets, fast_path=args.fast,
+                          purchase_workers=args.workers, queue_size=args.queue_size,
+                          max_tweet_age=args.max_age)
     else:
         # Run in monitor mode
         run_monitor(args.username, args.interval, not args.check_login, 
-                  args.timezone, args.max_tweets) 
\ No newline at end of file
+                  args.timezone, args.max_tweets, fast_path=args.fast,
+                  purchase_workers=args.workers, queue_size=args.queue_size,
+                  max_tweet_age=args.max_age, watch_mode=args.watch, record_path=args.record,
+                  armed_handles=[handle for handle in args.arm.split(",") if handle.strip()]) 
\ No newline at end of file
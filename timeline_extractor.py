@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Builds a plain record from a tweet article element (shared with TimelineWatcher)
+ARTICLE_RECORD_FUNCTION = """
+function statusLink(article) {
+    var time = article.querySelector('time');
+    var link = time && time.closest('a[href*="/status/"]');
+    return link || article.querySelector('a[href*="/status/"]');
+}
+
+function articleRecord(article) {
+    var link = statusLink(article);
+    var href = link ? link.getAttribute('href') : null;
+    var match = href ? href.match(/^\\/([^\\/]+)\\/status\\/(\\d+)/) : null;
+    var time = article.querySelector('time');
+    var textEl = article.querySelector("[data-testid='tweetText']");
+    var context = article.querySelector("[data-testid='socialContext']");
+    var contextText = context ? (context.textContent || '') : '';
+    
+    var mentions = [], urls = [];
+    if (textEl) {
+        Array.prototype.forEach.call(textEl.querySelectorAll('a[href]'), function(a) {
+            var text = (a.textContent || '').trim();
+            if (text.charAt(0) === '@') {
+                mentions.push(text.slice(1));
+            } else {
+                urls.push(a.getAttribute('title') || a.textContent || a.getAttribute('href'));
+            }
+        });
+    }
+    
+    var promoted = !!article.querySelector("[data-testid='placementTracking']") ||
+        Array.prototype.some.call(article.querySelectorAll('span'), function(span) {
+            var text = (span.textContent || '').trim();
+            return text === 'Ad' || text === 'Promoted' || text === '推广';
+        });
+    
+    return {
+        id: match ? match[2] : null,
+        author: match ? match[1] : null,
+        text: textEl ? (textEl.innerText || textEl.textContent || '') : '',
+        mentions: mentions,
+        urls: urls,
+        datetime: time ? time.getAttribute('datetime') : null,
+        time_text: time ? (time.textContent || '') : '',
+        is_retweet: /reposted|retweeted|转发|转推/i.test(contextText),
+        is_pinned: /pinned|置顶/i.test(contextText),
+        is_promoted: promoted,
+        social_context: contextText
+    };
+}
+"""
+
+# Reads every visible tweet article into plain records in a single call
+TIMELINE_EXTRACT_SCRIPT = ARTICLE_RECORD_FUNCTION + """
+var limit = arguments[0];
+var articles = Array.prototype.slice.call(document.querySelectorAll("article[data-testid='tweet']"));
+if (limit > 0) { articles = articles.slice(0, limit); }
+return articles.map(articleRecord);
+"""
+
+class TimelineExtractor:
+    """Extract tweet records from the loaded timeline without per-element round trips"""
+    
+    def __init__(self, driver):
+        self.driver = driver
+    
+    def extract(self, limit=0):
+        """Read the visible tweet articles
+        
+        Args:
+            limit: Maximum number of articles to read, 0 for all (default: 0)
+        
+        Returns:
+            list: Dicts with id, author, text, mentions, urls, datetime,
+                time_text, is_retweet, is_pinned, is_promoted and social_context
+        """
+        return self.driver.execute_script(TIMELINE_EXTRACT_SCRIPT, limit) or []
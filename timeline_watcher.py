@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import time
+from timeline_extractor import ARTICLE_RECORD_FUNCTION
+
+# Installs a MutationObserver that pushes records for new tweet articles into an in-page queue
+WATCHER_INSTALL_SCRIPT = ARTICLE_RECORD_FUNCTION + """
+var maxSeen = arguments[0];
+if (window.__sniperWatcher) { window.__sniperWatcher.observer.disconnect(); }
+
+var state = {queue: [], seen: {}, seenCount: 0, href: location.href,
+             lastMutation: Date.now(), lastArticle: Date.now(), pending: null, observer: null};
+
+function scan() {
+    state.pending = null;
+    var articles = document.querySelectorAll("article[data-testid='tweet']");
+    for (var i = 0; i < articles.length; i++) {
+        var record = articleRecord(articles[i]);
+        // Articles without a permalink yet are picked up by a later mutation
+        if (!record.id || state.seen[record.id]) { continue; }
+        if (state.seenCount >= maxSeen) { state.seen = {}; state.seenCount = 0; }
+        state.seen[record.id] = true;
+        state.seenCount++;
+        record.observed_at = Date.now();
+        state.queue.push(record);
+        state.lastArticle = Date.now();
+    }
+    
+    // Live timelines hold new posts behind a "Show N posts" pill
+    var buttons = document.querySelectorAll("[role='button']");
+    for (var j = 0; j < buttons.length; j++) {
+        if (/^Show \\d+ (new )?posts?$/i.test((buttons[j].textContent || '').trim())) {
+            buttons[j].click();
+            break;
+        }
+    }
+}
+
+state.observer = new MutationObserver(function() {
+    state.lastMutation = Date.now();
+    if (!state.pending) { state.pending = setTimeout(scan, 100); }
+});
+state.observer.observe(document.body, {childList: true, subtree: true});
+window.__sniperWatcher = state;
+scan();
+return true;
+"""
+
+# Hands over queued records; null means the watcher is gone (reload or navigation)
+WATCHER_DRAIN_SCRIPT = """
+var state = window.__sniperWatcher;
+if (!state || state.href !== location.href) { return null; }
+var records = state.queue;
+state.queue = [];
+return {records: records, idle_ms: Date.now() - state.lastArticle, quiet_ms: Date.now() - state.lastMutation};
+"""
+
+class TimelineWatcher:
+    """Watch a loaded timeline for new tweets without reloading the page
+    
+    A MutationObserver in the page turns new tweet articles into records and
+    queues them; drain() collects them with one cheap script call. The page
+    is only reloaded when the watcher is lost or the timeline goes stale.
+    Profile timelines don't always insert new posts live, so "stale" (no new
+    article for stale_after seconds) triggers a reload to pick them up.
+    """
+    
+    def __init__(self, driver, stale_after=60, max_seen=2000):
+        self.driver = driver
+        self.stale_after = stale_after
+        self.max_seen = max_seen
+        self.active = False
+        self.installed_at = None
+        self.last_drain = None
+    
+    def install(self):
+        """Inject the observer into the current page"""
+        self.driver.execute_script(WATCHER_INSTALL_SCRIPT, self.max_seen)
+        self.active = True
+        self.installed_at = time.monotonic()
+        print("Timeline watcher installed")
+    
+    def drain(self):
+        """Collect queued tweet records
+        
+        Returns:
+            list: New records, or None if the watcher needs reinstalling
+        """
+        if not self.active:
+            return None
+        try:
+            result = self.driver.execute_script(WATCHER_DRAIN_SCRIPT)
+        except Exception as e:
+            print(f"Error draining timeline watcher: {e}")
+            result = None
+        
+        if result is None:
+            self.active = False
+            return None
+        self.last_drain = result
+        return result["records"]
+    
+    def is_stale(self):
+        """True if no new article has appeared for stale_after seconds"""
+        if not self.active or self.last_drain is None:
+            return False
+        return self.last_drain["idle_ms"] >= self.stale_after * 1000
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+from collections import deque
+from bot_logging import get_logger
+
+logger = get_logger("tweet_store")
+
+class TweetDedupeStore:
+    """Constant-memory record of processed tweet IDs that survives restarts
+    
+    Tweet IDs are snowflakes, so they grow over time. The store keeps the
+    highest ID seen plus a fixed-size ring of recent IDs for tweets that
+    arrive out of order. Once the ring is full, anything older than the
+    oldest ID still in the ring is treated as already processed.
+    """
+    
+    def __init__(self, path, capacity=4096):
+        self.path = path
+        self.capacity = capacity
+        self.ring = deque()
+        self.members = set()
+        self.high_water = None
+        self.floor = None  # IDs at or below this were evicted from the ring
+        self.dirty = False
+        self.load()
+    
+    @staticmethod
+    def normalize(tweet_id):
+        """Snowflake IDs as ints; other values (e.g. None) are kept as-is"""
+        if isinstance(tweet_id, str) and tweet_id.isdigit():
+            return int(tweet_id)
+        return tweet_id
+    
+    def __contains__(self, tweet_id):
+        tweet_id = self.normalize(tweet_id)
+        if tweet_id in self.members:
+            return True
+        return isinstance(tweet_id, int) and self.floor is not None and tweet_id <= self.floor
+    
+    def __len__(self):
+        return len(self.ring)
+    
+    def add(self, tweet_id):
+        """Mark a tweet as processed"""
+        tweet_id = self.normalize(tweet_id)
+        if tweet_id in self:
+            return
+        
+        self.ring.append(tweet_id)
+        self.members.add(tweet_id)
+        if isinstance(tweet_id, int) and (self.high_water is None or tweet_id > self.high_water):
+            self.high_water = tweet_id
+        
+        while len(self.ring) > self.capacity:
+            evicted = self.ring.popleft()
+            self.members.discard(evicted)
+            if isinstance(evicted, int) and (self.floor is None or evicted > self.floor):
+                self.floor = evicted
+        self.dirty = True
+    
+    def load(self):
+        """Load the store from disk, starting empty if missing or corrupt"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Error loading tweet store %s, starting empty: %s", self.path, e)
+            return
+        
+        self.high_water = data.get("high_water")
+        self.floor = data.get("floor")
+        for tweet_id in data.get("ids", [])[-self.capacity:]:
+            self.ring.append(tweet_id)
+            self.members.add(tweet_id)
+        logger.info("Loaded %d processed tweets from %s (high water: %s)", len(self.ring), self.path, self.high_water)
+    
+    def save(self):
+        """Atomically write the store to disk if anything changed"""
+        if not self.dirty:
+            return
+        # Only snowflake IDs are meaningful across restarts
+        ids = [tweet_id for tweet_id in self.ring if isinstance(tweet_id, int)]
+        data = {"high_water": self.high_water, "floor": self.floor, "ids": ids}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logger.warning("Error saving tweet store %s: %s", self.path, e)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+import json
+import random
+import threading
+from types import SimpleNamespace
+import requests
+from bot_logging import get_logger
+
+logger = get_logger("stream")
+
+STREAM_URL = "https://api.twitter.com/2/tweets/search/stream"
+
+# Expansions so a retweet event carries the retweeted author and its entities
+STREAM_PARAMS = {
+    "expansions": "author_id,referenced_tweets.id,referenced_tweets.id.author_id",
+    "tweet.fields": "author_id,created_at,entities,referenced_tweets",
+    "user.fields": "username",
+}
+
+# Reconnect backoff per failure kind: (first delay, cap) in seconds, doubling per attempt
+BACKOFF = {
+    "network": (0.25, 16),
+    "http": (5, 320),
+    "rate_limit": (60, 960),
+}
+
+class StreamHTTPError(Exception):
+    """The stream endpoint refused the connection"""
+    
+    def __init__(self, status_code, body=""):
+        super().__init__(f"HTTP {status_code}: {body[:200]}")
+        self.status_code = status_code
+
+class StreamEventParser:
+    """Split a chunked stream into JSON events as bytes arrive
+    
+    Events are newline-delimited; empty lines are keep-alive heartbeats.
+    A partial line is kept until the rest of it arrives.
+    """
+    
+    def __init__(self):
+        self.buffer = b""
+        self.heartbeats = 0
+    
+    def feed(self, data):
+        """Add received bytes
+        
+        Returns:
+            list: Events completed by this data
+        """
+        self.buffer += data
+        *lines, self.buffer = self.buffer.split(b"\n")
+        events = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                self.heartbeats += 1
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping malformed stream line: %r", line[:200])
+        return events
+
+def status_from_event(event):
+    """Turn a v2 stream event into a v1.1-style status (id, full_text, user, entities, retweeted_status)
+    
+    Returns:
+        SimpleNamespace or None: None for events without a tweet (e.g. errors)
+    """
+    data = event.get("data")
+    if not data:
+        return None
+    includes = event.get("includes", {})
+    users = {user["id"]: user for user in includes.get("users", [])}
+    tweets = {tweet["id"]: tweet for tweet in includes.get("tweets", [])}
+    
+    def build(tweet):
+        entities = tweet.get("entities", {})
+        author = users.get(tweet.get("author_id"), {})
+        return SimpleNamespace(
+            id=int(tweet["id"]),
+            full_text=tweet.get("text", ""),
+            user=SimpleNamespace(screen_name=author.get("username")),
+            entities={
+                "user_mentions": [{"screen_name": mention["username"]} for mention in entities.get("mentions", [])],
+                "urls": [{"url": url.get("url"), "expanded_url": url.get("expanded_url")} for url in entities.get("urls", [])],
+            },
+        )
+    
+    status = build(data)
+    for reference in data.get("referenced_tweets", []):
+        if reference.get("type") == "retweeted":
+            original = tweets.get(reference["id"])
+            if original is not None and users.get(original.get("author_id")):
+                status.retweeted_status = build(original)
+    return status
+
+class FilteredStream:
+    """Long-lived connection to the Twitter v2 filtered stream
+    
+    run() keeps a stream open, parses events as chunks arrive and hands each
+    one to a callback. Dropped or stalled connections (no data, not even a
+    heartbeat, within read_timeout) are reopened with jittered exponential
+    backoff. After every successful connect, the first one included,
+    on_reconnect is called so the caller can catch up on what was posted
+    while disconnected (or before the stream was up).
+    """
+    
+    def __init__(self, bearer_token, url=STREAM_URL, read_timeout=90, backoff=None, session=None):
+        """
+        Args:
+            bearer_token: App bearer token for the v2 API
+            url: Stream endpoint; rules live at url + "/rules" (default: STREAM_URL)
+            read_timeout: Seconds without data before the connection counts as stalled (default: 90)
+            backoff: Overrides for BACKOFF, e.g. {"network": (0.01, 0.1)}
+            session: requests.Session to use (default: a new one)
+        """
+        self.url = url.rstrip("/")
+        self.read_timeout = read_timeout
+        self.backoff = {**BACKOFF, **(backoff or {})}
+        self.session = session or requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {bearer_token}"
+        self.stopping = threading.Event()
+        self.response = None
+        self.connects = 0
+        self.events = 0
+        self.heartbeats = 0
+    
+    def ensure_rules(self, accounts, tag="timefun-monitor"):
+        """Make sure the stream is filtered on tweets from the given accounts
+        
+        Adds one "from:a OR from:b" rule under the tag, replacing an older
+        rule with the same tag when the accounts changed.
+        """
+        value = " OR ".join(f"from:{account}" for account in accounts)
+        response = self.session.get(f"{self.url}/rules", timeout=10)
+        response.raise_for_status()
+        rules = response.json().get("data", [])
+        if any(rule.get("tag") == tag and rule.get("value") == value for rule in rules):
+            return
+        stale = [rule["id"] for rule in rules if rule.get("tag") == tag]
+        if stale:
+            response = self.session.post(f"{self.url}/rules", json={"delete": {"ids": stale}}, timeout=10)
+            response.raise_for_status()
+        response = self.session.post(f"{self.url}/rules", json={"add": [{"value": value, "tag": tag}]}, timeout=10)
+        response.raise_for_status()
+        logger.info("Stream rule set: %s", value)
+    
+    def backoff_delay(self, kind, attempt):
+        """Delay before reconnect attempt N (0-based): doubling from the first delay, capped, half jittered"""
+        first, cap = self.backoff[kind]
+        delay = min(cap, first * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def connect(self):
+        response = self.session.get(self.url, params=STREAM_PARAMS, stream=True, timeout=(10, self.read_timeout))
+        if response.status_code != 200:
+            body = response.text
+            response.close()
+            raise StreamHTTPError(response.status_code, body)
+        self.connects += 1
+        return response
+    
+    def read(self, response, on_event):
+        """Parse one connection until it ends; returns False if stopped"""
+        parser = StreamEventParser()
+        try:
+            # chunk_size=None yields each chunk as it arrives instead of filling a buffer
+            for chunk in response.iter_content(chunk_size=None):
+                if self.stopping.is_set():
+                    return False
+                for event in parser.feed(chunk):
+                    self.events += 1
+                    if "data" not in event and "errors" in event:
+                        logger.warning("Stream error event: %s", event["errors"])
+                    try:
+                        on_event(event)
+                    except Exception as e:
+                        # A failing handler must not drop the connection
+                        logger.error("Error handling stream event: %s", e)
+        finally:
+            self.heartbeats += parser.heartbeats
+        return not self.stopping.is_set()
+    
+    def run(self, on_event, on_reconnect=None):
+        """Stream events to on_event until stop() is called"""
+        self.stopping.clear()
+        attempt = 0
+        while not self.stopping.is_set():
+            kind = "network"
+            try:
+                self.response = self.connect()
+                if self.connects > 1:
+                    logger.info("Stream reconnected (connection %d)", self.connects)
+                else:
+                    logger.info("Stream connected")
+                if on_reconnect:
+                    # Events now buffer on the open connection while the gap is caught up
+                    try:
+                        on_reconnect()
+                    except Exception as e:
+                        logger.error("Error catching up after connecting: %s", e)
+                attempt = 0
+                if not self.read(self.response, on_event):
+                    break
+                logger.warning("Stream closed by the server")
+            except StreamHTTPError as e:
+                kind = "rate_limit" if e.status_code == 429 else "http"
+                logger.warning("Stream connection refused: %s", e)
+            except (requests.RequestException, OSError) as e:
+                if self.stopping.is_set():
+                    break
+                logger.warning("Stream connection lost: %s", e)
+            except Exception:
+                # stop() closing the response under a read surfaces as arbitrary errors
+                if self.stopping.is_set():
+                    break
+                raise
+            finally:
+                if self.response is not None:
+                    self.response.close()
+                    self.response = None
+            
+            delay = self.backoff_delay(kind, attempt)
+            attempt += 1
+            logger.info("Reconnecting to the stream in %.2fs", delay)
+            self.stopping.wait(delay)
+    
+    def stop(self):
+        """Stop run() (from an event handler or another thread); an open connection is closed"""
+        self.stopping.set()
+        response = self.response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
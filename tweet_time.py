@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import re
+import time
+from datetime import datetime, timezone
+
+# Twitter snowflake epoch (2010-11-04T01:42:54.657Z) in milliseconds
+TWITTER_EPOCH_MS = 1288834974657
+
+STATUS_ID_PATTERN = re.compile(r"/status(?:es)?/(\d+)")
+
+def snowflake_to_ms(tweet_id):
+    """Creation time (Unix milliseconds) encoded in a tweet ID, or None if it isn't a snowflake"""
+    try:
+        tweet_id = int(tweet_id)
+    except (TypeError, ValueError):
+        return None
+    # IDs from before snowflakes (late 2010) don't carry a timestamp
+    if tweet_id < (1 << 22):
+        return None
+    return (tweet_id >> 22) + TWITTER_EPOCH_MS
+
+def snowflake_to_datetime(tweet_id):
+    """Creation time of a tweet as an aware UTC datetime, or None"""
+    created_ms = snowflake_to_ms(tweet_id)
+    if created_ms is None:
+        return None
+    return datetime.fromtimestamp(created_ms / 1000, tz=timezone.utc)
+
+def tweet_age_ms(tweet_id, now_ms=None):
+    """Age of a tweet in milliseconds, or None if the ID isn't a snowflake"""
+    created_ms = snowflake_to_ms(tweet_id)
+    if created_ms is None:
+        return None
+    if now_ms is None:
+        now_ms = time.time() * 1000
+    return now_ms - created_ms
+
+def status_id_from_url(url):
+    """Extract the status ID from a tweet permalink (e.g. https://x.com/user/status/123)"""
+    if not url:
+        return None
+    match = STATUS_ID_PATTERN.search(url)
+    return match.group(1) if match else None
@@ -1,82 +1,127 @@
 # -*- coding: utf-8 -*-
 import os
-import re
 import time
+import queue
+import threading
 import tweepy
 from dotenv import load_dotenv
+from tweet_store import TweetDedupeStore
+from handle_extraction import HandleExtractor
+from tweet_stream import FilteredStream, STREAM_URL, status_from_event
+from bot_logging import get_logger
+
+logger = get_logger("twitter")
 
 class TwitterMonitor:
-    def __init__(self):
+    def __init__(self, target_account="timedotfun", api=None, journal=None, source=None, stream=None):
+        """
+        Args:
+            target_account: Account whose timeline is polled (default: timedotfun)
+            api: Object with user_timeline(), e.g. a replay stand-in (default: tweepy API from .env.utf8)
+            journal: JournalRecorder that API payloads are recorded to (default: None)
+            source: "poll" or "stream", how monitor() finds new tweets (default: TWITTER_SOURCE env, poll)
+            stream: FilteredStream used in stream mode (default: one from TWITTER_BEARER_TOKEN)
+        """
         load_dotenv(dotenv_path=".env.utf8")
         
-        # Get Twitter API credentials
-        api_key = os.getenv('TWITTER_API_KEY')
-        api_secret = os.getenv('TWITTER_API_SECRET')
-        access_token = os.getenv('TWITTER_ACCESS_TOKEN')
-        access_token_secret = os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
+        self.source = (source or os.getenv('TWITTER_SOURCE', 'poll')).lower().strip()
+        if self.source not in ("poll", "stream"):
+            raise ValueError(f"Unknown TWITTER_SOURCE: {self.source} (choose from poll, stream)")
+        if stream is None and self.source == "stream":
+            stream = FilteredStream(os.getenv('TWITTER_BEARER_TOKEN', '').strip(),
+                                    url=os.getenv('TWITTER_STREAM_URL', STREAM_URL).strip())
+        self.stream = stream
         
-        # Initialize Twitter API
-        auth = tweepy.OAuth1UserHandler(
-            api_key, api_secret, access_token, access_token_secret
-        )
-        self.api = tweepy.API(auth)
+        if api is None:
+            # Get Twitter API credentials
+            api_key = os.getenv('TWITTER_API_KEY')
+            api_secret = os.getenv('TWITTER_API_SECRET')
+            access_token = os.getenv('TWITTER_ACCESS_TOKEN')
+            access_token_secret = os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
+            
+            # Initialize Twitter API
+            auth = tweepy.OAuth1UserHandler(
+                api_key, api_secret, access_token, access_token_secret
+            )
+            api = tweepy.API(auth)
+        self.api = api
+        self.journal = journal
         
         # Set Twitter account to monitor
-        self.target_account = "timedotfun"
+        self.target_account = target_account
+        
+        # Store processed tweet IDs (bounded, persisted across restarts)
+        self.processed_tweets = TweetDedupeStore(f"processed_tweets_api_{self.target_account}.json")
         
-        # Store processed tweet IDs
-        self.processed_tweets = set()
+        # Incremental polling: only ask for tweets newer than the high-water mark
+        self.since_id = self.processed_tweets.high_water
+        self.page_size = 10
+        self.max_catchup_pages = 5
+        
+        self.extractor = HandleExtractor()
         
     def get_latest_retweets(self):
-        """Get latest retweets from @timedotfun"""
+        """Get latest retweets from @timedotfun
+        
+        The first call fetches the latest page; later calls only fetch tweets
+        newer than since_id, paging back (max_id) when more than a full page
+        arrived between polls.
+        """
         try:
-            # Get user timeline
-            tweets = self.api.user_timeline(
-                screen_name=self.target_account,
-                count=10,  # Get the latest 10 tweets
-                include_rts=True,
-                tweet_mode="extended"
-            )
+            tweets = []
+            max_id = None
+            for page in range(self.max_catchup_pages):
+                params = {
+                    "screen_name": self.target_account,
+                    "count": self.page_size,
+                    "include_rts": True,
+                    "tweet_mode": "extended"
+                }
+                if self.since_id is not None:
+                    params["since_id"] = self.since_id
+                if max_id is not None:
+                    params["max_id"] = max_id
+                
+                # Get user timeline
+                batch = self.api.user_timeline(**params)
+                tweets.extend(batch)
+                
+                # Only catch up when a full page arrived since the last poll
+                if self.since_id is None or len(batch) < self.page_size:
+                    break
+                max_id = min(tweet.id for tweet in batch) - 1
+            else:
+                logger.warning("Catch-up stopped after %d pages, older tweets may have been missed", self.max_catchup_pages)
+            
+            if tweets:
+                self.since_id = max(self.since_id or 0, max(tweet.id for tweet in tweets))
+            if self.journal:
+                self.journal.record_api(tweets)
             
             # Filter retweets
             retweets = [tweet for tweet in tweets if hasattr(tweet, 'retweeted_status')]
             
             return retweets
         except Exception as e:
-            print(f"Error getting tweets: {e}")
+            logger.error("Error getting tweets: %s", e)
             return []
     
     def extract_username(self, tweet):
-        """Extract promoted username from tweet"""
-        # Method 1: Extract author username from original retweeted tweet
-        if hasattr(tweet, 'retweeted_status'):
-            return tweet.retweeted_status.user.screen_name
-        
-        # Method 2: Extract username from tweet text
-        # Example: "time.fun has retweeted Zagabond @Zagabond Just set up my profile on @timedotfun"
-        full_text = tweet.full_text
-        
-        # Try to match patterns: "has retweeted Username" or "@Username"
-        patterns = [
-            r"��ת��\s+(\w+)",  # Match "��ת�� Username"
-            r"@(\w+)",          # Match "@Username"
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, full_text)
-            if matches:
-                # Exclude known usernames like timedotfun
-                for match in matches:
-                    if match.lower() != "timedotfun":
-                        return match
-        
-        return None
+        """Extract promoted username from tweet (the best-ranked candidate, or None)"""
+        candidates = self.extractor.from_status(tweet)
+        return candidates[0].handle if candidates else None
     
     def check_new_promotions(self):
         """Check for new promotions, return list of newly discovered usernames"""
-        new_usernames = []
-        
-        retweets = self.get_latest_retweets()
+        return [username for _, username in self.check_new_promotion_tweets()]
+    
+    def check_new_promotion_tweets(self):
+        """Check for new promotions, return list of (tweet, username) pairs"""
+        return self.process_retweets(self.get_latest_retweets())
+    
+    def process_retweets(self, retweets):
+        """Extract promoted usernames from retweets not seen before, return list of (tweet, username) pairs"""
+        new_promotions = []
         for tweet in retweets:
             # Skip if this tweet has already been processed
             if tweet.id in self.processed_tweets:
@@ -85,24 +130,79 @@ class TwitterMonitor:
             # Extract username
             username = self.extract_username(tweet)
             if username:
-                new_usernames.append(username)
-                print(f"Found new promoted user: {username}")
+                new_promotions.append((tweet, username))
+                logger.info("Found new promoted user: %s", username, extra={"tweet_id": tweet.id, "username": username})
             
             # Mark as processed
             self.processed_tweets.add(tweet.id)
         
-        return new_usernames
+        self.processed_tweets.save()
+        return new_promotions
+    
+    def handle_stream_event(self, event):
+        """Process one filtered-stream event, return list of (tweet, username) pairs"""
+        tweet = status_from_event(event)
+        if tweet is None:
+            return []
+        self.since_id = max(self.since_id or 0, tweet.id)
+        if self.journal:
+            self.journal.record_api([tweet])
+        if not hasattr(tweet, 'retweeted_status'):
+            return []
+        return self.process_retweets([tweet])
+    
+    def monitor_stream(self, callback):
+        """Monitor through the filtered stream, call callback function when new promotions are found
+        
+        Tweets posted before the stream connected, or while it was
+        reconnecting, are caught up through the polling path (since_id) once
+        the connection is open, so nothing is lost across a gap. Promotions
+        are handed to one callback thread in order, so a slow buy never
+        stalls the stream. Runs until self.stream.stop() is called; queued
+        promotions are handled before it returns.
+        """
+        promotions = queue.Queue()
+        
+        def handle_promotions():
+            while True:
+                username = promotions.get()
+                if username is None:
+                    return
+                try:
+                    callback(username)
+                except Exception as e:
+                    logger.error("Error handling promoted user %s: %s", username, e)
+        
+        def catch_up():
+            for _, username in self.check_new_promotion_tweets():
+                promotions.put(username)
+        
+        def on_event(event):
+            for _, username in self.handle_stream_event(event):
+                promotions.put(username)
+        
+        logger.info("Starting to stream @%s retweets...", self.target_account)
+        self.stream.ensure_rules([self.target_account])
+        worker = threading.Thread(target=handle_promotions, name="stream-promotions", daemon=True)
+        worker.start()
+        try:
+            self.stream.run(on_event, on_reconnect=catch_up)
+        finally:
+            promotions.put(None)
+            worker.join()
     
     def monitor(self, callback):
         """Continuously monitor Twitter, call callback function when new promotions are found"""
+        if self.source == "stream":
+            return self.monitor_stream(callback)
+        
         try:
             check_interval = int(os.getenv('CHECK_INTERVAL', '60').strip())
         except ValueError as e:
-            print(f"Error parsing CHECK_INTERVAL: {e}")
-            print("Using default value of 60 seconds")
+            logger.warning("Error parsing CHECK_INTERVAL, using default value of 60 seconds: %s", e)
             check_interval = 60
         
-        print(f"Starting to monitor @{self.target_account} retweets...")
+        logger.info("Starting to monitor @%s retweets...", self.target_account)
         
         while True:
             try:
@@ -115,6 +215,6 @@ class TwitterMonitor:
                 # Wait for specified interval
                 time.sleep(check_interval)
             except Exception as e:
-                print(f"Error during monitoring: {e}")
+                logger.error("Error during monitoring: %s", e)
                 # Wait a while before continuing after error
                 time.sleep(check_interval) 
\ No newline at end of file
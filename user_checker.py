@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from bot_logging import get_logger
+
+logger = get_logger("user_checker")
+
+# Where a server-rendered profile names its handle: the title, and the
+# content/href of meta and link tags (og:title, og:url, canonical)
+PAGE_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.I | re.S)
+TAG_VALUES = re.compile(r"<(?:meta|link)\b[^>]*?\b(?:content|href)=[\"']([^\"']*)", re.I)
+
+class TTLCache:
+    """Thread-safe cache where each entry expires after its own TTL"""
+    
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        """Return (found, value) for a key that has not expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self.entries[key]
+                return False, None
+            return True, value
+    
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class UserExistenceChecker:
+    """Check whether handles exist on time.fun without touching the browser
+    
+    Probes the profile route over a keep-alive HTTP session: a redirect to
+    the explore or home page (or a 404) means the handle is not a creator,
+    a 200 whose HTML names the handle (see is_profile_page) means it is.
+    The app is a single-page app that can answer 200 for any path, so a
+    bare 200 is inconclusive, like a Cloudflare challenge or a network
+    error, and goes to the browser fallback. Positive and negative answers
+    are cached for different lengths of time.
+    """
+    
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    
+    def __init__(self, base_url="https://time.fun", browser_fallback=None, positive_ttl=3600, negative_ttl=300,
+                 timeout=5, max_workers=8):
+        """
+        Args:
+            base_url: Site root to probe
+            browser_fallback: Callable(username) -> bool used when HTTP is inconclusive
+            positive_ttl: Seconds to cache "exists" answers
+            negative_ttl: Seconds to cache "does not exist" answers
+            timeout: HTTP timeout in seconds
+            max_workers: Concurrent probes for check_many
+        """
+        self.base_url = base_url.rstrip("/")
+        self.browser_fallback = browser_fallback
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.cache = TTLCache()
+        
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = self.USER_AGENT
+    
+    @staticmethod
+    def is_profile_page(html, username):
+        """Does the page's title or metadata name the handle (as a whole word)?"""
+        name = re.compile(r"(?<!\w)@?" + re.escape(username) + r"(?!\w)", re.I)
+        values = PAGE_TITLE.findall(html) + TAG_VALUES.findall(html)
+        return any(name.search(value) for value in values)
+    
+    def probe(self, username):
+        """Probe the profile route over HTTP
+        
+        Returns:
+            bool or None: True/False if the response is conclusive, None otherwise
+        """
+        try:
+            response = self.session.get(f"{self.base_url}/{username}", allow_redirects=False, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning("HTTP check for '%s' failed: %s", username, e)
+            return None
+        
+        if response.status_code == 404:
+            return False
+        if response.is_redirect:
+            # Unknown handles are redirected to explore or the home page
+            path = urlparse(response.headers.get("Location", "")).path.rstrip("/")
+            if path in ("", "/explore") or "explore" in path:
+                return False
+            if path.lower() == f"/{username.lower()}":
+                return True
+            return None
+        if response.status_code == 200:
+            if self.is_profile_page(response.text, username):
+                return True
+            # The app shell answers 200 for unknown handles too
+            logger.debug("HTTP 200 for '%s' without profile markers, inconclusive", username)
+            return None
+        
+        # 403/503 are usually a Cloudflare challenge, let the browser decide
+        return None
+    
+    def check(self, username):
+        """Check if a handle exists, using the cache, HTTP, then the browser fallback"""
+        key = username.lower()
+        found, exists = self.cache.get(key)
+        if found:
+            logger.info("User '%s' %s on time.fun (cached)", username, "exists" if exists else "does not exist")
+            return exists
+        
+        exists = self.probe(username)
+        if exists is None:
+            if self.browser_fallback is None:
+                return False
+            exists = self.browser_fallback(username)
+        else:
+            logger.info("User '%s' %s on time.fun (HTTP)", username, "exists" if exists else "does not exist")
+        
+        self.cache.set(key, exists, self.positive_ttl if exists else self.negative_ttl)
+        return exists
+    
+    def check_many(self, usernames):
+        """Probe many handles concurrently and warm the cache
+        
+        Inconclusive handles are left to check(), which runs the browser
+        fallback on the calling thread.
+        
+        Returns:
+            dict: username -> True/False/None
+        """
+        results = {}
+        todo = []
+        for username in dict.fromkeys(usernames):
+            found, exists = self.cache.get(username.lower())
+            if found:
+                results[username] = exists
+            else:
+                todo.append(username)
+        
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo))) as executor:
+                for username, exists in zip(todo, executor.map(self.probe, todo)):
+                    results[username] = exists
+                    if exists is not None:
+                        self.cache.set(username.lower(), exists, self.positive_ttl if exists else self.negative_ttl)
+        return results
+    
+    def close(self):
+        self.session.close()